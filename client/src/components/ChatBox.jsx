@@ -3,6 +3,13 @@ import api from '../api/axios';
 import { useAuth } from '../context/AuthContext';
 import './ChatBox.css';
 
+// Replaces messages that came back changed and appends new ones, keeping id order.
+const mergeMessages = (current, changed) => {
+    const byId = new Map(current.map(msg => [msg.id, msg]));
+    for (const msg of changed) byId.set(msg.id, msg);
+    return [...byId.values()].sort((a, b) => a.id - b.id);
+};
+
 const ChatBox = ({ pickupId, className }) => {
     const { user } = useAuth();
     const [messages, setMessages] = useState([]);
@@ -14,14 +21,32 @@ const ChatBox = ({ pickupId, className }) => {
     const [showOfferInput, setShowOfferInput] = useState(false);
     const [offerAmount, setOfferAmount] = useState('');
 
-    // Poll for new messages every 5 seconds
+    // Live updates over the event stream; polling every 5 seconds takes over
+    // whenever the stream is down.
     useEffect(() => {
         let interval;
+        let stream;
+        let reconnect;
+        let closed = false;
+        let streamOpen = false;
+        // Newest updated_at seen so far; later polls only ask for what changed since.
+        let since = null;
 
         const fetchMessages = async () => {
             try {
-                const response = await api.get(`pickup/chat/${pickupId}/`);
-                setMessages(response.data);
+                const response = await api.get(`pickup/chat/${pickupId}/`, {
+                    params: since ? { since } : {},
+                    validateStatus: (code) => (code >= 200 && code < 300) || code === 304,
+                });
+                if (response.status === 200) {
+                    const changed = response.data;
+                    for (const msg of changed) {
+                        if (!since || msg.updated_at > since) since = msg.updated_at;
+                    }
+                    if (since === null || changed.length) {
+                        setMessages(prev => mergeMessages(prev, changed));
+                    }
+                }
                 setError(null);
             } catch (err) {
                 console.error("Failed to fetch messages", err);
@@ -32,14 +57,71 @@ const ChatBox = ({ pickupId, className }) => {
             }
         };
 
+        const openStream = async () => {
+            if (!window.EventSource) return;
+            // A single-use ticket rather than the access token, which would
+            // end up in access logs as part of the URL.
+            let ticket;
+            try {
+                const response = await api.post(`pickup/chat/${pickupId}/stream/ticket/`);
+                ticket = response.data.ticket;
+            } catch (err) {
+                return; // Polling carries on
+            }
+            if (closed) return;
+            const url = new URL(`pickup/chat/${pickupId}/stream/`, api.defaults.baseURL);
+            url.searchParams.set("ticket", ticket);
+            stream = new EventSource(url);
+            stream.onopen = () => {
+                streamOpen = true;
+                fetchMessages(); // Catch up on anything sent while disconnected
+            };
+            stream.onerror = () => {
+                const wasOpen = streamOpen;
+                streamOpen = false;
+                // The ticket is spent, so EventSource cannot reconnect by
+                // itself. A stream that never opened (e.g. a server without
+                // ASGI) is left to polling.
+                stream.close();
+                if (wasOpen && !closed) reconnect = setTimeout(openStream, 3000);
+            };
+            stream.addEventListener("message", (event) => {
+                const msg = JSON.parse(event.data);
+                if (!since || msg.updated_at > since) since = msg.updated_at;
+                setMessages(prev => mergeMessages(prev, [msg]));
+            });
+        };
+
         if (pickupId) {
             fetchMessages(); // Initial fetch
-            interval = setInterval(fetchMessages, 5000); // Polling
+            openStream();
+            interval = setInterval(() => {
+                if (!streamOpen) fetchMessages();
+            }, 5000);
         }
 
-        return () => clearInterval(interval);
+        return () => {
+            closed = true;
+            clearInterval(interval);
+            clearTimeout(reconnect);
+            stream?.close();
+        };
     }, [pickupId]);
 
+    // Mark the other side's messages as read once they are on screen
+    useEffect(() => {
+        const unread = messages.filter(msg =>
+            !msg.is_read && msg.sender !== user?.id && msg.sender_email !== user?.email
+        );
+        if (!pickupId || !unread.length) return;
+        const upTo = Math.max(...unread.map(msg => msg.id));
+        api.post(`pickup/chat/${pickupId}/read/`, { up_to: upTo })
+            .then(() => setMessages(prev => prev.map(msg =>
+                unread.some(u => u.id === msg.id) ? { ...msg, is_read: true } : msg
+            )))
+            .catch(err => console.error("Failed to mark messages read", err));
+    }, [messages, pickupId]);
+
     // Auto-scroll to bottom when messages change
     useEffect(() => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -26,6 +26,7 @@ const ClientDashboard = () => {
   const navigate = useNavigate();
   const { user, logout } = useAuth();
   const [bookings, setBookings] = useState([]);
+  const [nextBookingsPage, setNextBookingsPage] = useState(null);
   const [stats, setStats] = useState({
     totalBookings: 0,
     pendingBookings: 0,
@@ -35,6 +36,7 @@ const ClientDashboard = () => {
   const [activeTab, setActiveTab] = useState("overview"); // overview, bookings, profile
   const [selectedBooking, setSelectedBooking] = useState(null);
   const [activeChatPickupId, setActiveChatPickupId] = useState(null);
+  const [unreadCounts, setUnreadCounts] = useState({});
 
   useEffect(() => {
     if (!user) {
@@ -54,27 +56,49 @@ const ClientDashboard = () => {
 
   const loadBookings = async () => {
     try {
-      const res = await api.get("pickup/list/");
-      const userBookings = res.data;
-      setBookings(userBookings);
-
-      // Calculate statistics
-      const stats = {
-        totalBookings: userBookings.length,
-        pendingBookings: userBookings.filter((b) => b.status === "pending")
-          .length,
-        completedBookings: userBookings.filter((b) => b.status === "completed")
-          .length,
-        totalEarnings: userBookings
-          .filter((b) => b.status === "completed")
-          .reduce((sum, b) => sum + parseFloat(b.estimated_price || 0), 0),
-      };
-      setStats(stats);
+      // The list is paginated; the totals come from the server so they
+      // cover every booking, not just the first page.
+      const [res, statsRes] = await Promise.all([
+        api.get("pickup/list/"),
+        api.get("pickup/list/stats/"),
+      ]);
+      setBookings(res.data.results);
+      setNextBookingsPage(res.data.next);
+      setStats({
+        totalBookings: statsRes.data.total,
+        pendingBookings: statsRes.data.pending,
+        completedBookings: statsRes.data.completed,
+        totalEarnings: parseFloat(statsRes.data.completed_value),
+      });
     } catch (err) {
       console.error("Failed to load bookings:", err);
     }
   };
 
+  const loadMoreBookings = async () => {
+    try {
+      const res = await api.get(nextBookingsPage);
+      setBookings((loaded) => [...loaded, ...res.data.results]);
+      setNextBookingsPage(res.data.next);
+    } catch (err) {
+      console.error("Failed to load more bookings:", err);
+    }
+  };
+
+  // Refresh badges on load and whenever a chat is closed
+  useEffect(() => {
+    if (user?.is_client && !activeChatPickupId) loadUnreadCounts();
+  }, [user, activeChatPickupId]);
+
+  const loadUnreadCounts = async () => {
+    try {
+      const res = await api.get("pickup/chat/unread/");
+      setUnreadCounts(res.data);
+    } catch (err) {
+      console.error("Failed to load unread counts:", err);
+    }
+  };
+
   const getStatusBadge = (status) => {
     const badges = {
       pending: { color: "#fbbf24", icon: Clock, text: "Pending" },
@@ -761,6 +785,11 @@ const ClientDashboard = () => {
                     >
                       <MessageCircle size={16} />
                       Chat
+                      {unreadCounts[booking.id] > 0 && (
+                        <span className="chat-unread-badge">
+                          {unreadCounts[booking.id]}
+                        </span>
+                      )}
                     </button>
                   )}
               </div>
@@ -769,6 +798,12 @@ const ClientDashboard = () => {
         ))}
       </div>
 
+      {nextBookingsPage && (
+        <button className="btn-secondary load-more" onClick={loadMoreBookings}>
+          Load more
+        </button>
+      )}
+
       {bookings.length === 0 && (
         <div className="empty-state">
           <Package
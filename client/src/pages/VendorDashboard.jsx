@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import {
   Package,
@@ -26,6 +26,21 @@ import api from "../api/axios";
 import ChatBox from "../components/ChatBox";
 import "./VendorDashboard.css";
 
+const POOL_POLL_INTERVAL = 15000;
+
+// Applies a /pickup/available/changes/ response to the pool list: drop the
+// pickups that left, then insert or replace the ones that entered.
+const applyPoolChanges = (pool, { entered, left }) => {
+  const gone = new Set(left);
+  const byId = new Map(entered.map((pickup) => [pickup.id, pickup]));
+  const kept = pool
+    .filter((pickup) => !gone.has(pickup.id))
+    .map((pickup) => byId.get(pickup.id) || pickup);
+  const known = new Set(kept.map((pickup) => pickup.id));
+  const added = entered.filter((pickup) => !known.has(pickup.id)).reverse();
+  return [...added, ...kept];
+};
+
 const VendorDashboard = () => {
   const navigate = useNavigate();
   const { user } = useAuth();
@@ -46,10 +61,14 @@ const VendorDashboard = () => {
   ];
 
   const [availableBookings, setAvailableBookings] = useState([]);
+  const [nextAvailablePage, setNextAvailablePage] = useState(null);
+  const poolWatermark = useRef(null);
   const [myBookings, setMyBookings] = useState([]);
+  const [nextMyPage, setNextMyPage] = useState(null);
   const [loading, setLoading] = useState(true);
 
   const [stats, setStats] = useState({
+    available: 0,
     totalAssigned: 0,
     pendingPickups: 0,
     completedPickups: 0,
@@ -86,6 +105,12 @@ const VendorDashboard = () => {
     getCurrentLocation();
   }, [user, navigate]);
 
+  useEffect(() => {
+    if (!user?.is_seller) return;
+    const timer = setInterval(pollPoolChanges, POOL_POLL_INTERVAL);
+    return () => clearInterval(timer);
+  }, [user]);
+
   const getCurrentLocation = () => {
     if (navigator.geolocation) {
       navigator.geolocation.getCurrentPosition(
@@ -105,13 +130,20 @@ const VendorDashboard = () => {
   const fetchAllData = async () => {
     setLoading(true);
     try {
-      const availRes = await api.get("/pickup/available/");
-      setAvailableBookings(availRes.data);
-
-      const myRes = await api.get("/pickup/vendor-list/");
-      setMyBookings(myRes.data);
-
-      updateStats(myRes.data);
+      // Take the watermark first: changes made while the pool loads are
+      // then replayed by the next poll instead of being missed.
+      const startRes = await api.get("/pickup/available/changes/");
+      poolWatermark.current = startRes.data.watermark;
+
+      const [availRes, myRes] = await Promise.all([
+        api.get("/pickup/available/"),
+        api.get("/pickup/vendor-list/"),
+        loadStats(),
+      ]);
+      setAvailableBookings(availRes.data.results);
+      setNextAvailablePage(availRes.data.next);
+      setMyBookings(myRes.data.results);
+      setNextMyPage(myRes.data.next);
     } catch (err) {
       console.error("Error fetching data:", err);
     } finally {
@@ -119,18 +151,63 @@ const VendorDashboard = () => {
     }
   };
 
-  const updateStats = (bookings) => {
-    const stats = {
-      totalAssigned: bookings.length,
-      pendingPickups: bookings.filter((b) =>
-        ["vendor_accepted", "scheduled", "in_progress"].includes(b.status),
-      ).length,
-      completedPickups: bookings.filter((b) => b.status === "completed").length,
-      totalEarnings: bookings
-        .filter((b) => b.status === "completed")
-        .reduce((sum, b) => sum + parseFloat(b.estimated_price || 0), 0),
-    };
-    setStats(stats);
+  const pollPoolChanges = async () => {
+    if (!poolWatermark.current) return;
+    try {
+      const res = await api.get("/pickup/available/changes/", {
+        params: { since: poolWatermark.current },
+      });
+      poolWatermark.current = res.data.watermark;
+      setAvailableBookings((pool) => applyPoolChanges(pool, res.data));
+      if (res.data.entered.length || res.data.left.length) loadStats();
+    } catch (err) {
+      if (err.response?.status === 410) {
+        fetchAllData();
+      } else {
+        console.error("Error polling pool changes:", err);
+      }
+    }
+  };
+
+  // Totals come from the server: the lists below hold only the pages
+  // loaded so far.
+  const loadStats = async () => {
+    try {
+      const res = await api.get("/pickup/vendor-list/stats/");
+      setStats({
+        available: res.data.available,
+        totalAssigned: res.data.total,
+        pendingPickups: res.data.pending,
+        completedPickups: res.data.completed,
+        totalEarnings: parseFloat(res.data.completed_value),
+      });
+    } catch (err) {
+      console.error("Error loading stats:", err);
+    }
+  };
+
+  const loadMoreAvailable = async () => {
+    try {
+      const res = await api.get(nextAvailablePage);
+      // Polling may already have added some of these rows.
+      setAvailableBookings((pool) => {
+        const known = new Set(pool.map((pickup) => pickup.id));
+        return [...pool, ...res.data.results.filter((p) => !known.has(p.id))];
+      });
+      setNextAvailablePage(res.data.next);
+    } catch (err) {
+      console.error("Error loading more pickups:", err);
+    }
+  };
+
+  const loadMoreMine = async () => {
+    try {
+      const res = await api.get(nextMyPage);
+      setMyBookings((loaded) => [...loaded, ...res.data.results]);
+      setNextMyPage(res.data.next);
+    } catch (err) {
+      console.error("Error loading more pickups:", err);
+    }
   };
 
   const handleScrapTypeToggle = (type) => {
@@ -591,7 +668,7 @@ const VendorDashboard = () => {
             <Package size={28} style={{ color: "#3b82f6" }} />
           </div>
           <div className="stat-content">
-            <h3>{availableBookings.length}</h3>
+            <h3>{stats.available}</h3>
             <p>Available Now</p>
           </div>
         </div>
@@ -745,6 +822,11 @@ const VendorDashboard = () => {
           </div>
         )}
       </div>
+      {nextAvailablePage && (
+        <button className="btn-secondary load-more" onClick={loadMoreAvailable}>
+          Load more
+        </button>
+      )}
     </div>
   );
 
@@ -810,6 +892,11 @@ const VendorDashboard = () => {
           </div>
         )}
       </div>
+      {nextMyPage && (
+        <button className="btn-secondary load-more" onClick={loadMoreMine}>
+          Load more
+        </button>
+      )}
     </div>
   );
 
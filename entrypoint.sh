@@ -18,6 +18,15 @@ else
     echo "Running in PRODUCTION mode..."
     echo "Collecting static files..."
     python manage.py collectstatic --noinput
-    # Using exec to replace shell with gunicorn process
-    exec gunicorn core.wsgi:application --bind 0.0.0.0:8000
+    # Using exec to replace shell with gunicorn process. ASGI (the default)
+    # runs uvicorn workers, where the async views and chat streams wait on
+    # the OTP provider, the database and the broker without holding a
+    # worker each; SERVER_MODE=wsgi falls back to sync workers. Worker count
+    # comes from WEB_CONCURRENCY.
+    if [ "${SERVER_MODE:-asgi}" = "wsgi" ]; then
+        exec gunicorn core.wsgi:application --bind 0.0.0.0:8000
+    else
+        exec gunicorn core.asgi:application --bind 0.0.0.0:8000 \
+            --worker-class uvicorn_worker.UvicornWorker
+    fi
 fi
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, PickupRequest
+from .models import User, PickupRequest, Job, DeadLetterJob
+from .services import jobs
 
 
 class UserAdmin(BaseUserAdmin):
@@ -108,7 +109,8 @@ class PickupRequestAdmin(admin.ModelAdmin):
     list_filter = ("status", "date", "is_phone_verified")
     search_fields = ("user__email", "address", "id", "assigned_to__email")
     list_editable = ("status", "assigned_to")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("scrape_image_thumb", "created_at", "updated_at")
+    actions = ["mark_completed", "expire_pickups"]
 
     fieldsets = (
         (
@@ -121,6 +123,7 @@ class PickupRequestAdmin(admin.ModelAdmin):
                     "date",
                     "time_slot",
                     "scrape_image",
+                    "scrape_image_thumb",
                 )
             },
         ),
@@ -135,7 +138,6 @@ class PickupRequestAdmin(admin.ModelAdmin):
                     "contact_name",
                     "contact_phone",
                     "is_phone_verified",
-                    "otp_code",
                 )
             },
         ),
@@ -145,8 +147,40 @@ class PickupRequestAdmin(admin.ModelAdmin):
         ),
     )
 
+    @admin.action(description="Mark selected scheduled pickups as completed")
+    def mark_completed(self, request, queryset):
+        moved = queryset.transition("complete")
+        self.message_user(request, f"{moved} pickup(s) marked as completed.")
+
+    @admin.action(description="Expire selected pending/open pickups")
+    def expire_pickups(self, request, queryset):
+        moved = queryset.transition("expire")
+        self.message_user(request, f"{moved} pickup(s) expired.")
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "assigned_to":
             kwargs["queryset"] = User.objects.filter(is_seller=True)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["id", "task", "run_at", "attempts", "max_attempts", "created_at"]
+    list_filter = ["task"]
+    ordering = ["run_at", "id"]
+
+
+@admin.register(DeadLetterJob)
+class DeadLetterJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "task", "attempts", "created_at", "failed_at"]
+    list_filter = ["task"]
+    readonly_fields = ["task", "payload", "attempts", "last_error", "created_at", "failed_at"]
+    actions = ["requeue"]
+
+    @admin.action(description="Queue selected jobs again")
+    def requeue(self, request, queryset):
+        for dead in queryset:
+            jobs.enqueue(dead.task, **dead.payload)
+        count, _ = queryset.delete()
+        self.message_user(request, f"{count} job(s) queued again.")
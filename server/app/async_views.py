@@ -0,0 +1,49 @@
+"""
+DRF views with ``async def`` handlers.
+
+DRF's dispatch() is synchronous. AsyncGenericAPIView runs the same steps,
+but awaits the handler, so a view that waits on the OTP provider or the
+database with async calls gives its worker back to other requests while it
+waits. Under core.asgi that is the uvicorn worker's event loop; under WSGI
+Django runs the view in an event loop of its own and nothing is gained, but
+it behaves the same.
+
+Authentication, permission and throttle checks are synchronous (they may
+hit the database or the cache) and run in a thread, as Django runs sync
+views under ASGI. Handlers must not touch the database synchronously: use
+the ORM's async methods, or sync_to_async for serializer saves and the
+like.
+"""
+
+import inspect
+
+from asgiref.sync import sync_to_async
+from rest_framework.generics import GenericAPIView
+
+
+class AsyncGenericAPIView(GenericAPIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if inspect.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                # OPTIONS and 405s use DRF's synchronous handlers.
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# What permission checks and serializers (e.g. a chat message's sender_name
+# and sender_email) read off request.user. Only these are cached, so the
+# password hash never reaches the cache. Any other field is deferred and
+# loaded from the database when first read, which async views must not do
+# in the event loop: use sync_to_async, or fetch the user (VerifyAccountView).
+CACHED_USER_FIELDS = (
+    "id",
+    "email",
+    "full_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "is_client",
+    "is_seller",
+    "is_verified",
+    "is_phone_verified",
+    "is_email_verified",
+)
+
+
+def user_cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the authenticated user's id, name, email
+    and flags (CACHED_USER_FIELDS) in the cache for AUTH_USER_CACHE_TTL seconds, so
+    most requests skip the user lookup.
+
+    Entries are dropped whenever the user is saved or deleted (see
+    app/signals.py). Changes made with queryset.update() skip the signal and
+    can be served stale for up to AUTH_USER_CACHE_TTL.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        values = cache.get(key)
+        if values is not None:
+            # from_db() takes the values in model field order.
+            names = [
+                field.attname
+                for field in self.user_model._meta.concrete_fields
+                if field.attname in values
+            ]
+            return self.user_model.from_db(
+                router.db_for_read(self.user_model), names, [values[name] for name in names]
+            )
+        user = super().get_user(validated_token)
+        values = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        cache.set(key, values, settings.AUTH_USER_CACHE_TTL)
+        return user
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
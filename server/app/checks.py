@@ -0,0 +1,50 @@
+"""
+Startup checks for settings that only break once the app runs as several
+processes (gunicorn/uvicorn workers, the job worker). The server entry
+points (core/wsgi.py, core/asgi.py) and run_worker call them.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def require_shared_cache():
+    """
+    Pickup OTPs, throttle counters, cached user details and the open-pool feed
+    generation live in the default cache, and every process has to see the
+    same values. Raises unless that cache is shared, DEBUG is on, or
+    ALLOW_LOCAL_CACHE says the server runs a single process.
+    """
+    if settings.DEBUG or settings.ALLOW_LOCAL_CACHE:
+        return
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend in PER_PROCESS_CACHES:
+        raise ImproperlyConfigured(
+            f"CACHES['default'] is {backend}, which is not shared between "
+            "processes. Set CACHE_BACKEND/CACHE_LOCATION to Redis or "
+            "Memcached, or ALLOW_LOCAL_CACHE=True for a single process."
+        )
+
+
+def require_shared_broker():
+    """
+    Chat events are published by whichever process saves the message (a
+    server worker or the job worker), and the stream may be held open by
+    any server worker. InProcessBroker reaches neither, so streams would
+    silently miss messages. Raises unless CHAT_BROKER reaches every process,
+    DEBUG is on, or ALLOW_LOCAL_BROKER is set.
+    """
+    if settings.DEBUG or settings.ALLOW_LOCAL_BROKER:
+        return
+    if settings.CHAT_BROKER == "app.services.chat_events.InProcessBroker":
+        raise ImproperlyConfigured(
+            "CHAT_BROKER is InProcessBroker, which only reaches streams in the "
+            "same process. Set CHAT_BROKER=app.services.chat_events.RedisBroker "
+            "and CHAT_BROKER_URL, or ALLOW_LOCAL_BROKER=True when the server is "
+            "one process and nothing else saves chat messages."
+        )
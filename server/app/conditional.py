@@ -0,0 +1,74 @@
+"""
+Conditional GET (ETag) for the list endpoints.
+
+Validators are built from a watermark of the rows behind a response,
+their count and newest ``updated_at``, read with one aggregate query
+before anything is fetched or serialized. Every write path bumps
+``updated_at`` and deletes change the count, so the watermark moves
+whenever the rows do. Fields shown from a related user (a vendor's name,
+a message sender's) change without touching the rows, so their current
+values are read in a second query and hashed in as well. The ETag also
+covers the path, query string and user, since those pick which rows and
+fields a response holds.
+
+There is no Last-Modified: it has whole-second resolution, so a change
+in the same second as the client's copy would still get a 304.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+
+class Validators:
+    def __init__(self, request, *parts):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = f"{request.path}?{params}|{request.user.pk}|{parts}"
+        self.etag = f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+    @classmethod
+    def for_queryset(cls, request, queryset, related=()):
+        """``related``: lookups of related fields the response shows."""
+        queryset = queryset.order_by()
+        watermark = queryset.aggregate(count=Count("id"), last=Max("updated_at"))
+        values = list(cls._related_values(queryset, related)) if related else []
+        return cls._from_watermark(request, watermark, values)
+
+    @classmethod
+    async def afor_queryset(cls, request, queryset, related=()):
+        queryset = queryset.order_by()
+        watermark = await queryset.aaggregate(count=Count("id"), last=Max("updated_at"))
+        values = [row async for row in cls._related_values(queryset, related)] if related else []
+        return cls._from_watermark(request, watermark, values)
+
+    @staticmethod
+    def _related_values(queryset, related):
+        return queryset.values_list(*related).distinct().order_by(*related)
+
+    @classmethod
+    def _from_watermark(cls, request, watermark, related_values):
+        return cls(
+            request,
+            watermark["count"],
+            watermark["last"] and watermark["last"].isoformat(),
+            related_values,
+        )
+
+    def not_modified(self, request):
+        """A 304 when the client's copy is current, otherwise None."""
+        response = get_conditional_response(request, etag=self.etag)
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        # Let browsers keep the body but revalidate it on every request.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.models import PickupRequest, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Races vendor threads on a shared set of open pickups through the "
+        "conditional-UPDATE accept path and reports throughput. Seeded rows "
+        "are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pickups", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--hot-set", type=int, default=8,
+                            help="How many pickups the threads fight over at a time.")
+
+    def handle(self, *args, **options):
+        customer = User.objects.create_user(email="bench-accept-client@example.com")
+        vendors = [
+            User.objects.create_user(email=f"bench-accept-{i}@example.com", is_seller=True)
+            for i in range(options["threads"])
+        ]
+        PickupRequest.objects.bulk_create(
+            PickupRequest(
+                user=customer,
+                address="Contested",
+                date="2026-01-01",
+                time_slot="10:00-12:00",
+                status="open",
+            )
+            for _ in range(options["pickups"])
+        )
+        ids = list(
+            PickupRequest.objects.filter(user=customer).order_by("id").values_list("id", flat=True)
+        )
+
+        try:
+            self.race(ids, vendors, options["hot_set"])
+        finally:
+            PickupRequest.objects.filter(user=customer).delete()
+            User.objects.filter(email__startswith="bench-accept-").delete()
+
+    def race(self, ids, vendors, hot_set):
+        lock = threading.Lock()
+        remaining = list(ids)
+        stats = {"won": 0, "lost": 0}
+        latencies = []
+        barrier = threading.Barrier(len(vendors))
+
+        def worker(vendor, seed):
+            rng = random.Random(seed)
+            won = lost = 0
+            timings = []
+            try:
+                barrier.wait()
+                while True:
+                    with lock:
+                        if not remaining:
+                            break
+                        pk = rng.choice(remaining[:hot_set])
+                    started = time.perf_counter()
+                    claimed = PickupRequest.objects.filter(id=pk).transition(
+                        "accept", assigned_to=vendor
+                    )
+                    timings.append(time.perf_counter() - started)
+                    if claimed:
+                        won += 1
+                        with lock:
+                            remaining.remove(pk)
+                    else:
+                        lost += 1
+            finally:
+                connection.close()
+                with lock:
+                    stats["won"] += won
+                    stats["lost"] += lost
+                    latencies.extend(timings)
+
+        threads = [
+            threading.Thread(target=worker, args=(vendor, i)) for i, vendor in enumerate(vendors)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        double_assigned = PickupRequest.objects.filter(id__in=ids).exclude(
+            status="vendor_accepted"
+        ).count()
+        if stats["won"] != len(ids) or double_assigned:
+            raise CommandError(
+                f"expected {len(ids)} winners, got {stats['won']} "
+                f"({double_assigned} pickups not accepted)"
+            )
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        self.stdout.write(
+            f"{len(vendors)} threads, {len(ids)} pickups, hot set {hot_set}\n"
+            f"accepted: {stats['won']}  lost races: {stats['lost']}\n"
+            f"throughput: {stats['won'] / elapsed:.0f} accepts/s "
+            f"({(stats['won'] + stats['lost']) / elapsed:.0f} attempts/s)\n"
+            f"attempt latency: p50 {p50:.2f} ms  p99 {p99:.2f} ms"
+        )
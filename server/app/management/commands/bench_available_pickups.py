@@ -0,0 +1,93 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from app.models import PickupRequest, User
+from app.services import geo
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds open pickups across India and compares the full open-pool scan "
+        "with the geohash nearby query. All rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000)
+        parser.add_argument("--radius-km", type=float, default=10.0)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            self.seed(rng, options["count"], options["batch_size"])
+            self.run(rng, options["radius_km"], options["repeat"])
+            transaction.set_rollback(True)
+
+    def seed(self, rng, count, batch_size):
+        user = User.objects.create_user(email="bench-pickups@example.com")
+        self.stdout.write(f"Seeding {count} open pickups...")
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - offset)):
+                lat = rng.uniform(8.0, 35.0)
+                lng = rng.uniform(68.0, 97.0)
+                batch.append(
+                    PickupRequest(
+                        user=user,
+                        address="Benchmark address",
+                        latitude=lat,
+                        longitude=lng,
+                        geohash=geo.encode(lat, lng),
+                        date="2026-01-01",
+                        time_slot="10:00-12:00",
+                        status="open",
+                    )
+                )
+            PickupRequest.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {PickupRequest._meta.db_table}")
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def timed(self, queryset, repeat):
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = len(list(queryset.all()))
+            timings.append(time.perf_counter() - started)
+        return min(timings), rows
+
+    def run(self, rng, radius_km, repeat):
+        full_scan = PickupRequest.objects.filter(
+            status="open", assigned_to__isnull=True
+        ).order_by("-created_at")
+        full_time, full_rows = self.timed(full_scan, max(1, repeat // 2))
+        self.stdout.write(
+            f"full scan:  {full_rows:>9} rows  {full_time * 1000:10.1f} ms"
+        )
+
+        nearby_times = []
+        nearby_rows = []
+        for _ in range(repeat):
+            lat, lng = rng.uniform(10.0, 33.0), rng.uniform(70.0, 95.0)
+            query = (
+                PickupRequest.objects.open_pool()
+                .nearby(lat, lng, radius_km)
+                .order_by("distance_km")
+            )
+            elapsed, rows = self.timed(query, 1)
+            nearby_times.append(elapsed)
+            nearby_rows.append(rows)
+        nearby_times.sort()
+        median = nearby_times[len(nearby_times) // 2]
+        self.stdout.write(
+            f"nearby {radius_km:g} km: {sum(nearby_rows) / len(nearby_rows):>7.0f} rows  "
+            f"{median * 1000:10.1f} ms (median of {repeat})"
+        )
+        self.stdout.write(f"speed-up:   {full_time / median:.0f}x")
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app.models import ChatMessage, PickupRequest, User
+from app.views import ChatView
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds many chats with long histories and compares full chat polls "
+        "with ?since= delta polls, one poll per chat spread over worker "
+        "threads. Seeded rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chats", type=int, default=1000)
+        parser.add_argument("--messages", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        customer = User.objects.create_user(email="bench-chat-client@example.com")
+        vendor = User.objects.create_user(email="bench-chat-vendor@example.com", is_seller=True)
+        try:
+            pickups = self.seed(customer, vendor, options)
+            full = self.poll(customer, pickups, options["threads"], since=False)
+            delta = self.poll(customer, pickups, options["threads"], since=True)
+            for label, result in (("full", full), ("delta", delta)):
+                elapsed, latencies, size = result
+                latencies.sort()
+                p50 = latencies[len(latencies) // 2] * 1000
+                p99 = latencies[int(len(latencies) * 0.99)] * 1000
+                self.stdout.write(
+                    f"{label:>5}: {len(pickups) / elapsed:.0f} polls/s  "
+                    f"p50 {p50:.2f} ms  p99 {p99:.2f} ms  "
+                    f"{size / len(pickups) / 1024:.1f} KiB/poll"
+                )
+        finally:
+            PickupRequest.objects.filter(user=customer).delete()
+            User.objects.filter(email__startswith="bench-chat-").delete()
+
+    def seed(self, customer, vendor, options):
+        PickupRequest.objects.bulk_create(
+            PickupRequest(
+                user=customer,
+                assigned_to=vendor,
+                address="Chatty",
+                date="2026-01-01",
+                time_slot="10:00-12:00",
+                status="vendor_accepted",
+            )
+            for _ in range(options["chats"])
+        )
+        pickups = list(
+            PickupRequest.objects.filter(user=customer).order_by("id").values_list("id", flat=True)
+        )
+        self.stdout.write(f"Seeding {len(pickups)} chats x {options['messages']} messages...")
+        batch = []
+        with transaction.atomic():
+            for pickup_id in pickups:
+                for i in range(options["messages"]):
+                    batch.append(
+                        ChatMessage(
+                            pickup_request_id=pickup_id,
+                            sender=vendor if i % 2 else customer,
+                            message=f"message {i}",
+                        )
+                    )
+                if len(batch) >= options["batch_size"]:
+                    ChatMessage.objects.bulk_create(batch)
+                    batch = []
+            ChatMessage.objects.bulk_create(batch)
+        if connection.vendor in ("postgresql", "sqlite"):
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {ChatMessage._meta.db_table}")
+        return pickups
+
+    def poll(self, user, pickups, threads, since):
+        factory = APIRequestFactory()
+        view = async_to_sync(ChatView.as_view())
+        # What a client holds after its last poll: nothing changed since then.
+        params = {}
+        if since:
+            cursor = ChatMessage.objects.order_by("-updated_at").values_list("updated_at", flat=True)
+            params = {"since": cursor[0].isoformat()}
+
+        lock = threading.Lock()
+        queue = list(pickups)
+        latencies = []
+        totals = {"bytes": 0}
+
+        def worker():
+            timings = []
+            size = 0
+            try:
+                while True:
+                    with lock:
+                        if not queue:
+                            break
+                        pickup_id = queue.pop()
+                    request = factory.get(f"/api/pickup/chat/{pickup_id}/", params)
+                    force_authenticate(request, user=user)
+                    started = time.perf_counter()
+                    response = view(request, pickup_id=pickup_id)
+                    response.render()
+                    timings.append(time.perf_counter() - started)
+                    size += len(response.content)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(timings)
+                    totals["bytes"] += size
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, latencies, totals["bytes"]
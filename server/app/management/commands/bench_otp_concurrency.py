@@ -0,0 +1,170 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+    "wsgi": ["core.wsgi:application"],
+    "asgi": ["core.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+
+
+class CountingVerifyHandler(BaseHTTPRequestHandler):
+    """Approves every check after a delay; records how many calls overlap."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(server.latency)
+        with server.lock:
+            server.in_flight -= 1
+        payload = b'{"status": "approved"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests POST /api/otp/verify/ on a single gunicorn worker, once "
+        "with the sync WSGI worker and once with the uvicorn ASGI worker, "
+        "against a local fake OTP provider that answers after a fixed "
+        "latency. Reports throughput, latency and the most provider calls "
+        "the worker had in flight at once. Needs gunicorn and uvicorn-worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--provider-latency-ms", type=float, default=300)
+        parser.add_argument("--modes", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+
+    def handle(self, *args, **options):
+        provider = ThreadingHTTPServer(("127.0.0.1", 0), CountingVerifyHandler)
+        provider.daemon_threads = True
+        provider.latency = options["provider_latency_ms"] / 1000
+        provider.lock = threading.Lock()
+        threading.Thread(target=provider.serve_forever, daemon=True).start()
+        try:
+            for mode in options["modes"]:
+                provider.in_flight = provider.peak = 0
+                with self.server(mode, provider, options) as port:
+                    elapsed, latencies = asyncio.run(self.load(port, options))
+                self.report(mode, elapsed, latencies, provider.peak)
+        finally:
+            provider.shutdown()
+            provider.server_close()
+
+    def server(self, mode, provider, options):
+        port = free_port()
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings"),
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+            "DEBUG": "False",
+            # One worker per run, so its own cache and broker are enough.
+            "ALLOW_LOCAL_CACHE": "True",
+            "ALLOW_LOCAL_BROKER": "True",
+            "TWILIO_ACCOUNT_SID": "ACbench",
+            "TWILIO_AUTH_TOKEN": "bench",
+            "TWILIO_VERIFY_SERVICE_SID": "VAbench",
+            "TWILIO_VERIFY_BASE_URL": f"http://127.0.0.1:{provider.server_port}/v2",
+            "OTP_PROVIDER_POOL_SIZE": str(options["concurrency"]),
+            "OTP_VERIFY_RATE_CONTACT": "1000000/hour",
+            "OTP_VERIFY_RATE_IP": "1000000/hour",
+        }
+        command = [
+            sys.executable, "-m", "gunicorn", *SERVERS[mode],
+            "--workers", "1",
+            "--bind", f"127.0.0.1:{port}",
+            "--log-level", "warning",
+        ]
+        return RunningServer(command, env, port, cwd=settings.BASE_DIR)
+
+    async def load(self, port, options):
+        url = f"http://127.0.0.1:{port}/api/otp/verify/"
+        counter = iter(range(options["requests"]))
+        latencies = []
+
+        async def client(session):
+            for i in counter:
+                started = time.perf_counter()
+                async with session.post(
+                    url, json={"contact": f"98765{i:05d}", "otp": "123456"}
+                ) as response:
+                    await response.read()
+                    if response.status != 200:
+                        raise CommandError(f"{url} answered {response.status}")
+                latencies.append(time.perf_counter() - started)
+
+        connector = aiohttp.TCPConnector(limit=options["concurrency"])
+        timeout = aiohttp.ClientTimeout(total=None)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            # Warm-up: the first request pays for imports and connections.
+            async with session.post(url, json={"contact": "9876500000", "otp": "123456"}) as response:
+                await response.read()
+            started = time.perf_counter()
+            await asyncio.gather(*(client(session) for _ in range(options["concurrency"])))
+            return time.perf_counter() - started, sorted(latencies)
+
+    def report(self, mode, elapsed, latencies, peak):
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        self.stdout.write(
+            f"{mode}: {len(latencies) / elapsed:.1f} req/s  p50 {p50:.0f} ms  "
+            f"p99 {p99:.0f} ms  provider calls in flight per worker: {peak}"
+        )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RunningServer:
+    """Starts a server process and waits until it accepts connections."""
+
+    def __init__(self, command, env, port, cwd, startup_timeout=30):
+        self.command, self.env, self.port, self.cwd = command, env, port, cwd
+        self.startup_timeout = startup_timeout
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, env=self.env, cwd=self.cwd)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"{self.command[3]} exited with {self.process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return self.port
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise CommandError(f"{self.command[3]} did not start in {self.startup_timeout} s")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,128 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from app.models import Job
+from app.services import jobs
+from app.services.otp_service import OTPService
+
+
+class SlowVerifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.latency)
+        payload = b'{"status": "pending"}'
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the request-path cost of sending an OTP inline against a "
+        "local fake provider with today's latency, with queueing a send_otp "
+        "job, then drains the queue through a worker. Jobs are removed "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--provider-latency-ms", type=float, default=300)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowVerifyHandler)
+        server.daemon_threads = True
+        server.latency = options["provider_latency_ms"] / 1000
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        service = OTPService(
+            account_sid="ACbench",
+            auth_token="bench",
+            verify_sid="VAbench",
+            base_url=f"http://127.0.0.1:{server.server_port}/v2",
+            pool_size=options["threads"],
+        )
+        # The worker sends through the process-wide service; point it at the fake.
+        from app import tasks
+
+        original = tasks.get_otp_service
+        tasks.get_otp_service = lambda: service
+        existing = set(Job.objects.values_list("id", flat=True))
+        try:
+            inline = self.measure(
+                lambda i: service.start_verification(f"98765{i:05d}"), options
+            )
+            enqueue = self.measure(
+                lambda i: jobs.enqueue("send_otp", contact=f"98765{i:05d}", channel="sms"),
+                options,
+            )
+            self.report("inline", inline)
+            self.report("enqueue", enqueue)
+
+            started = time.perf_counter()
+            drained = 0
+            while True:
+                count = jobs.run_pending(batch_size=50)
+                if not count:
+                    break
+                drained += count
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"worker: {drained} job(s) sent in {elapsed:.2f} s "
+                f"({drained / elapsed:.0f} jobs/s, one worker process)"
+            )
+        finally:
+            tasks.get_otp_service = original
+            Job.objects.exclude(id__in=existing).delete()
+            server.shutdown()
+            service.session.close()
+
+    def measure(self, action, options):
+        from django.db import connection
+
+        lock = threading.Lock()
+        counter = iter(range(options["requests"]))
+        latencies = []
+
+        def worker():
+            timings = []
+            try:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        break
+                    started = time.perf_counter()
+                    action(i)
+                    timings.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(timings)
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, sorted(latencies)
+
+    def report(self, label, result):
+        elapsed, latencies = result
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        self.stdout.write(
+            f"{label:>7}: {len(latencies) / elapsed:.0f} req/s  "
+            f"p50 {p50:.2f} ms  p99 {p99:.2f} ms"
+        )
@@ -0,0 +1,103 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.models import PickupRequest, User
+from app.renderers import FastJSONRenderer
+from app.serializers import PickupRequestListSerializer, PickupRequestSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds pickups and times the list serialization paths: model "
+        "instances through PickupRequestSerializer and JSONRenderer, against "
+        "list_rows() dicts through PickupRequestListSerializer and "
+        "FastJSONRenderer. Seeded rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pickups", type=int, default=10_000)
+        parser.add_argument("--repeats", type=int, default=5)
+
+    def handle(self, *args, **options):
+        customer = User.objects.create_user(email="bench-serialize@example.com", password="x")
+        vendor = User.objects.create_user(
+            email="bench-serialize-vendor@example.com",
+            password="x",
+            is_seller=True,
+            full_name="Bench Vendor",
+            phone_number="9876543210",
+        )
+        try:
+            PickupRequest.objects.bulk_create(
+                (
+                    PickupRequest(
+                        user=customer,
+                        address=f"{i} Bench Street",
+                        latitude=12.9 + i * 1e-5,
+                        longitude=77.5 + i * 1e-5,
+                        date="2026-01-01",
+                        time_slot="10:00-12:00",
+                        status="scheduled",
+                        assigned_to=vendor if i % 2 else None,
+                        scrape_image=f"pickup_images/bench-{i}.jpg" if i % 3 else "",
+                        contact_name="Bench Customer",
+                        contact_phone="9123456780",
+                        quantity="12.50",
+                        estimated_price="300.00",
+                    )
+                    for i in range(options["pickups"])
+                ),
+                batch_size=1000,
+            )
+            queryset = PickupRequest.objects.client_bookings(customer)
+            request = APIRequestFactory().get(
+                "/api/pickup/list/", HTTP_HOST=settings.ALLOWED_HOSTS[0]
+            )
+            context = {"request": Request(request)}
+
+            model = self.measure(
+                lambda: list(queryset.all()),
+                lambda rows: PickupRequestSerializer(rows, many=True, context=context).data,
+                JSONRenderer(),
+                options["repeats"],
+            )
+            fast = self.measure(
+                lambda: list(queryset.list_rows()),
+                lambda rows: PickupRequestListSerializer(rows, many=True, context=context).data,
+                FastJSONRenderer(),
+                options["repeats"],
+            )
+            self.report("model instances + PickupRequestSerializer + JSONRenderer", model)
+            self.report("list_rows() + PickupRequestListSerializer + FastJSONRenderer", fast)
+            self.stdout.write(f"speed-up: {sum(model) / sum(fast):.1f}x")
+        finally:
+            PickupRequest.objects.filter(user=customer).delete()
+            customer.delete()
+            vendor.delete()
+
+    def measure(self, fetch, serialize, renderer, repeats):
+        """Best of ``repeats`` runs for each of fetch, serialize and render."""
+        best = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            rows = fetch()
+            fetched = time.perf_counter()
+            data = serialize(rows)
+            serialized = time.perf_counter()
+            renderer.render(data)
+            rendered = time.perf_counter()
+            timings = (fetched - started, serialized - fetched, rendered - serialized)
+            best = timings if best is None else tuple(map(min, best, timings))
+        return best
+
+    def report(self, label, timings):
+        fetch, serialize, render = (t * 1000 for t in timings)
+        self.stdout.write(
+            f"{label}:\n  fetch {fetch:.0f} ms  serialize {serialize:.0f} ms  "
+            f"render {render:.0f} ms  total {fetch + serialize + render:.0f} ms"
+        )
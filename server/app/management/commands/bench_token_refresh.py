@@ -0,0 +1,126 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from app.models import User
+from app.services import tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large history of rotated refresh tokens, measures "
+        "/api/token/refresh/ latency, prunes expired tokens and measures "
+        "again. Seeded rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=10_000_000)
+        parser.add_argument("--live-fraction", type=float, default=0.01,
+                            help="Share of seeded tokens that have not expired yet.")
+        parser.add_argument("--refreshes", type=int, default=500)
+        parser.add_argument("--batch-size", type=int, default=50_000)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email="bench-refresh@example.com", password="x")
+        try:
+            self.seed(options["tokens"], options["live_fraction"], options["batch_size"])
+            self.report("before prune", user, options["refreshes"])
+
+            started = time.perf_counter()
+            removed = tokens.prune_expired(batch_size=options["batch_size"])
+            self.stdout.write(
+                f"pruned {removed} expired token(s) in {time.perf_counter() - started:.1f} s"
+            )
+            self.analyze()
+            self.report("after prune", user, options["refreshes"])
+        finally:
+            OutstandingToken.objects.filter(jti__startswith="bench-").delete()
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
+
+    def seed(self, count, live_fraction, batch_size):
+        self.stdout.write(f"Seeding {count} outstanding tokens...")
+        now = timezone.now()
+        live = int(count * live_fraction)
+        started = time.perf_counter()
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for low in range(0, count, batch_size):
+                    high = min(low + batch_size, count)
+                    cursor.execute(
+                        """
+                        INSERT INTO token_blacklist_outstandingtoken (jti, token, created_at, expires_at)
+                        SELECT 'bench-' || i, 'x', %s - (i || ' seconds')::interval,
+                               CASE WHEN i < %s THEN %s ELSE %s END
+                        FROM generate_series(%s, %s) AS i
+                        """,
+                        [now, live, now + timedelta(days=1), now - timedelta(days=1), low, high - 1],
+                    )
+                cursor.execute(
+                    """
+                    INSERT INTO token_blacklist_blacklistedtoken (token_id, blacklisted_at)
+                    SELECT id, created_at FROM token_blacklist_outstandingtoken
+                    WHERE jti LIKE 'bench-%%' AND expires_at < %s
+                    """,
+                    [now],
+                )
+        else:
+            for low in range(0, count, batch_size):
+                OutstandingToken.objects.bulk_create(
+                    OutstandingToken(
+                        jti=f"bench-{i}",
+                        token="x",
+                        created_at=now,
+                        expires_at=now + timedelta(days=1 if i < live else -1),
+                    )
+                    for i in range(low, min(low + batch_size, count))
+                )
+            expired = OutstandingToken.objects.filter(
+                jti__startswith="bench-", expires_at__lt=now
+            ).values_list("id", flat=True)
+            BlacklistedToken.objects.bulk_create(
+                (BlacklistedToken(token_id=pk) for pk in expired.iterator()),
+                batch_size=batch_size,
+            )
+        self.analyze()
+        self.stdout.write(f"seeded in {time.perf_counter() - started:.1f} s")
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in (OutstandingToken, BlacklistedToken):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def report(self, label, user, refreshes):
+        factory = APIRequestFactory()
+        view = TokenRefreshView.as_view()
+        refresh = str(RefreshToken.for_user(user))
+        latencies = []
+        for _ in range(refreshes):
+            request = factory.post("/api/token/refresh/", {"refresh": refresh}, format="json")
+            started = time.perf_counter()
+            response = view(request)
+            latencies.append(time.perf_counter() - started)
+            refresh = response.data["refresh"]
+        latencies.sort()
+
+        size = ""
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_total_relation_size('token_blacklist_outstandingtoken') "
+                    "+ pg_total_relation_size('token_blacklist_blacklistedtoken')"
+                )
+                size = f"  tables {cursor.fetchone()[0] / 2**20:.0f} MiB"
+        self.stdout.write(
+            f"{label}: {OutstandingToken.objects.count()} outstanding, "
+            f"{BlacklistedToken.objects.count()} blacklisted{size}\n"
+            f"  refresh p50 {latencies[len(latencies) // 2] * 1000:.2f} ms  "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms"
+        )
@@ -0,0 +1,125 @@
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import global_settings, settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from app.models import User
+from app.services import uploads
+from app.views import SellerRegistrationView, UploadSessionView
+
+DOCUMENTS = ("business_license", "gst_certificate", "address_proof", "vendor_id_proof")
+
+
+class Command(BaseCommand):
+    help = (
+        "Registers sellers with four documents and reports the peak Python "
+        "heap allocated per request: multipart under Django's default "
+        "upload handlers, multipart under FILE_UPLOAD_HANDLERS, and the same "
+        "files sent through /api/uploads/ in UPLOAD_CHUNK_SIZE chunks. Files "
+        "go to a temporary MEDIA_ROOT and the users are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        # Four files just under Django's default FILE_UPLOAD_MAX_MEMORY_SIZE
+        # in total: its default handlers then keep all of them in memory.
+        parser.add_argument("--file-size-mb", type=float, default=0.6)
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        size = int(options["file_size_mb"] * 2**20)
+        content = os.urandom(size)
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media,
+            UPLOAD_SESSION_DIR=Path(media) / "sessions",
+            UPLOAD_MAX_FILE_SIZE=max(settings.UPLOAD_MAX_FILE_SIZE, size),
+            UPLOAD_MAX_REQUEST_SIZE=max(settings.UPLOAD_MAX_REQUEST_SIZE, 5 * size),
+        ):
+            try:
+                # Warm-up: the first request pays for imports and caches.
+                self.multipart("warmup", content)
+                with override_settings(
+                    FILE_UPLOAD_HANDLERS=global_settings.FILE_UPLOAD_HANDLERS,
+                    FILE_UPLOAD_MAX_MEMORY_SIZE=global_settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+                ):
+                    default = self.multipart("default", content)
+                self.report("multipart, Django's default handlers", default)
+                self.report("multipart, FILE_UPLOAD_HANDLERS", self.multipart("bounded", content))
+                self.report("resumable uploads", self.resumable(content))
+            finally:
+                users = User.objects.filter(email__startswith="bench-upload-")
+                OutstandingToken.objects.filter(user__in=users).delete()
+                users.delete()
+        self.stdout.write(
+            f"process peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB"
+        )
+
+    def registration(self, label, **files):
+        data = {
+            "email": f"bench-upload-{label}@example.com",
+            "password": "x",
+            "business_name": "Bench Scrap",
+            **files,
+        }
+        return self.factory.post(
+            "/api/register/seller/", data, format="multipart", HTTP_HOST=settings.ALLOWED_HOSTS[0]
+        )
+
+    def multipart(self, label, content):
+        files = {
+            name: SimpleUploadedFile(f"{name}.pdf", content, content_type="application/pdf")
+            for name in DOCUMENTS
+        }
+        request = self.registration(label, **files)
+        return [self.measure(SellerRegistrationView.as_view(), request)]
+
+    def resumable(self, content):
+        view = UploadSessionView.as_view()
+        results, ids = [], {}
+        for name in DOCUMENTS:
+            session = uploads.create(f"{name}.pdf", len(content))
+            ids[f"{name}_upload"] = str(session.id)
+            for offset in range(0, len(content), settings.UPLOAD_CHUNK_SIZE):
+                request = self.factory.generic(
+                    "PATCH",
+                    f"/api/uploads/{session.id}/",
+                    content[offset:offset + settings.UPLOAD_CHUNK_SIZE],
+                    content_type="application/offset+octet-stream",
+                    HTTP_HOST=settings.ALLOWED_HOSTS[0],
+                    HTTP_UPLOAD_OFFSET=str(offset),
+                )
+                results.append(self.measure(view, request, upload_id=session.id))
+        request = self.registration("resumable", **ids)
+        results.append(self.measure(SellerRegistrationView.as_view(), request))
+        return results
+
+    def measure(self, view, request, **kwargs):
+        """Peak heap growth and time for one request; the body is built beforehand."""
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        response = view(request, **kwargs)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        # Closes the parsed upload files, as the request handler would.
+        request.close()
+        if response.status_code >= 400:
+            raise CommandError(f"{request.path} answered {response.status_code}: {response.data}")
+        return peak, elapsed
+
+    def report(self, label, results):
+        peak = max(peak for peak, _ in results)
+        total = sum(elapsed for _, elapsed in results)
+        self.stdout.write(
+            f"{label}: {len(results)} request(s), peak heap per request "
+            f"{peak / 2**20:.1f} MiB, {total * 1000:.0f} ms in total"
+        )
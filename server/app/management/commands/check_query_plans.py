@@ -0,0 +1,175 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from app.models import ChatMessage, PickupRequest, User
+from app.pagination import KeysetPagination
+from app.services import geo
+
+STATUSES = ["pending", "open", "vendor_accepted", "scheduled", "completed", "cancelled"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large pickup/chat dataset, runs EXPLAIN on the list view "
+        "queries and fails unless each one is served by its index. Meant for "
+        "PostgreSQL; SQLite's planner ignores partial indexes. All rows are "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--verbose-plans", action="store_true")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            client, vendor, pickup = self.seed(rng, options["rows"], options["batch_size"])
+            failures = self.check_plans(client, vendor, pickup, options["verbose_plans"])
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(f"{failures} query plan(s) did not use their index")
+
+    def seed(self, rng, rows, batch_size):
+        User.objects.bulk_create(
+            User(email=f"plan-client-{i}@example.com", is_client=True) for i in range(500)
+        )
+        User.objects.bulk_create(
+            User(email=f"plan-vendor-{i}@example.com", is_seller=True) for i in range(100)
+        )
+        clients = list(User.objects.filter(email__startswith="plan-client-"))
+        vendors = list(User.objects.filter(email__startswith="plan-vendor-"))
+
+        self.stdout.write(f"Seeding {rows} pickups...")
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for _ in range(min(batch_size, rows - offset)):
+                status = rng.choice(STATUSES)
+                assigned = status in ("vendor_accepted", "scheduled", "completed")
+                lat, lng = rng.uniform(8.0, 35.0), rng.uniform(68.0, 97.0)
+                batch.append(
+                    PickupRequest(
+                        user=rng.choice(clients),
+                        scrape_image=f"pickup_images/{rng.getrandbits(64):016x}.jpg"
+                        if rng.random() < 0.2
+                        else "",
+                        assigned_to=rng.choice(vendors) if assigned else None,
+                        address="Plan check address",
+                        latitude=lat,
+                        longitude=lng,
+                        geohash=geo.encode(lat, lng),
+                        date="2026-01-01",
+                        time_slot="10:00-12:00",
+                        status=status,
+                    )
+                )
+            PickupRequest.objects.bulk_create(batch)
+
+        pickup_ids = list(
+            PickupRequest.objects.filter(assigned_to__isnull=False).values_list("id", flat=True)[:2000]
+        )
+        messages = []
+        for pickup_id in pickup_ids:
+            for i in range(max(1, rows // 2000)):
+                messages.append(
+                    ChatMessage(
+                        pickup_request_id=pickup_id,
+                        sender=vendors[0],
+                        message=f"message {i}",
+                    )
+                )
+        ChatMessage.objects.bulk_create(messages, batch_size=batch_size)
+
+        with connection.cursor() as cursor:
+            for model in (User, PickupRequest, ChatMessage):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        return clients[0], vendors[0], PickupRequest.objects.get(id=pickup_ids[0])
+
+    def check_plans(self, client, vendor, pickup, verbose):
+        page = KeysetPagination.page_size + 1
+        # Everything was just seeded, so "since now" is the steady state of a
+        # pool change poll: next to nothing has changed.
+        since = timezone.now()
+        bookings = PickupRequest.objects.client_bookings(client)
+        middle = bookings[bookings.count() // 2]
+        cursor_filter = KeysetPagination._after(
+            ["-created_at", "-id"], [middle.created_at, middle.id]
+        )
+
+        photo = PickupRequest.objects.exclude(scrape_image="").values_list(
+            "scrape_image", flat=True
+        )[0]
+
+        checks = [
+            (
+                "available pool",
+                PickupRequest.objects.open_pool()
+                .select_related("assigned_to")
+                .order_by("-created_at", "-id")[:page],
+                "pickup_open_pool_idx",
+            ),
+            (
+                "available nearby",
+                PickupRequest.objects.open_pool()
+                .nearby(18.52, 73.85, 10)
+                .order_by("distance_km", "id")[:page],
+                "pickup_open_geohash_idx",
+            ),
+            (
+                "available pool changes",
+                PickupRequest.objects.open_pool()
+                .filter(updated_at__gt=since)
+                .order_by("updated_at", "id"),
+                "pickup_updated_idx",
+            ),
+            (
+                "media access",
+                PickupRequest.objects.filter(Q(scrape_image=photo) | Q(scrape_image_thumb=photo))
+                .filter(Q(user=client) | Q(assigned_to=client))
+                .values("id")[:1],
+                "pickup_image_idx",
+            ),
+            ("client bookings", bookings[:page], "pickup_user_created_idx"),
+            (
+                "client bookings, later page",
+                bookings.filter(cursor_filter)[:page],
+                "pickup_user_created_idx",
+            ),
+            (
+                "vendor pickups",
+                PickupRequest.objects.vendor_pickups(vendor)[:page],
+                "pickup_vendor_updated_idx",
+            ),
+            (
+                "chat history",
+                ChatMessage.objects.filter(pickup_request=pickup)
+                .select_related("sender")
+                .order_by("created_at"),
+                "chat_pickup_created_idx",
+            ),
+            (
+                "chat delta poll",
+                ChatMessage.objects.filter(pickup_request=pickup, updated_at__gt=middle.created_at)
+                .select_related("sender")
+                .order_by("id"),
+                "chat_pickup_updated_idx",
+            ),
+        ]
+
+        failures = 0
+        for label, queryset, index_name in checks:
+            plan = queryset.explain()
+            ok = index_name in plan
+            failures += not ok
+            mark = "ok  " if ok else "FAIL"
+            self.stdout.write(f"{mark} {label}: expected {index_name}")
+            if verbose or not ok:
+                for line in plan.splitlines():
+                    self.stdout.write(f"       {line}")
+        return failures
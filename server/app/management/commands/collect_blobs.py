@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from app.services import blobs, jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes stored files that no FileField references any more and "
+        "corrects blob reference counts. With --schedule, queues the "
+        "recurring collect_blobs job instead (once; the job re-queues itself)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedule", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            if jobs.schedule("collect_blobs"):
+                self.stdout.write("Queued collect_blobs job.")
+            else:
+                self.stdout.write("collect_blobs job already queued.")
+            return
+
+        removed, freed = blobs.collect()
+        self.stdout.write(f"Removed {removed} file(s), {freed / 2**20:.1f} MiB freed.")
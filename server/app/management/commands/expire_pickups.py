@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.models import PickupRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancels pending/open pickups whose pickup date has passed, as one "
+        "bulk state machine transition. Meant to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-days",
+            type=int,
+            default=1,
+            help="Only expire pickups dated more than this many days ago.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options["grace_days"])
+        moved = PickupRequest.objects.filter(date__lt=cutoff).transition("expire")
+        self.stdout.write(f"Expired {moved} pickup(s) dated before {cutoff}.")
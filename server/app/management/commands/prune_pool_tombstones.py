@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from app.services import jobs, pool_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes pool change feed tombstones older than "
+        "POOL_CHANGES_RETENTION. With --schedule, queues the recurring "
+        "prune_pool_tombstones job instead (once; the job re-queues itself)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedule", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            if jobs.schedule("prune_pool_tombstones"):
+                self.stdout.write("Queued prune_pool_tombstones job.")
+            else:
+                self.stdout.write("prune_pool_tombstones job already queued.")
+            return
+
+        removed = pool_changes.prune()
+        self.stdout.write(f"Removed {removed} pool tombstone(s).")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from app.services import jobs, tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired outstanding/blacklisted JWT refresh tokens in "
+        "bounded batches. With --schedule, queues the recurring prune_tokens "
+        "job instead (once; the job re-queues itself)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--schedule", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            if jobs.schedule("prune_tokens"):
+                self.stdout.write("Queued prune_tokens job.")
+            else:
+                self.stdout.write("prune_tokens job already queued.")
+            return
+
+        removed = tokens.prune_expired(options["batch_size"], options["max_batches"])
+        self.stdout.write(f"Removed {removed} expired token(s).")
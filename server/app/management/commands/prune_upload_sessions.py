@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from app.services import jobs, uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes resumable upload sessions idle for longer than "
+        "UPLOAD_SESSION_TTL, with their partial files. With --schedule, "
+        "queues the recurring prune_upload_sessions job instead (once; the "
+        "job re-queues itself)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedule", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            if jobs.schedule("prune_upload_sessions"):
+                self.stdout.write("Queued prune_upload_sessions job.")
+            else:
+                self.stdout.write("prune_upload_sessions job already queued.")
+            return
+
+        removed = uploads.prune()
+        self.stdout.write(f"Removed {removed} upload session(s).")
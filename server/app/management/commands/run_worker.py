@@ -0,0 +1,81 @@
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.migrations.executor import MigrationExecutor
+
+from app.checks import require_shared_broker, require_shared_cache
+from app.services import jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (OTP sends, ...). Start one process per "
+        "worker; they share the queue safely. Waits for pending migrations, "
+        "then queues any recurring job that is not queued yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true",
+                            help="Run every due job, then exit (recurring "
+                                 "jobs are not queued).")
+
+    def handle(self, *args, **options):
+        # Jobs save chat messages and pickups: their events and open-pool
+        # invalidations must reach the servers.
+        require_shared_broker()
+        require_shared_cache()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.wait_for_migrations(options["poll_interval"])
+        if not options["once"]:
+            self.schedule_recurring()
+
+        processed = 0
+        while not self.stopping:
+            count = jobs.run_pending(options["batch_size"])
+            processed += count
+            if not count:
+                if options["once"]:
+                    break
+                # Same connection hygiene as between requests (CONN_MAX_AGE).
+                close_old_connections()
+                time.sleep(options["poll_interval"])
+        self.stdout.write(f"Processed {processed} job(s).")
+
+    def wait_for_migrations(self, poll_interval):
+        # The server applies them; the job tables may not exist yet.
+        waiting = False
+        while not self.stopping:
+            try:
+                executor = MigrationExecutor(connection)
+                if not executor.migration_plan(executor.loader.graph.leaf_nodes()):
+                    return
+            except DatabaseError:
+                close_old_connections()
+            if not waiting:
+                self.stdout.write("Waiting for migrations...")
+                waiting = True
+            time.sleep(poll_interval)
+
+    def schedule_recurring(self):
+        # A failure here must not keep the worker from running jobs: the
+        # next worker start tries again.
+        for name in jobs.recurring_tasks():
+            try:
+                if jobs.schedule(name):
+                    self.stdout.write(f"Queued {name} job.")
+            except Exception:
+                logger.exception("Could not queue recurring job %s", name)
+
+    def stop(self, signum, frame):
+        self.stopping = True
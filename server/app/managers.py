@@ -1,4 +1,21 @@
+import math
+from decimal import Decimal
+
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from django.utils import timezone
+
+from .services import geo, pool_cache, pool_changes
+from .state_machine import get_transition
+
+# The assigned vendor's details shown on pickup rows: output name -> lookup.
+# Shared by list_rows(), both pickup serializers and the list ETags.
+VENDOR_COLUMNS = {
+    "vendor_name": "assigned_to__full_name",
+    "vendor_phone": "assigned_to__phone_number",
+}
 
 
 class CustomUserManager(BaseUserManager):
@@ -27,3 +44,157 @@ class CustomUserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self.create_user(email, password, **extra_fields)
+
+
+class PickupRequestQuerySet(models.QuerySet):
+    """
+    Query helpers shared by the pickup list endpoints.
+    """
+
+    def open_pool(self):
+        return self.filter(status="open", assigned_to__isnull=True)
+
+    def stats(self, pending_statuses):
+        """
+        Dashboard totals over every matching row, in one aggregate query:
+        how many there are, how many are in ``pending_statuses``, how many
+        are completed and their summed estimated price.
+        """
+        completed = Q(status="completed")
+        totals = self.order_by().aggregate(
+            total=Count("id"),
+            pending=Count("id", filter=Q(status__in=pending_statuses)),
+            completed=Count("id", filter=completed),
+            completed_value=Sum("estimated_price", filter=completed),
+        )
+        totals["completed_value"] = totals["completed_value"] or Decimal("0")
+        return totals
+
+    def transition(self, name, **changes):
+        """
+        Moves every matching row through a state machine transition with a
+        single guarded UPDATE, touching only the status, updated_at and the
+        given columns. Rows are never loaded into Python, so this works the
+        same for one pickup and for a bulk sweep.
+
+        Moves out of the open pool also write PoolTombstone rows for the
+        pool change feed, in the same transaction.
+
+        Returns the number of rows moved; 0 means no row was in a valid
+        source state (or matched the queryset at all).
+        """
+        transition = get_transition(name)
+        values = {
+            **transition.changes,
+            **changes,
+            "status": transition.target,
+            "updated_at": timezone.now(),
+        }
+        rows = self.filter(status__in=transition.sources).filter(transition.guard)
+        if transition.leaves_pool:
+            # The tombstones must commit together with the move.
+            with transaction.atomic():
+                moved = rows.update(**values)
+                if moved:
+                    pool_changes.record_transition_exits(
+                        values["updated_at"], transition.target
+                    )
+        else:
+            moved = rows.update(**values)
+        if moved and transition.touches_pool:
+            pool_cache.invalidate_on_commit()
+        return moved
+
+    def client_bookings(self, user):
+        return (
+            self.filter(user=user)
+            .select_related("assigned_to")
+            .order_by("-created_at", "-id")
+        )
+
+    def vendor_pickups(self, user):
+        return (
+            self.filter(assigned_to=user)
+            .select_related("assigned_to")
+            .order_by("-updated_at", "-id")
+        )
+
+    def list_rows(self, fields=None):
+        """
+        The columns PickupRequestListSerializer renders, as dicts instead of
+        model instances. The vendor's name and phone come from a LEFT JOIN,
+        and distance_km is added when the queryset was narrowed with
+        nearby().
+
+        ``fields`` (a sparse fieldset, see serializers.parse_fields) limits
+        the SELECT to those columns plus the ones the ordering, and so the
+        keyset cursor, needs.
+        """
+        columns = [
+            "id",
+            "address",
+            "latitude",
+            "longitude",
+            "date",
+            "time_slot",
+            "scrape_image",
+            "scrape_image_thumb",
+            "status",
+            "contact_name",
+            "contact_phone",
+            "is_phone_verified",
+            "scrap_type",
+            "quantity",
+            "estimated_price",
+            "created_at",
+            "updated_at",
+        ]
+        if "distance_km" in self.query.annotations:
+            columns.append("distance_km")
+        vendor = {name: F(lookup) for name, lookup in VENDOR_COLUMNS.items()}
+        if fields is not None:
+            keep = {"id", *fields, *(name.lstrip("-") for name in self.query.order_by)}
+            columns = [name for name in columns if name in keep]
+            vendor = {name: value for name, value in vendor.items() if name in keep}
+        return self.values(*columns, **vendor)
+
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Narrows the queryset to pickups within radius_km of a point and
+        annotates each row with its distance as ``distance_km``.
+
+        Candidates are first cut down with the indexed geohash prefix and a
+        lat/lng bounding box, so the exact distance is only computed for rows
+        that are already close by.
+        """
+        cells = geo.covering_cells(latitude, longitude, radius_km)
+        in_cells = Q()
+        for cell in cells:
+            low, high = geo.prefix_range(cell)
+            cell_q = Q(geohash__gte=low)
+            if high is not None:
+                cell_q &= Q(geohash__lt=high)
+            in_cells |= cell_q
+
+        min_lat, max_lat, min_lng, max_lng = geo.bounding_box(
+            latitude, longitude, radius_km
+        )
+
+        lat0 = math.radians(latitude)
+        lng0 = math.radians(longitude)
+        dlat = Radians("latitude") - Value(lat0)
+        dlng = Radians("longitude") - Value(lng0)
+        a = Power(Sin(dlat / 2), 2) + Value(math.cos(lat0)) * Cos(
+            Radians("latitude")
+        ) * Power(Sin(dlng / 2), 2)
+        distance = Value(2 * geo.EARTH_RADIUS_KM) * ASin(Sqrt(a))
+
+        return (
+            self.filter(in_cells)
+            .filter(
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
+            .annotate(distance_km=ExpressionWrapper(distance, output_field=FloatField()))
+            .filter(distance_km__lte=radius_km)
+        )
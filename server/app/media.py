@@ -0,0 +1,155 @@
+"""
+Access-checked media serving.
+
+Every file under MEDIA_URL goes through MediaView, which checks that the
+user may see it:
+
+* pickup photos and thumbnails: the pickup's customer, its assigned
+  vendor, or any vendor while the pickup is in the open pool;
+* vendor and client documents: only the account they belong to;
+* staff: everything.
+
+By default the file is then streamed from Python, with single-range
+support. Under ASGI the file is read chunk by chunk in a thread while the
+response is sent. Django would load a sync iterator fully into memory first.
+Behind a proxy set up for it, the proxy sends the bytes instead
+of the worker: with MEDIA_ACCEL = "nginx" the response is an
+X-Accel-Redirect to MEDIA_ACCEL_LOCATION, an ``internal`` location aliased
+to MEDIA_ROOT; with "sendfile" it carries X-Sendfile (Apache
+mod_xsendfile, lighttpd). The proxy answers Range and conditional
+requests itself.
+
+Content-addressed names (app/storage.py) never change content, so they
+are cached by the browser for a year; other names are revalidated.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import FileField, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+
+from .services.blobs import BLOB_FILE
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+READ_SIZE = 64 * 2**10
+
+
+def can_view(user, name):
+    from .models import PickupRequest
+
+    if user.is_staff:
+        return True
+    section = name.split("/", 1)[0]
+    if section == "pickup_images":
+        visible = Q(user=user) | Q(assigned_to=user)
+        if user.is_seller:
+            visible |= Q(status="open", assigned_to__isnull=True)
+        return (
+            PickupRequest.objects.filter(Q(scrape_image=name) | Q(scrape_image_thumb=name))
+            .filter(visible)
+            .exists()
+        )
+    if section in ("vendor_docs", "client_docs"):
+        # A query rather than the attributes: request.user may come from the
+        # auth cache, which does not hold document fields.
+        owns = Q()
+        for field in user._meta.concrete_fields:
+            if isinstance(field, FileField):
+                owns |= Q(**{field.attname: name})
+        return type(user).objects.filter(owns, pk=user.pk).exists()
+    return False
+
+
+def serve(request, name):
+    """The response for a file the user may see, or None if it does not exist."""
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except ValueError:  # escapes MEDIA_ROOT
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if settings.MEDIA_ACCEL == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(settings.MEDIA_ACCEL_LOCATION + name)
+    elif settings.MEDIA_ACCEL == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    else:
+        response = _stream(request, path, content_type)
+
+    # Access-controlled, so never stored by shared caches.
+    if BLOB_FILE.search(name):
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization, Cookie"
+    return response
+
+
+def _stream(request, path, content_type):
+    size = os.path.getsize(path)
+    match = RANGE.match(request.headers.get("Range", ""))
+    if match is None or match.groups() == ("", ""):
+        start, end, status = 0, size - 1, 200
+    else:
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:  # the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        status = 206
+
+    # MediaView passes DRF's Request, which wraps Django's.
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = _aread(path, start, end - start + 1)
+    else:
+        chunks = _read(path, start, end - start + 1)
+    response = StreamingHttpResponse(chunks, status=status, content_type=content_type)
+    if status == 206:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _read(path, start, remaining):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while remaining:
+            chunk = file.read(min(READ_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _aread(path, start, remaining):
+    # Not thread-sensitive: file reads need not queue behind the ORM work
+    # of sync views.
+    file = await sync_to_async(open, thread_sensitive=False)(path, "rb")
+    try:
+        file.seek(start)
+        while remaining:
+            chunk = await sync_to_async(file.read, thread_sensitive=False)(
+                min(READ_SIZE, remaining)
+            )
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
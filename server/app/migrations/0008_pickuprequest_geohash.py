@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:41
+
+from django.db import migrations, models
+
+from app.services import geo
+
+
+def backfill_geohash(apps, schema_editor):
+    PickupRequest = apps.get_model("app", "PickupRequest")
+    pending = []
+    rows = PickupRequest.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("id", "latitude", "longitude")
+    for pickup in rows.iterator(chunk_size=2000):
+        pickup.geohash = geo.encode(pickup.latitude, pickup.longitude)
+        pending.append(pickup)
+        if len(pending) >= 2000:
+            PickupRequest.objects.bulk_update(pending, ["geohash"])
+            pending = []
+    if pending:
+        PickupRequest.objects.bulk_update(pending, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_chatmessage_is_offer_chatmessage_offer_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
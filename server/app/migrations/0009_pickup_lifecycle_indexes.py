@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_pickuprequest_geohash'),
+    ]
+
+    # Build the composite indexes before dropping the single-column FK
+    # indexes they replace, so the lookups are never left unindexed.
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['pickup_request', 'created_at'], name='chat_pickup_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('status', 'open')), fields=['-created_at', '-id'], name='pickup_open_pool_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('status', 'open')), fields=['geohash'], name='pickup_open_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='pickup_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['assigned_to', '-updated_at', '-id'], name='pickup_vendor_updated_idx'),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='pickup_request',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='app.pickuprequest'),
+        ),
+        migrations.AlterField(
+            model_name='pickuprequest',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_pickups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='pickuprequest',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='pickuprequest',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pickup_requests', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:59
+
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    ChatMessage = apps.get_model("app", "ChatMessage")
+    ChatMessage.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_pickup_lifecycle_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['pickup_request', 'updated_at'], name='chat_pickup_updated_idx'),
+        ),
+    ]
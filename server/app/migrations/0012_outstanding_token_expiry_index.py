@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes token_blacklist_outstandingtoken.expires_at so that pruning
+    expired tokens (app/services/tokens.py) is a range scan. The table
+    belongs to SimpleJWT, so the index is created with plain SQL.
+    """
+
+    dependencies = [
+        ("app", "0011_job_queue"),
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX IF EXISTS token_outstanding_expires_idx",
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_outstanding_token_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pickup_id', models.IntegerField()),
+                ('left_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['updated_at'], name='pickup_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pooltombstone',
+            index=models.Index(fields=['left_at'], name='pool_tombstone_left_idx'),
+        ),
+    ]
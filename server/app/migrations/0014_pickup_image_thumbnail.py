@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_pool_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='scrape_image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='pickup_images/thumbs/'),
+        ),
+    ]
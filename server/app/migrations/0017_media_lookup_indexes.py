@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_content_addressed_blobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(condition=models.Q(('scrape_image__gt', '')), fields=['scrape_image'], name='pickup_image_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(condition=models.Q(('scrape_image_thumb__gt', '')), fields=['scrape_image_thumb'], name='pickup_image_thumb_idx'),
+        ),
+    ]
@@ -1,6 +1,10 @@
+import uuid
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
-from .managers import CustomUserManager
+from django.db import models, transaction
+from django.utils import timezone
+from .managers import CustomUserManager, PickupRequestQuerySet
+from .services import chat_events, geo, pool_cache, pool_changes, unread
 
 
 class User(AbstractUser):
@@ -66,15 +70,21 @@ class PickupRequest(models.Model):
         ("cancelled", "Cancelled"),
     ]
 
+    # The FK columns are covered by the composite indexes in Meta.
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="pickup_requests"
+        User, on_delete=models.CASCADE, related_name="pickup_requests", db_index=False
     )
     address = models.TextField()
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
     date = models.DateField()
     time_slot = models.CharField(max_length=50)
     scrape_image = models.ImageField(upload_to="pickup_images/", blank=True, null=True)
+    # Written by the process_pickup_image job (services/images.py).
+    scrape_image_thumb = models.ImageField(
+        upload_to="pickup_images/thumbs/", blank=True, null=True, editable=False
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     assigned_to = models.ForeignKey(
         User,
@@ -82,6 +92,7 @@ class PickupRequest(models.Model):
         null=True,
         blank=True,
         related_name="assigned_pickups",
+        db_index=False,
     )
 
 
@@ -93,24 +104,101 @@ class PickupRequest(models.Model):
     contact_name = models.CharField(max_length=150, blank=True)
     contact_phone = models.CharField(max_length=15, blank=True)
     is_phone_verified = models.BooleanField(default=False)
+    # Unused: pickup OTPs now live in the cache (services/otp_store.py). Kept
+    # for one release so code still writing it can be rolled back; drop it
+    # with a RemoveField migration after that.
     otp_code = models.CharField(max_length=6, blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PickupRequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Vendor pool: status='open' AND assigned_to IS NULL ORDER BY created_at DESC
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="pickup_open_pool_idx",
+                condition=models.Q(status="open", assigned_to__isnull=True),
+            ),
+            # Nearby lookups only ever search the open pool.
+            models.Index(
+                fields=["geohash"],
+                name="pickup_open_geohash_idx",
+                condition=models.Q(status="open", assigned_to__isnull=True),
+            ),
+            # Client bookings: user_id=? ORDER BY created_at DESC
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="pickup_user_created_idx"
+            ),
+            # Vendor pickups: assigned_to_id=? ORDER BY updated_at DESC
+            models.Index(
+                fields=["assigned_to", "-updated_at", "-id"],
+                name="pickup_vendor_updated_idx",
+            ),
+            # Pool change feed: updated_at > ?, and the rows a transition
+            # just stamped (services/pool_changes.py).
+            models.Index(fields=["updated_at"], name="pickup_updated_idx"),
+            # Media access checks look photos up by name (app/media.py);
+            # rows without a photo are left out.
+            models.Index(
+                fields=["scrape_image"],
+                name="pickup_image_idx",
+                condition=models.Q(scrape_image__gt=""),
+            ),
+            models.Index(
+                fields=["scrape_image_thumb"],
+                name="pickup_image_thumb_idx",
+                condition=models.Q(scrape_image_thumb__gt=""),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "status" in field_names:
+            instance._loaded_status = values[field_names.index("status")]
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ""
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            "latitude" in update_fields or "longitude" in update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
+        # Entering or leaving the open pool (or editing a pooled row)
+        # invalidates the cached vendor feed.
+        loaded_status = getattr(self, "_loaded_status", None)
+        if "open" in (self.status, loaded_status):
+            pool_cache.invalidate_on_commit()
+        if loaded_status == "open" and self.status != "open":
+            pool_changes.record_exits([self.id], self.updated_at)
+        self._loaded_status = self.status
+
     def __str__(self):
         return f"Pickup {self.id} - {self.status}"
 
 
 class ChatMessage(models.Model):
     pickup_request = models.ForeignKey(
-        PickupRequest, on_delete=models.CASCADE, related_name="messages"
+        PickupRequest, on_delete=models.CASCADE, related_name="messages", db_index=False
     )
     sender = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="sent_messages"
     )
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every change (offer status, read flag) so chat polling can
+    # ask for "what changed since" instead of the whole history.
+    updated_at = models.DateTimeField(auto_now=True)
     is_read = models.BooleanField(default=False)
     
 
@@ -124,6 +212,125 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["pickup_request", "created_at"], name="chat_pickup_created_idx"
+            ),
+            models.Index(
+                fields=["pickup_request", "updated_at"], name="chat_pickup_updated_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        chat_events.publish_message_on_commit(self.pk)
+        if adding:
+            transaction.on_commit(
+                lambda: unread.message_created(self.pickup_request, self.sender_id)
+            )
 
     def __str__(self):
         return f"Msg from {self.sender.email} on Pickup {self.pickup_request.id}"
+
+
+class Job(models.Model):
+    """
+    A queued background task, run by ``manage.py run_worker``.
+
+    ``run_at`` is when the job is next due. A worker that claims a job moves
+    it forward by the lease time, so a job whose worker died is picked up
+    again once the lease runs out.
+    """
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["run_at", "id"], name="job_due_idx")]
+
+    def __str__(self):
+        return f"{self.task} #{self.id}"
+
+
+class DeadLetterJob(models.Model):
+    """A job that failed on every attempt, kept for inspection and replay."""
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.task} (dead) #{self.id}"
+
+
+class PoolTombstone(models.Model):
+    """
+    Marks a pickup leaving the open pool (accepted, cancelled, expired or
+    deleted), so the pool change feed can report removals. Pruned after
+    POOL_CHANGES_RETENTION seconds.
+    """
+
+    pickup_id = models.IntegerField()
+    left_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["left_at"], name="pool_tombstone_left_idx")]
+
+    def __str__(self):
+        return f"Pickup {self.pickup_id} left the pool at {self.left_at}"
+
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload (services/uploads.py). Uploads happen before the
+    account exists, so the random id is also the client's only handle on
+    the session.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"], name="upload_session_updated_idx")]
+
+    @property
+    def complete(self):
+        return self.offset == self.size
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+
+class Blob(models.Model):
+    """
+    A file stored by ContentAddressedStorage (app/storage.py) and the
+    number of FileField values pointing at it. Blobs nothing points to are
+    removed by ``manage.py collect_blobs``.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["updated_at"], name="blob_updated_idx")]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} reference(s))"
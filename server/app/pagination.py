@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the queryset's full ordering, e.g.
+    ``(created_at, id)``.
+
+    Each page is fetched with a ``WHERE (created_at, id) < (...)`` style
+    predicate and a LIMIT, so the cost of a page does not depend on how deep
+    into the history it is. The ordering is taken from the queryset and must
+    end with a unique column; ``id`` is appended when it is missing.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.previous_position = self.position_of(rows[0]) if has_more else None
+            self.next_position = self.position_of(rows[-1]) if rows else position
+        else:
+            self.next_position = self.position_of(rows[-1]) if has_more else None
+            if position is None:
+                self.previous_position = None
+            else:
+                self.previous_position = self.position_of(rows[0]) if rows else position
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by) or list(self.ordering)
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            descending = ordering[-1].startswith("-")
+            ordering.append("-id" if descending else "id")
+        return ordering
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self._link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self._link(self.previous_position, reverse=True)
+
+    def position_of(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            raw_values = payload["p"]
+            reverse = bool(payload.get("r"))
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._to_python(field.lstrip("-"), value)
+                for field, value in zip(self.ordering, raw_values)
+            ]
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeEncodeError,
+            binascii.Error,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        return base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode("ascii")
+        ).decode("ascii")
+
+    def _link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def _to_python(self, name, value):
+        if name == "pk":
+            name = self.model._meta.pk.name
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        Builds the lexicographic "row comes after position" predicate, i.e.
+        (a > x) OR (a = x AND b > y) OR ... with the comparison direction of
+        each column taken from the ordering.
+
+        The redundant a >= x bound on the leading column keeps the predicate
+        sargable, so the database can start an index range scan at the cursor.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+
+        leading = ordering[0]
+        bound = "lte" if leading.startswith("-") else "gte"
+        return Q(**{f"{leading.lstrip('-')}__{bound}": position[0]}) & condition
@@ -0,0 +1,60 @@
+"""
+orjson-backed drop-ins for DRF's JSONRenderer and JSONParser.
+
+Both fall back to the stdlib implementations they subclass when orjson is
+not installed, and the renderer also does so for indented output (the
+browsable API and ``Accept: application/json; indent=4``), which orjson
+only supports with a fixed width of two.
+
+Output matches JSONRenderer: compact, UTF-8, datetimes/Decimals/lazy
+strings encoded by DRF's JSONEncoder, and U+2028/U+2029 escaped.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson handles the JSON-native types itself; everything else, and
+        # datetimes (passed through so they get DRF's "Z" suffix), goes to
+        # the encoder_class JSONRenderer would have used.
+        # OPT_NON_STR_KEYS covers the int keys of ListField errors; anything
+        # else orjson refuses (e.g. lazy-string keys) is left to json.dumps.
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        if orjson is None or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
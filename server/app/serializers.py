@@ -1,27 +1,76 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.exceptions import ParseError
 from .models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .managers import VENDOR_COLUMNS
 from .models import PickupRequest, ChatMessage
+from .services import uploads
+
+
+def serialize_auth_user(user):
+    """The user block returned by login, registration and account verification."""
+    return {
+        "email": user.email,
+        "full_name": user.full_name,
+        "phone_number": user.phone_number,
+        "is_client": user.is_client,
+        "is_seller": user.is_seller,
+        "is_verified": user.is_verified,
+        "is_phone_verified": user.is_phone_verified,
+        "is_email_verified": user.is_email_verified,
+    }
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
-
-        data["user"] = {
-            "email": self.user.email,
-            "full_name": self.user.full_name,
-            "phone_number": self.user.phone_number,
-            "is_client": self.user.is_client,
-            "is_seller": self.user.is_seller,
-            "is_verified": self.user.is_verified,
-            "is_phone_verified": self.user.is_phone_verified,
-            "is_email_verified": self.user.is_email_verified,
-        }
+        data["user"] = serialize_auth_user(self.user)
         return data
 
 
-class ClientRegistrationSerializer(serializers.ModelSerializer):
+class ResumableUploadsMixin:
+    """
+    Lets each file field also be given as ``<name>_upload``: the id of a
+    finished resumable upload (services/uploads.py) in place of a multipart
+    file. The uploads are only opened by save(), which closes them whatever
+    happens, and are discarded once the instance is saved.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        self._upload_ids = {}
+        for name, field in self.fields.items():
+            upload_id = self.initial_data.get(f"{name}_upload")
+            if not upload_id or not isinstance(field, serializers.FileField):
+                continue
+            if uploads.finished(upload_id) is None:
+                raise serializers.ValidationError(self.unknown_upload(name))
+            self._upload_ids[name] = upload_id
+        return attrs
+
+    def save(self, **kwargs):
+        files = {}
+        try:
+            for name, upload_id in self._upload_ids.items():
+                file = uploads.take(upload_id)
+                if file is None:  # pruned since validation
+                    raise serializers.ValidationError(self.unknown_upload(name))
+                files[name] = file
+            instance = super().save(**{**files, **kwargs})
+        finally:
+            for file in files.values():
+                file.close()
+        uploads.discard([file.upload_id for file in files.values()])
+        return instance
+
+    @staticmethod
+    def unknown_upload(name):
+        return {f"{name}_upload": ["Unknown or unfinished upload."]}
+
+
+class ClientRegistrationSerializer(ResumableUploadsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     email = serializers.EmailField()
 
@@ -45,9 +94,6 @@ class ClientRegistrationSerializer(serializers.ModelSerializer):
         if 'email' in self.fields:
             self.fields['email'].validators = []
 
-    def validate(self, attrs):
-        return attrs
-
     def create(self, validated_data):
         email = validated_data.get("email")
         password = validated_data.get("password")
@@ -73,7 +119,7 @@ class ClientRegistrationSerializer(serializers.ModelSerializer):
             return User.objects.create_user(**validated_data)
 
 
-class SellerRegistrationSerializer(serializers.ModelSerializer):
+class SellerRegistrationSerializer(ResumableUploadsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     scrape_types = serializers.ListField(
         child=serializers.CharField(max_length=50), allow_empty=True, required=False
@@ -131,11 +177,71 @@ class SellerRegistrationSerializer(serializers.ModelSerializer):
             return User.objects.create_user(**validated_data)
 
 
-class PickupRequestSerializer(serializers.ModelSerializer):
+def parse_fields(request, serializer_class):
+    """
+    Reads a ``?fields=id,status`` sparse fieldset for serializer_class.
+    Returns None when the parameter is absent; names outside Meta.fields
+    are a 400.
+    """
+    raw = request.query_params.get("fields")
+    if raw is None:
+        return None
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in names if name not in serializer_class.Meta.fields]
+    if unknown:
+        raise ParseError({"error": f"Unknown fields: {', '.join(unknown)}"})
+    if not names:
+        raise ParseError({"error": "fields must name at least one field"})
+    return names
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets. ``fields=[...]`` (as returned by
+    parse_fields) drops every other field from the output, and
+    narrow_queryset() defers the columns those fields do not read.
+    """
+
+    # Model paths read by fields with source="*" (SerializerMethodFields).
+    method_field_sources = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def narrow_queryset(cls, queryset, fields):
+        if fields is None:
+            return queryset
+        model = cls.Meta.model
+        paths = {"id"}
+        for field in cls(fields=fields).fields.values():
+            if field.source == "*":
+                paths.update(cls.method_field_sources.get(field.field_name, ()))
+            else:
+                paths.add(field.source.replace(".", "__"))
+        for path in list(paths):
+            try:
+                model._meta.get_field(path.split("__")[0])
+            except FieldDoesNotExist:
+                paths.discard(path)  # an annotation, e.g. distance_km
+        # only() refuses to defer a relation that select_related follows.
+        related = {path.rsplit("__", 1)[0] for path in paths if "__" in path}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*paths)
+
+
+class PickupRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     contact_name = serializers.CharField(required=False, allow_blank=True)
     contact_phone = serializers.CharField(required=False, allow_blank=True)
     vendor_name = serializers.SerializerMethodField()
     vendor_phone = serializers.SerializerMethodField()
+    # Only present on rows annotated by PickupRequest.objects.nearby().
+    distance_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = PickupRequest
@@ -147,6 +253,7 @@ class PickupRequestSerializer(serializers.ModelSerializer):
             "date",
             "time_slot",
             "scrape_image",
+            "scrape_image_thumb",
             "status",
             "contact_name",
             "contact_phone",
@@ -155,16 +262,112 @@ class PickupRequestSerializer(serializers.ModelSerializer):
             "quantity",
             "estimated_price",
             "created_at",
+            "updated_at",
             "vendor_name",
             "vendor_phone",
+            "distance_km",
+        ]
+        read_only_fields = [
+            "id",
+            "scrape_image_thumb",
+            "status",
+            "is_phone_verified",
+            "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "status", "is_phone_verified", "created_at"]
+
+    method_field_sources = {name: [lookup] for name, lookup in VENDOR_COLUMNS.items()}
 
     def get_vendor_name(self, obj):
-        return obj.assigned_to.full_name if obj.assigned_to else None
+        return _follow(obj, VENDOR_COLUMNS["vendor_name"])
 
     def get_vendor_phone(self, obj):
-        return obj.assigned_to.phone_number if obj.assigned_to else None
+        return _follow(obj, VENDOR_COLUMNS["vendor_phone"])
+
+
+class PickupRequestListSerializer(serializers.Serializer):
+    """
+    Read-only fast path for the pickup list endpoints.
+
+    Renders the dicts from ``PickupRequestQuerySet.list_rows()`` into
+    exactly what PickupRequestSerializer produces for the same rows, without
+    building model instances or running a Field per column. Takes the same
+    ``fields`` argument as SparseFieldsMixin.
+    """
+
+    class Meta:
+        fields = PickupRequestSerializer.Meta.fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._storage = PickupRequest._meta.get_field("scrape_image").storage
+        self._timezone = timezone.get_current_timezone()
+        self._host = None
+
+        converters = {
+            "date": _date,
+            "scrape_image": self._image_url,
+            "scrape_image_thumb": self._image_url,
+            "quantity": _decimal,
+            "estimated_price": _decimal,
+            "created_at": self._datetime,
+            "updated_at": self._datetime,
+        }
+        names = [
+            name
+            for name in self.Meta.fields
+            if fields is None or name in fields
+        ]
+        # distance_km is only in rows annotated by nearby().
+        self._distance = "distance_km" in names
+        self._columns = [
+            (name, converters.get(name)) for name in names if name != "distance_km"
+        ]
+
+    def to_representation(self, row):
+        data = {
+            name: row[name] if convert is None else convert(row[name])
+            for name, convert in self._columns
+        }
+        if self._distance and "distance_km" in row:
+            data["distance_km"] = row["distance_km"]
+        return data
+
+    def _image_url(self, name):
+        if not name:
+            return None
+        url = self._storage.url(name)
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        # Same result as request.build_absolute_uri(url), with the scheme
+        # and host worked out once per response instead of once per row.
+        if self._host is None:
+            request = self.context.get("request")
+            self._host = request.build_absolute_uri("/")[:-1] if request is not None else ""
+        return self._host + url
+
+    def _datetime(self, value):
+        value = value.astimezone(self._timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+
+def _follow(obj, lookup):
+    """The value at a ``a__b`` lookup from obj, or None past a missing relation."""
+    for name in lookup.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def _date(value):
+    return value.isoformat()
+
+
+def _decimal(value):
+    return None if value is None else f"{value:f}"
 
 
 class OTPVerificationSerializer(serializers.Serializer):
@@ -172,7 +375,7 @@ class OTPVerificationSerializer(serializers.Serializer):
     otp = serializers.CharField(min_length=6, max_length=6)
 
 
-class ChatMessageSerializer(serializers.ModelSerializer):
+class ChatMessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sender_name = serializers.CharField(source="sender.full_name", read_only=True)
     sender_email = serializers.CharField(source="sender.email", read_only=True)
 
@@ -186,9 +389,10 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             "sender_email",
             "message",
             "created_at",
+            "updated_at",
             "is_read",
             "is_offer",
             "offer_amount",
             "offer_status",
         ]
-        read_only_fields = ["sender", "created_at", "is_read", "pickup_request", "offer_status"]
+        read_only_fields = ["sender", "created_at", "updated_at", "is_read", "pickup_request", "offer_status"]
@@ -0,0 +1,97 @@
+"""
+Garbage collection for ContentAddressedStorage (app/storage.py).
+
+The storage counts references on save() and delete(), but Django does not
+call delete() when a row holding a file is deleted or the field is
+overwritten, so refcounts only ever err high. collect() recounts the
+references from every FileField using the storage, corrects the counts and
+removes the blobs nothing points to.
+
+Only blobs untouched for BLOB_GC_GRACE seconds are considered: a file is
+saved before the row referencing it commits, so a fresh blob without
+references may be about to get one.
+"""
+
+import os
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from app.storage import ContentAddressedStorage
+
+# A blob, or one being written (see ContentAddressedStorage._save).
+BLOB_FILE = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[^/.]*)?(\.[0-9a-f]{32}\.part)?$")
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def references():
+    """How many FileField values point at each stored name."""
+    counts = Counter()
+    for model, field in file_fields():
+        rows = (
+            model._default_manager.exclude(**{f"{field.attname}__isnull": True})
+            .exclude(**{field.attname: ""})
+            .values_list(field.attname)
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+        counts.update(dict(rows))
+    return counts
+
+
+def collect(storage=default_storage):
+    """Removes unreferenced blobs and stray files; returns (files removed, bytes freed)."""
+    from app.models import Blob
+
+    cutoff = timezone.now() - timedelta(seconds=settings.BLOB_GC_GRACE)
+    counts = references()
+    removed = freed = 0
+
+    for blob in list(Blob.objects.filter(updated_at__lt=cutoff)):
+        actual = counts[blob.name]
+        if actual:
+            if actual != blob.refcount:
+                Blob.objects.filter(pk=blob.pk, updated_at=blob.updated_at).update(refcount=actual)
+            continue
+        with transaction.atomic():
+            # Skipped if a save() or delete() touched the blob since it was
+            # read; a save() arriving now waits for the lock and then
+            # writes the file afresh.
+            if not Blob.objects.select_for_update().filter(
+                pk=blob.pk, updated_at=blob.updated_at
+            ).exists():
+                continue
+            storage.remove(blob.name)
+            Blob.objects.filter(pk=blob.pk).delete()
+        removed += 1
+        freed += blob.size
+
+    # Files without a Blob row: left by a save() whose transaction rolled
+    # back, or by a write that never finished.
+    known = set(Blob.objects.values_list("name", flat=True))
+    for root, _, filenames in os.walk(storage.location):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, storage.location).replace(os.sep, "/")
+            if not BLOB_FILE.search(name) or name in known or counts[name]:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime >= cutoff.timestamp():
+                continue
+            os.remove(path)
+            removed += 1
+            freed += stat.st_size
+    return removed, freed
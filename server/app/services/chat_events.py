@@ -0,0 +1,117 @@
+"""
+Fan-out of chat events to the per-pickup event streams.
+
+Every saved ChatMessage (new messages, offer accepted/rejected) is
+serialized once and published on the ``pickup:<id>`` channel after the
+transaction commits. Stream views subscribe to the channel of the pickup
+they watch.
+
+The broker is chosen with the CHAT_BROKER setting. InProcessBroker only
+reaches streams served by the same process, which is enough for tests and
+single-process deployments; RedisBroker (needs the ``redis`` package and
+CHAT_BROKER_URL) reaches every node.
+"""
+
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def channel_for(pickup_id):
+    return f"pickup:{pickup_id}"
+
+
+class InProcessBroker:
+    def __init__(self, url=None):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, event):
+        """Safe to call from any thread; subscribers live on event loops."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's loop is already closed.
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                subscribers.discard(entry)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class RedisBroker:
+    def __init__(self, url=None):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError("RedisBroker requires the 'redis' package") from exc
+        self.url = url or "redis://localhost:6379/0"
+        self._client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, event):
+        self._client.publish(channel, json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        queue = asyncio.Queue()
+
+        async def pump():
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    queue.put_nowait(json.loads(message["data"]))
+
+        reader = asyncio.create_task(pump())
+        try:
+            yield queue
+        finally:
+            reader.cancel()
+            await pubsub.unsubscribe(channel)
+            await client.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    broker_class = import_string(
+        getattr(settings, "CHAT_BROKER", "app.services.chat_events.InProcessBroker")
+    )
+    return broker_class(getattr(settings, "CHAT_BROKER_URL", None))
+
+
+def publish_message(message_id):
+    """Publishes the current state of a chat message."""
+    from app.models import ChatMessage
+    from app.serializers import ChatMessageSerializer
+
+    message = ChatMessage.objects.select_related("sender").filter(id=message_id).first()
+    if message is None:
+        return
+    data = dict(ChatMessageSerializer(message).data)
+    get_broker().publish(channel_for(message.pickup_request_id), data)
+
+
+def publish_message_on_commit(message_id):
+    transaction.on_commit(lambda: publish_message(message_id))
@@ -0,0 +1,95 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency that is known to be failing."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call fails immediately with CircuitOpenError. Once
+    ``reset_timeout`` seconds have passed a single trial call is let
+    through: success closes the circuit again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_running):
+                raise CircuitOpenError(f"{self.name} is unavailable")
+            if state == self.HALF_OPEN:
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+    def call(self, func, *args, failure_exceptions=(Exception,), **kwargs):
+        """Runs ``func`` through the breaker; listed exceptions count as failures."""
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except failure_exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not the dependency's fault; just free the trial slot.
+            with self._lock:
+                self._trial_running = False
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func, *args, failure_exceptions=(Exception,), **kwargs):
+        """call() for a coroutine function."""
+        self.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except failure_exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            with self._lock:
+                self._trial_running = False
+            raise
+        self.record_success()
+        return result
@@ -0,0 +1,117 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encodes a coordinate pair into a geohash string.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def cell_size_km(precision, latitude):
+    """
+    Returns the (height, width) in km of a geohash cell at the given latitude.
+    """
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    height = (180.0 / 2 ** lat_bits) * 111.32
+    width = (360.0 / 2 ** lng_bits) * 111.32 * math.cos(math.radians(latitude))
+    return height, width
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Returns the geohash prefixes whose cells cover a circle around a point.
+
+    The finest precision whose cell is at least as large as the radius is
+    picked, so the circle always fits inside the 3x3 block of cells around
+    the centre cell.
+    """
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size_km(candidate, latitude)
+        if height >= radius_km and width >= radius_km:
+            precision = candidate
+            break
+
+    height, width = cell_size_km(precision, latitude)
+    dlat = height / 111.32
+    dlng = width / (111.32 * max(math.cos(math.radians(latitude)), 1e-6))
+
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            lat = min(max(latitude + i * dlat, -90.0), 90.0)
+            lng = (longitude + j * dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+
+def prefix_range(prefix):
+    """
+    Returns the half-open (low, high) string range holding every geohash that
+    starts with prefix. high is None when the range is unbounded.
+
+    Range predicates use the plain B-tree index on every backend, unlike
+    LIKE 'prefix%' which needs a pattern index.
+    """
+    chars = list(prefix)
+    while chars:
+        position = _BASE32.index(chars[-1])
+        if position + 1 < len(_BASE32):
+            chars[-1] = _BASE32[position + 1]
+            return prefix, "".join(chars)
+        chars.pop()
+    return prefix, None
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Returns (min_lat, max_lat, min_lng, max_lng) enclosing a circle.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6:
+        return latitude - dlat, latitude + dlat, -180.0, 180.0
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return latitude - dlat, latitude + dlat, longitude - dlng, longitude + dlng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance between two points in km.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
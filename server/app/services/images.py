@@ -0,0 +1,150 @@
+"""
+Pickup photo processing, run off the request path by the
+process_pickup_image job.
+
+Uploads are phone photos: several megabytes, far larger than any screen
+shows them, and often carrying EXIF with the GPS position they were taken
+at. The job replaces the stored original with a copy downscaled to
+PICKUP_IMAGE_MAX_SIZE and re-encoded without metadata, and adds a
+PICKUP_IMAGE_THUMB_SIZE thumbnail for the list views.
+
+JPEGs are decoded with Image.draft(), which has libjpeg scale by 1/2, 1/4
+or 1/8 while decoding, so a 12 MP photo is never held in memory at full
+size. Other formats have no reduced decode; those above
+PICKUP_IMAGE_MAX_PIXELS are left as uploaded rather than decoded.
+"""
+
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from . import pool_cache
+
+logger = logging.getLogger(__name__)
+
+
+class UnprocessableImage(Exception):
+    pass
+
+
+def output_format():
+    if settings.PICKUP_IMAGE_FORMAT.upper() == "WEBP" and features.check("webp"):
+        return "WEBP"
+    return "JPEG"
+
+
+def decode(file, max_size):
+    """
+    Opens ``file`` scaled to fit ``max_size`` on the long side, upright and
+    in RGB(A).
+    """
+    try:
+        image = Image.open(file)
+    except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        raise UnprocessableImage(str(exc))
+    # Only configures the decoder; nothing is decoded until the pixels are
+    # first needed. A no-op for formats other than JPEG.
+    image.draft("RGB", (max_size, max_size))
+    if image.format != "JPEG" and image.width * image.height > settings.PICKUP_IMAGE_MAX_PIXELS:
+        raise UnprocessableImage(f"{image.format} image of {image.width}x{image.height} is too large")
+
+    try:
+        # Phones store portrait shots sideways with an Orientation tag.
+        image = ImageOps.exif_transpose(image)
+    except OSError as exc:  # truncated or corrupt data
+        raise UnprocessableImage(str(exc))
+    if image.mode not in ("RGB", "RGBA"):
+        transparent = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+    # reducing_gap has non-JPEG images shrink with the cheap reduce() first.
+    image.thumbnail((max_size, max_size), reducing_gap=2.0)
+    return image
+
+
+def encode(image, fmt):
+    """
+    Encodes ``image`` as ``fmt``. Only the colour profile is carried over;
+    EXIF and XMP are never passed to save(), so they are dropped.
+    """
+    if fmt == "JPEG" and image.mode == "RGBA":
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    options = {"quality": settings.PICKUP_IMAGE_QUALITY}
+    if fmt == "WEBP":
+        options["method"] = 4
+    else:
+        options.update(optimize=True, progressive=True)
+    if image.info.get("icc_profile"):
+        options["icc_profile"] = image.info["icc_profile"]
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def render(file):
+    """Returns the (display, thumbnail) encodings of ``file`` and their format."""
+    fmt = output_format()
+    image = decode(file, settings.PICKUP_IMAGE_MAX_SIZE)
+    thumb = ImageOps.fit(image, settings.PICKUP_IMAGE_THUMB_SIZE, Image.Resampling.LANCZOS)
+    return encode(image, fmt), encode(thumb, fmt), fmt
+
+
+def process_pickup(pickup_id):
+    """
+    Replaces a pickup's photo with its processed copy and stores the
+    thumbnail. Returns False when there was nothing to do: no photo, already
+    processed, unreadable, or the photo was replaced while this ran.
+    """
+    from app.models import PickupRequest
+
+    pickup = (
+        PickupRequest.objects.filter(id=pickup_id)
+        .only("scrape_image", "scrape_image_thumb", "status")
+        .first()
+    )
+    if pickup is None or not pickup.scrape_image or pickup.scrape_image_thumb:
+        return False
+
+    original = pickup.scrape_image.name
+    storage = pickup.scrape_image.storage
+    try:
+        with storage.open(original) as file:
+            display, thumb, fmt = render(file)
+    except (FileNotFoundError, UnprocessableImage) as exc:
+        logger.warning("Leaving photo of pickup %s as uploaded: %s", pickup_id, exc)
+        return False
+
+    stem = os.path.splitext(os.path.basename(original))[0]
+    filename = f"{stem}.{fmt.lower()}"
+    display_name = storage.save(
+        PickupRequest._meta.get_field("scrape_image").generate_filename(pickup, filename),
+        ContentFile(display),
+    )
+    thumb_name = storage.save(
+        PickupRequest._meta.get_field("scrape_image_thumb").generate_filename(pickup, filename),
+        ContentFile(thumb),
+    )
+
+    with transaction.atomic():
+        # Guarded on the original name: the photo may have been replaced or
+        # the pickup deleted while it was being processed.
+        updated = PickupRequest.objects.filter(id=pickup_id, scrape_image=original).update(
+            scrape_image=display_name,
+            scrape_image_thumb=thumb_name,
+            updated_at=timezone.now(),
+        )
+        if updated and pickup.status == "open":
+            pool_cache.invalidate_on_commit()
+    if not updated:
+        storage.delete(display_name)
+        storage.delete(thumb_name)
+        return False
+    storage.delete(original)
+    return True
@@ -0,0 +1,179 @@
+"""
+A small database-backed job queue.
+
+Tasks are plain functions registered with ``@task("name")`` in app/tasks.py
+and queued with ``enqueue("name", **payload)``. The job row is written in
+the caller's transaction, so it only becomes visible to workers once the
+request commits. ``manage.py run_worker`` runs due jobs. A failed job is
+retried with exponential backoff until ``max_attempts``, then moved to
+DeadLetterJob.
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+SCHEDULE_LOCK_TIMEOUT = 60
+
+_registry = {}
+_recurring = {}
+
+
+def task(name, recurring=False):
+    def register(func):
+        _registry[name] = func
+        if recurring:
+            _recurring[name] = func
+        return func
+
+    return register
+
+
+def recurring_tasks():
+    import_module("app.tasks")
+    return list(_recurring)
+
+
+def get_task(name):
+    if name not in _registry:
+        import_module("app.tasks")
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown task: {name}")
+
+
+def enqueue(name, max_attempts=5, run_at=None, **payload):
+    from app.models import Job
+
+    get_task(name)
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def enqueue_recurring(name, run_at=None):
+    """
+    Queues a job that queues its own next run, even when it fails. A failed
+    run is not retried (the next run is the retry); it goes straight to
+    DeadLetterJob, so a failure never starts a second chain of runs.
+    """
+    return enqueue(name, max_attempts=1, run_at=run_at)
+
+
+def schedule(name):
+    """
+    Queues the first run of recurring task ``name`` unless a run is already
+    queued; returns whether it did. Workers starting together take a lock in
+    the shared cache so that only one of them starts the chain.
+    """
+    from app.models import Job
+
+    lock = f"jobs:schedule:{name}"
+    if not cache.add(lock, 1, SCHEDULE_LOCK_TIMEOUT):
+        return False
+    try:
+        if Job.objects.filter(task=name).exists():
+            return False
+        enqueue_recurring(name)
+        return True
+    finally:
+        cache.delete(lock)
+
+
+async def aenqueue(name, max_attempts=5, run_at=None, **payload):
+    from app.models import Job
+
+    get_task(name)
+    return await Job.objects.acreate(
+        task=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``, with jitter."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(batch_size=10):
+    """
+    Claims up to ``batch_size`` due jobs for this worker by pushing their
+    run_at past the lease. SKIP LOCKED keeps concurrent workers from
+    queueing behind each other's rows; the conditional UPDATE keeps the
+    claim safe on databases without row locks.
+    """
+    from app.models import Job
+
+    now = timezone.now()
+    with transaction.atomic():
+        due = list(
+            Job.objects.filter(run_at__lte=now)
+            .order_by("run_at", "id")
+            .select_for_update(skip_locked=True)
+            .values_list("id", "run_at")[:batch_size]
+        )
+        claimed = []
+        for job_id, run_at in due:
+            if Job.objects.filter(id=job_id, run_at=run_at).update(
+                run_at=now + LEASE, attempts=F("attempts") + 1
+            ):
+                claimed.append(job_id)
+    return list(Job.objects.filter(id__in=claimed).order_by("id"))
+
+
+def run_job(job):
+    """Runs one claimed job; returns True if it succeeded."""
+    from app.models import DeadLetterJob, Job
+
+    try:
+        get_task(job.task)(**job.payload)
+    except Exception as exc:
+        error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s failed for good: %s", job, error)
+            with transaction.atomic():
+                DeadLetterJob.objects.create(
+                    task=job.task,
+                    payload=job.payload,
+                    attempts=job.attempts,
+                    last_error=traceback.format_exc(),
+                    created_at=job.created_at,
+                )
+                Job.objects.filter(id=job.id).delete()
+        else:
+            logger.warning("Job %s failed (attempt %s): %s", job, job.attempts, error)
+            Job.objects.filter(id=job.id).update(
+                run_at=timezone.now() + backoff(job.attempts),
+                last_error=traceback.format_exc(),
+            )
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
+
+
+def run_pending(batch_size=10):
+    """Claims and runs one batch; returns the number of jobs processed."""
+    jobs = claim(batch_size)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
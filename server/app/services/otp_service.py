@@ -1,63 +1,247 @@
-from twilio.rest import Client
-import os
+import asyncio
+import json
+import logging
 import random
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class OTPProviderError(Exception):
+    """The provider answered with a server error."""
+
 
 class OTPService:
-    def __init__(self):
-        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-        self.verify_sid = os.getenv("TWILIO_VERIFY_SERVICE_SID")
-        
-        self.client = None
-        if self.account_sid and self.auth_token:
-            try:
-                self.client = Client(self.account_sid, self.auth_token)
-            except Exception as e:
-                print(f"Twilio Client Init Error: {e}")
-
-    def send_otp(self, contact, channel='sms'):
+    """
+    Client for the Twilio Verify REST API.
+
+    One instance is shared by the whole process (see get_otp_service), so
+    requests reuse pooled keep-alive connections instead of opening a new
+    TLS session each time. Every call has connect/read timeouts and goes
+    through a circuit breaker, so an unhealthy provider fails fast instead
+    of tying up workers.
+
+    The ``a``-prefixed methods are the same calls for async views, made with
+    aiohttp. Under the ASGI server they share one connection pool per worker,
+    opened and closed with the server (see core/asgi.py); elsewhere, where
+    each async view runs in an event loop of its own, every call opens a
+    session for itself.
+    """
+
+    def __init__(
+        self,
+        account_sid=None,
+        auth_token=None,
+        verify_sid=None,
+        base_url="https://verify.twilio.com/v2",
+        timeout=(3.05, 5),
+        pool_size=10,
+        breaker=None,
+    ):
+        self.verify_sid = verify_sid
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker("otp-provider")
+
+        self.pool_size = pool_size
+        self.async_session = None
+        self._async_loop = None
+        self.auth = None
+        self.session = None
+        if account_sid and auth_token:
+            self.auth = aiohttp.BasicAuth(account_sid, auth_token)
+            self.session = requests.Session()
+            self.session.auth = (account_sid, auth_token)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+    @property
+    def configured(self):
+        return self.session is not None and bool(self.verify_sid)
+
+    @staticmethod
+    def format_contact(contact, channel="sms"):
+        if channel == "sms" and "@" not in contact and not contact.startswith("+"):
+            return f"+91{contact}"
+        return contact
+
+    def _post(self, path, data):
+        url = f"{self.base_url}/Services/{self.verify_sid}/{path}"
+
+        def post():
+            response = self.session.post(url, data=data, timeout=self.timeout)
+            if response.status_code >= 500:
+                raise OTPProviderError(f"{response.status_code} from {path}")
+            return response
+
+        return self.breaker.call(
+            post, failure_exceptions=(requests.RequestException, OTPProviderError)
+        )
+
+    def _new_async_session(self):
+        connect, read = self.timeout
+        return aiohttp.ClientSession(
+            auth=self.auth,
+            timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+        )
+
+    async def aopen(self):
+        """Opens the connection pool for the running event loop."""
+        if self.async_session is None and self.configured:
+            self.async_session = self._new_async_session()
+            self._async_loop = asyncio.get_running_loop()
+
+    async def aclose(self):
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+
+    @asynccontextmanager
+    async def _async_client(self):
+        if self.async_session is not None and self._async_loop is asyncio.get_running_loop():
+            yield self.async_session
+        else:
+            async with self._new_async_session() as session:
+                yield session
+
+    async def _apost(self, path, data):
+        """_post() for async callers; returns (HTTP status, body)."""
+        url = f"{self.base_url}/Services/{self.verify_sid}/{path}"
+
+        async def post():
+            async with self._async_client() as session:
+                async with session.post(url, data=data) as response:
+                    if response.status >= 500:
+                        raise OTPProviderError(f"{response.status} from {path}")
+                    return response.status, await response.text()
+
+        return await self.breaker.acall(
+            post, failure_exceptions=(aiohttp.ClientError, asyncio.TimeoutError, OTPProviderError)
+        )
+
+    @staticmethod
+    def _status(code, body):
+        """
+        The verification status in a provider answer. Raises
+        OTPProviderError for an error, or for a body that is not Verify's
+        JSON (e.g. an HTML page from a proxy in between).
+        """
+        if code >= 400:
+            raise OTPProviderError(f"{code}: {body[:200]}")
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise OTPProviderError(f"{code}, not JSON: {body[:200]}")
+        return data.get("status")
+
+    def start_verification(self, contact, channel="sms"):
+        """
+        Asks Twilio Verify to send a code. Raises on any failure, so callers
+        (e.g. the send_otp job) can retry.
+        """
+        response = self._post(
+            "Verifications",
+            {"To": self.format_contact(contact, channel), "Channel": channel},
+        )
+        return self._status(response.status_code, response.text)
+
+    async def astart_verification(self, contact, channel="sms"):
+        code, body = await self._apost(
+            "Verifications",
+            {"To": self.format_contact(contact, channel), "Channel": channel},
+        )
+        return self._status(code, body)
+
+    def send_otp(self, contact, channel="sms"):
         """
         Sends an OTP using Twilio Verify.
         """
-        if not self.client or not self.verify_sid:
-            print("Twilio Verify not configured. Using Mock OTP.")
-            mock_otp = str(random.randint(100000, 999999))
-            return mock_otp
+        if not self.configured:
+            logger.info("Twilio Verify not configured. Using mock OTP.")
+            return str(random.randint(100000, 999999))
 
         try:
-            to_contact = contact
-            if channel == 'sms' and not contact.startswith('+'):
-                to_contact = f"+91{contact}" 
+            return self.start_verification(contact, channel)
+        except (CircuitOpenError, OTPProviderError, requests.RequestException) as e:
+            logger.warning("Twilio Verify send failed: %s. Falling back to mock OTP.", e)
+            return str(random.randint(100000, 999999))
 
-            verification = self.client.verify.v2.services(self.verify_sid).verifications.create(
-                to=to_contact,
-                channel=channel
-            )
-            print(f"Twilio Verify Sent: {verification.status}")
-            return verification.status
-        except Exception as e:
-            print(f"Twilio Verify Send Error: {e}. Falling back to Mock OTP.")
-            mock_otp = str(random.randint(100000, 999999))
-            return mock_otp
+    async def asend_otp(self, contact, channel="sms"):
+        if not self.configured:
+            logger.info("Twilio Verify not configured. Using mock OTP.")
+            return str(random.randint(100000, 999999))
+
+        try:
+            return await self.astart_verification(contact, channel)
+        except (CircuitOpenError, OTPProviderError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Twilio Verify send failed: %s. Falling back to mock OTP.", e)
+            return str(random.randint(100000, 999999))
 
     def verify_otp(self, contact, otp):
         """
-        Verifies OTP using Twilio Verify.
+        Verifies OTP using Twilio Verify. An unreachable provider counts as
+        not verified.
         """
-        if not self.client or not self.verify_sid:
-            print("Twilio Verify not configured. Mock verify pass.")
+        if not self.configured:
+            logger.info("Twilio Verify not configured. Mock verify pass.")
             return True
 
         try:
-            if '@' not in contact and not contact.startswith('+'):
-                to_contact = f"+91{contact}"
-
-            verification_check = self.client.verify.v2.services(self.verify_sid).verification_checks.create(
-                to=to_contact,
-                code=otp
+            response = self._post(
+                "VerificationCheck",
+                {"To": self.format_contact(contact), "Code": otp},
             )
-            print(f"Twilio Verify Check: {verification_check.status}")
-            return verification_check.status == 'approved'
-        except Exception as e:
-            print(f"Twilio Verify Check Error: {e}. Mock verify pass.")
+            # 404: no pending verification for this contact (expired or used).
+            if response.status_code == 404:
+                return False
+            return self._status(response.status_code, response.text) == "approved"
+        except (CircuitOpenError, OTPProviderError, requests.RequestException) as e:
+            logger.warning("Twilio Verify check failed: %s", e)
+            return False
+
+    async def averify_otp(self, contact, otp):
+        if not self.configured:
+            logger.info("Twilio Verify not configured. Mock verify pass.")
             return True
+
+        try:
+            code, body = await self._apost(
+                "VerificationCheck",
+                {"To": self.format_contact(contact), "Code": otp},
+            )
+            if code == 404:
+                return False
+            return self._status(code, body) == "approved"
+        except (CircuitOpenError, OTPProviderError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Twilio Verify check failed: %s", e)
+            return False
+
+
+@lru_cache(maxsize=None)
+def get_otp_service():
+    """The process-wide OTPService built from settings."""
+    return OTPService(
+        account_sid=settings.TWILIO_ACCOUNT_SID,
+        auth_token=settings.TWILIO_AUTH_TOKEN,
+        verify_sid=settings.TWILIO_VERIFY_SERVICE_SID,
+        base_url=settings.TWILIO_VERIFY_BASE_URL,
+        timeout=(settings.OTP_PROVIDER_CONNECT_TIMEOUT, settings.OTP_PROVIDER_READ_TIMEOUT),
+        pool_size=settings.OTP_PROVIDER_POOL_SIZE,
+        breaker=CircuitBreaker(
+            "otp-provider",
+            failure_threshold=settings.OTP_PROVIDER_FAILURE_THRESHOLD,
+            reset_timeout=settings.OTP_PROVIDER_RESET_TIMEOUT,
+        ),
+    )
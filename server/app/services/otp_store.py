@@ -0,0 +1,54 @@
+"""
+Short-lived pickup OTP state, kept in the cache instead of PickupRequest.
+
+An entry holds the contact phone and, in mock mode, the code itself (with
+Twilio Verify the code lives at the provider). Entries expire after
+PICKUP_OTP_TTL seconds, allow PICKUP_OTP_MAX_ATTEMPTS guesses and are
+removed as soon as one is accepted.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _keys(pickup_id):
+    return f"pickup_otp:{pickup_id}", f"pickup_otp_attempts:{pickup_id}"
+
+
+def issue(pickup_id, contact, code=None):
+    """Stores a fresh OTP for the pickup, replacing any earlier one."""
+    entry_key, attempts_key = _keys(pickup_id)
+    ttl = settings.PICKUP_OTP_TTL
+    cache.set_many({entry_key: {"contact": contact, "code": code}, attempts_key: 0}, ttl)
+
+
+async def aissue(pickup_id, contact, code=None):
+    entry_key, attempts_key = _keys(pickup_id)
+    ttl = settings.PICKUP_OTP_TTL
+    await cache.aset_many({entry_key: {"contact": contact, "code": code}, attempts_key: 0}, ttl)
+
+
+def get(pickup_id):
+    """
+    Returns the pending entry and counts one attempt against it, or None if
+    there is none (never sent, expired, used, or out of attempts).
+    """
+    entry_key, attempts_key = _keys(pickup_id)
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        return None
+    if attempts > settings.PICKUP_OTP_MAX_ATTEMPTS:
+        discard(pickup_id)
+        return None
+    return cache.get(entry_key)
+
+
+def matches(entry, code):
+    return entry["code"] is not None and hmac.compare_digest(entry["code"], str(code))
+
+
+def discard(pickup_id):
+    cache.delete_many(_keys(pickup_id))
@@ -0,0 +1,66 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = "pickup_pool:generation"
+FEED_TIMEOUT = 300
+
+
+def generation():
+    """
+    Returns the current open-pool generation. Every cached feed is keyed by
+    it, so bumping the generation invalidates all of them at once. The
+    worker bumps it too, so the cache must be shared between processes
+    (app.checks.require_shared_cache).
+    """
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # A fresh, never-before-used value: if the counter was evicted we must
+        # not fall back to a generation that still has feeds cached under it.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit():
+    """
+    Invalidates now and again once the surrounding transaction commits.
+
+    The second bump covers a reader that rebuilt the feed from the old rows
+    between the first bump and the commit.
+    """
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def feed_key(request):
+    """
+    Cache key for one open-pool page. Query parameters are sorted so that
+    equivalent URLs (scrap_type, cursor, page size, coordinates) share an
+    entry, and the host is included because image URLs are absolute.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = f"{request.get_host()}{request.path}?{params}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"pickup_pool:{generation()}:{digest}"
+
+
+def get_feed(key):
+    return cache.get(key)
+
+
+def set_feed(key, data):
+    cache.set(key, data, FEED_TIMEOUT)
@@ -0,0 +1,88 @@
+"""
+Change feed of the vendor open pool.
+
+Pickups that entered the pool (or changed while in it) are found through
+their ``updated_at``. Pickups that left it leave a PoolTombstone, written
+by PickupRequestQuerySet.transition(), PickupRequest.save() and, for every
+kind of delete, a post_delete receiver in app/signals.py.
+
+A feed position (the watermark) is a timestamp. It is handed out
+POOL_CHANGES_SETTLE seconds behind the clock, so a change whose
+transaction committed a little after it was stamped is still picked up by
+the next poll; clients see such recent changes twice, which is harmless
+because applying them is idempotent. Tombstones are kept for
+POOL_CHANGES_RETENTION seconds, and older positions are refused.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+
+def record_exits(pickup_ids, at):
+    from app.models import PoolTombstone
+
+    PoolTombstone.objects.bulk_create(
+        PoolTombstone(pickup_id=pickup_id, left_at=at) for pickup_id in pickup_ids
+    )
+
+
+def record_transition_exits(stamp, status):
+    """
+    Tombstones the rows a transition just moved out of the pool, with one
+    INSERT ... SELECT so a bulk sweep still never loads rows into Python.
+    They are the rows in the target status carrying the exact updated_at
+    the transition wrote; a row that another transition happened to stamp
+    with the same microsecond only gets a spare tombstone, which clients
+    ignore.
+    """
+    from app.models import PickupRequest, PoolTombstone
+
+    quote = connection.ops.quote_name
+    stamp = connection.ops.adapt_datetimefield_value(stamp)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(PoolTombstone._meta.db_table)} (pickup_id, left_at) "
+            f"SELECT id, %s FROM {quote(PickupRequest._meta.db_table)} "
+            f"WHERE status = %s AND updated_at = %s",
+            [stamp, status, stamp],
+        )
+
+
+def watermark():
+    return timezone.now() - timedelta(seconds=settings.POOL_CHANGES_SETTLE)
+
+
+def is_expired(since):
+    """True if tombstones after ``since`` may already have been pruned."""
+    return since < timezone.now() - timedelta(seconds=settings.POOL_CHANGES_RETENTION)
+
+
+def changes(pool, since):
+    """
+    Returns ``(entered, left)`` since the watermark: the rows of ``pool``
+    (an open-pool queryset, possibly filtered) that were stamped after it,
+    and the ids of pickups that left the pool after it.
+    """
+    from app.models import PoolTombstone
+
+    entered = pool.filter(updated_at__gt=since)
+    left = sorted(
+        set(
+            PoolTombstone.objects.filter(left_at__gt=since).values_list(
+                "pickup_id", flat=True
+            )
+        )
+    )
+    return entered, left
+
+
+def prune():
+    """Deletes tombstones older than the retention window."""
+    from app.models import PoolTombstone
+
+    cutoff = timezone.now() - timedelta(seconds=settings.POOL_CHANGES_RETENTION)
+    deleted, _ = PoolTombstone.objects.filter(left_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,35 @@
+"""
+Short-lived tickets for opening a chat event stream.
+
+EventSource cannot send an Authorization header, so whatever authenticates
+the stream travels in its URL, and URLs end up in access logs. Rather than
+the access token, the client first asks for a ticket with its usual bearer
+token. A ticket opens the stream of one pickup, once, within
+CHAT_STREAM_TICKET_TTL seconds.
+"""
+
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(ticket):
+    return f"chat_stream_ticket:{ticket}"
+
+
+def issue(user_id, pickup_id):
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_key(ticket), (user_id, pickup_id), settings.CHAT_STREAM_TICKET_TTL)
+    return ticket
+
+
+async def aredeem(ticket, pickup_id):
+    """The user id the ticket was issued to, or None if it is not valid for the pickup."""
+    key = _key(ticket)
+    entry = await cache.aget(key)
+    # Whoever deletes the entry owns it, so a ticket cannot be used twice.
+    if entry is None or not await cache.adelete(key):
+        return None
+    user_id, ticket_pickup_id = entry
+    return user_id if ticket_pickup_id == pickup_id else None
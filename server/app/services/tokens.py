@@ -0,0 +1,33 @@
+"""
+Housekeeping for SimpleJWT's token blacklist tables.
+
+With ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION every refresh adds
+an OutstandingToken and a BlacklistedToken row. Once a token has expired
+its rows serve no purpose (an expired token is rejected before the
+blacklist is consulted), so they are deleted here in bounded batches to
+keep each transaction and its locks short.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+def prune_expired(batch_size=5000, max_batches=None):
+    """Deletes expired tokens; returns how many outstanding tokens were removed."""
+    now = timezone.now()
+    removed = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            # Cascades to the batch's BlacklistedToken rows.
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        removed += len(ids)
+        batches += 1
+    return removed
@@ -0,0 +1,64 @@
+"""
+Per-user, per-pickup unread chat counters kept in the cache.
+
+A counter is either absent or correct: new messages only ``incr`` counters
+that already exist, and a missing counter is rebuilt from the messages
+table the next time it is asked for. Marking messages read drops the
+counter so it is rebuilt. The TTL bounds how long a counter can stay off
+if a rebuild races with a new message.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+
+COUNTER_TIMEOUT = 600
+
+
+def counter_key(user_id, pickup_id):
+    return f"chat_unread:{user_id}:{pickup_id}"
+
+
+def message_created(pickup, sender_id):
+    """Bumps the unread counter of the participant who did not send it."""
+    for user_id in (pickup.user_id, pickup.assigned_to_id):
+        if user_id is None or user_id == sender_id:
+            continue
+        try:
+            cache.incr(counter_key(user_id, pickup.id))
+        except ValueError:
+            # Not cached: it will be counted from the table when needed.
+            pass
+
+
+def reset(user_id, pickup_id):
+    cache.delete(counter_key(user_id, pickup_id))
+
+
+def counts(user, pickup_ids):
+    """
+    Returns {pickup_id: unread} for ``user``. Cached counters are read in
+    one round trip; the misses are filled by a single grouped COUNT.
+    """
+    from app.models import ChatMessage
+
+    keys = {counter_key(user.id, pickup_id): pickup_id for pickup_id in pickup_ids}
+    cached = cache.get_many(keys)
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [pickup_id for key, pickup_id in keys.items() if key not in cached]
+    if missing:
+        rows = (
+            ChatMessage.objects.filter(pickup_request_id__in=missing, is_read=False)
+            .exclude(sender=user)
+            .values("pickup_request_id")
+            .annotate(unread=Count("id"))
+            .order_by()
+        )
+        fresh = dict.fromkeys(missing, 0)
+        fresh.update((row["pickup_request_id"], row["unread"]) for row in rows)
+        cache.set_many(
+            {counter_key(user.id, pickup_id): n for pickup_id, n in fresh.items()},
+            COUNTER_TIMEOUT,
+        )
+        result.update(fresh)
+    return result
@@ -0,0 +1,134 @@
+"""
+Resumable uploads for registration documents.
+
+A client on a slow link creates a session with the file's name and size,
+then sends the bytes in PATCH requests of at most UPLOAD_CHUNK_SIZE, each
+carrying the offset it starts at. Each request is short, so no worker is
+held for the length of the whole upload, and after a dropped connection
+the client asks for the session's offset and carries on from there.
+
+Chunks are written straight into UPLOAD_SESSION_DIR/<id>. A registration
+then names the finished session as ``<field>_upload``, and storage moves
+the assembled file into place rather than copying it.
+"""
+
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+READ_SIZE = 64 * 2**10
+
+
+class OffsetConflict(Exception):
+    """A chunk did not start where the session's data ends."""
+
+    def __init__(self, offset):
+        super().__init__(offset)
+        self.offset = offset
+
+
+class SessionFile(File):
+    def __init__(self, file, name, upload_id):
+        super().__init__(file, name)
+        self.upload_id = upload_id
+
+    # FileSystemStorage moves files that have a path on disk instead of
+    # copying them.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def path(upload_id):
+    return os.path.join(settings.UPLOAD_SESSION_DIR, str(upload_id))
+
+
+def create(filename, size):
+    from app.models import UploadSession
+
+    session = UploadSession.objects.create(filename=filename, size=size)
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    open(path(session.id), "wb").close()
+    return session
+
+
+def append(upload_id, offset, stream, length):
+    """
+    Writes ``length`` bytes from ``stream`` at ``offset``. Returns the
+    updated session; its offset falls short when the client disconnected
+    mid-chunk, and the client resumes from there.
+
+    The session row stays locked while the chunk is read, so retries of the
+    same chunk over parallel connections cannot interleave.
+    """
+    from app.models import UploadSession
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=upload_id)
+        if offset != session.offset:
+            raise OffsetConflict(session.offset)
+        with open(path(upload_id), "r+b") as file:
+            file.seek(offset)
+            remaining = length
+            while remaining and stream is not None:
+                chunk = stream.read(min(remaining, READ_SIZE))
+                if not chunk:
+                    break
+                file.write(chunk)
+                remaining -= len(chunk)
+            file.truncate()
+        session.offset = offset + length - remaining
+        session.save(update_fields=["offset", "updated_at"])
+    return session
+
+
+def finished(upload_id):
+    """The finished UploadSession with this id, or None."""
+    from app.models import UploadSession
+
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return None
+    session = UploadSession.objects.filter(id=upload_id).first()
+    if session is None or not session.complete:
+        return None
+    return session
+
+
+def take(upload_id):
+    """
+    Opens a finished upload for saving into a FileField, or returns None
+    if there is no such finished upload. The caller closes the file.
+    """
+    session = finished(upload_id)
+    if session is None:
+        return None
+    return SessionFile(open(path(session.id), "rb"), session.filename, session.id)
+
+
+def discard(upload_ids):
+    from app.models import UploadSession
+
+    UploadSession.objects.filter(id__in=upload_ids).delete()
+    for upload_id in upload_ids:
+        try:
+            os.remove(path(upload_id))
+        except FileNotFoundError:  # moved into storage
+            pass
+
+
+def prune():
+    """Removes sessions idle for UPLOAD_SESSION_TTL; returns how many."""
+    from app.models import UploadSession
+
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    stale = list(
+        UploadSession.objects.filter(updated_at__lt=cutoff).values_list("id", flat=True)
+    )
+    discard(stale)
+    return len(stale)
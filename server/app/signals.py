@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import invalidate_user
+from .models import PickupRequest, User
+from .services import pool_cache, pool_changes
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_auth_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=PickupRequest)
+def tombstone_deleted_pickup(sender, instance, **kwargs):
+    # A receiver also makes queryset deletes and cascades (e.g. deleting
+    # the customer) load and signal each row, so none of them skips this.
+    # It runs inside the delete's transaction.
+    loaded_status = getattr(instance, "_loaded_status", None)
+    if "open" in (instance.status, loaded_status):
+        pool_cache.invalidate_on_commit()
+        pool_changes.record_exits([instance.pk], timezone.now())
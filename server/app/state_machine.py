@@ -0,0 +1,60 @@
+"""
+Allowed PickupRequest status transitions.
+
+Every transition is applied with PickupRequest.objects.filter(...).transition(name),
+which issues one ``UPDATE ... WHERE status IN (<sources>)`` over the
+queryset. A row that is no longer in a source state is simply not matched,
+so concurrent requests cannot both move the same pickup.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+
+
+@dataclass(frozen=True)
+class Transition:
+    name: str
+    sources: tuple
+    target: str
+    # Extra row conditions on top of the source status.
+    guard: Q = field(default_factory=Q)
+    # Columns always written alongside the new status.
+    changes: dict = field(default_factory=dict)
+
+    @property
+    def touches_pool(self):
+        return "open" in self.sources or self.target == "open"
+
+    @property
+    def leaves_pool(self):
+        return "open" in self.sources and self.target != "open"
+
+
+TRANSITIONS = {
+    t.name: t
+    for t in [
+        # Contact phone verified: the request goes to the vendor pool.
+        Transition("confirm", ("pending",), "open", changes={"is_phone_verified": True}),
+        # Client withdraws an unconfirmed request.
+        Transition("cancel", ("pending",), "cancelled"),
+        # Vendor claims a pooled request.
+        Transition("accept", ("open",), "vendor_accepted", guard=Q(assigned_to__isnull=True)),
+        # Vendor backs out, or the client rejects the vendor.
+        Transition("release", ("vendor_accepted",), "open", changes={"assigned_to": None}),
+        # Client approves the vendor that accepted.
+        Transition("approve", ("vendor_accepted",), "scheduled", guard=Q(assigned_to__isnull=False)),
+        # A chat price offer was accepted.
+        Transition("accept_offer", ("vendor_accepted", "scheduled"), "scheduled"),
+        Transition("complete", ("scheduled",), "completed"),
+        # Sweeper: requests whose date passed without being picked up.
+        Transition("expire", ("pending", "open"), "cancelled"),
+    ]
+}
+
+
+def get_transition(name):
+    try:
+        return TRANSITIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown pickup transition: {name}")
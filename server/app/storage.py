@@ -0,0 +1,76 @@
+"""
+Content-addressed file storage with reference counting.
+
+ContentAddressedStorage, the default storage, files every upload under
+its SHA-256 inside its upload_to directory: ``<upload_to>/<h[:2]>/<h><ext>``.
+Saving content that is already stored only bumps the Blob row's refcount,
+so a re-uploaded licence or a reused scrap photo costs a hash and an
+UPDATE instead of another copy on disk. Keeping the upload_to directory
+keeps documents and photos apart.
+
+delete() only drops a reference. Files are reclaimed by ``manage.py
+collect_blobs`` (services/blobs.py), which recounts references from the
+FileField columns, since Django never calls delete() when a row holding a
+file is deleted.
+
+Files stored before this backend keep their names and are read and
+deleted as plain files.
+"""
+
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+def blob_name(name, digest):
+    extension = posixpath.splitext(name)[1].lower()[:10]
+    return posixpath.join(posixpath.dirname(name), digest[:2], f"{digest}{extension}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        from app.models import Blob
+
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        name = blob_name(name, digest.hexdigest())
+
+        # The row lock makes a concurrent save of the same content, or
+        # collect_blobs removing it, wait until this one has committed.
+        with transaction.atomic():
+            blob, created = Blob.objects.select_for_update().get_or_create(
+                name=name, defaults={"size": size, "refcount": 1}
+            )
+            if created:
+                # Written under a temporary name and renamed into place, so
+                # a blob is never seen half-written.
+                partial = super()._save(f"{name}.{uuid.uuid4().hex}.part", content)
+                os.replace(self.path(partial), self.path(name))
+            else:
+                Blob.objects.filter(pk=blob.pk).update(
+                    refcount=F("refcount") + 1, updated_at=timezone.now()
+                )
+        return name
+
+    def delete(self, name):
+        from app.models import Blob
+
+        released = Blob.objects.filter(name=name).update(
+            refcount=Greatest(F("refcount") - 1, 0), updated_at=timezone.now()
+        )
+        if not released:
+            super().delete(name)
+
+    def remove(self, name):
+        """Deletes a blob's file; used by collect_blobs."""
+        super().delete(name)
@@ -0,0 +1,68 @@
+"""Background tasks run by ``manage.py run_worker``."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .services import blobs, images, pool_changes, tokens, uploads
+from .services.jobs import enqueue_recurring, task
+from .services.otp_service import get_otp_service
+
+
+@task("send_otp")
+def send_otp(contact, channel="sms"):
+    get_otp_service().start_verification(contact, channel)
+
+
+@task("process_pickup_image")
+def process_pickup_image(pickup_id):
+    images.process_pickup(pickup_id)
+
+
+@task("prune_tokens", recurring=True)
+def prune_tokens():
+    """Prunes expired JWTs, then queues the next run (also on failure)."""
+    try:
+        tokens.prune_expired(max_batches=settings.TOKEN_PRUNE_MAX_BATCHES)
+    finally:
+        enqueue_recurring(
+            "prune_tokens",
+            run_at=timezone.now() + timedelta(seconds=settings.TOKEN_PRUNE_INTERVAL),
+        )
+
+
+@task("prune_pool_tombstones", recurring=True)
+def prune_pool_tombstones():
+    """Drops pool tombstones past the retention window, then queues the next run (also on failure)."""
+    try:
+        pool_changes.prune()
+    finally:
+        enqueue_recurring(
+            "prune_pool_tombstones",
+            run_at=timezone.now() + timedelta(seconds=settings.POOL_CHANGES_PRUNE_INTERVAL),
+        )
+
+
+@task("prune_upload_sessions", recurring=True)
+def prune_upload_sessions():
+    """Removes abandoned resumable uploads, then queues the next run (also on failure)."""
+    try:
+        uploads.prune()
+    finally:
+        enqueue_recurring(
+            "prune_upload_sessions",
+            run_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_PRUNE_INTERVAL),
+        )
+
+
+@task("collect_blobs", recurring=True)
+def collect_blobs():
+    """Removes unreferenced stored files, then queues the next run (also on failure)."""
+    try:
+        blobs.collect()
+    finally:
+        enqueue_recurring(
+            "collect_blobs",
+            run_at=timezone.now() + timedelta(seconds=settings.BLOB_GC_INTERVAL),
+        )
@@ -1,9 +1,54 @@
 
-from django.test import TestCase
+import asyncio
+import json
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from urllib.parse import parse_qs
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync, sync_to_async
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from . import media
+from .authentication import CACHED_USER_FIELDS, CachedJWTAuthentication, user_cache_key
+from .checks import require_shared_broker, require_shared_cache
+from .management.commands import run_worker
+from .models import Blob, PickupRequest, ChatMessage, DeadLetterJob, Job, PoolTombstone, UploadSession
+from .pagination import KeysetPagination
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import PickupRequestListSerializer, PickupRequestSerializer
+from .services import blobs, geo, images, jobs, otp_store, pool_changes, tokens, uploads
+from .services.circuit_breaker import CircuitBreaker
+from .services.otp_service import OTPProviderError, OTPService
+from .views import SendOTPView
 
 User = get_user_model()
 
@@ -86,3 +131,2171 @@ class RegistrationTests(TestCase):
         response = self.client.post("/api/register/seller/", data, format='multipart')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("password", response.data)
+
+
+class PickupAPITestCase(TestCase):
+    """Shared fixtures for the pickup endpoint tests."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="password123", is_client=True
+        )
+        self.vendor = User.objects.create_user(
+            email="vendor@example.com", password="password123", is_seller=True
+        )
+        self.client.force_authenticate(self.vendor)
+
+    def make_pickup(self, latitude=None, longitude=None, **extra):
+        defaults = {
+            "user": self.customer,
+            "address": "Somewhere",
+            "latitude": latitude,
+            "longitude": longitude,
+            "date": "2026-01-01",
+            "time_slot": "10:00-12:00",
+            "status": "open",
+        }
+        defaults.update(extra)
+        return PickupRequest.objects.create(**defaults)
+
+
+class NearbyPickupsTests(PickupAPITestCase):
+    def test_geohash_is_kept_alongside_coordinates(self):
+        """The geohash cell is derived from lat/lng on save."""
+        pickup = self.make_pickup(18.5204, 73.8567)
+        self.assertEqual(pickup.geohash, geo.encode(18.5204, 73.8567))
+        self.assertTrue(pickup.geohash.startswith("te"))
+
+    def test_nearby_mode_filters_and_sorts_by_distance(self):
+        """Only pickups inside the radius are returned, nearest first."""
+        far = self.make_pickup(19.0760, 72.8777)  # Mumbai, ~120 km away
+        near = self.make_pickup(18.5310, 73.8446)
+        nearest = self.make_pickup(18.5210, 73.8570)
+        self.make_pickup(18.5205, 73.8568, status="scheduled")
+
+        response = self.client.get(
+            "/api/pickup/available/", {"lat": 18.5204, "lng": 73.8567, "radius_km": 5}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(ids, [nearest.id, near.id])
+        self.assertNotIn(far.id, ids)
+        rows = response.data["results"]
+        self.assertLess(rows[0]["distance_km"], rows[1]["distance_km"])
+
+    def test_nearby_mode_crosses_cell_boundaries(self):
+        """Pickups just across a geohash cell edge are still found."""
+        center = (18.5204, 73.8567)
+        pickups = [
+            self.make_pickup(center[0] + dlat, center[1] + dlng)
+            for dlat in (-0.03, 0, 0.03)
+            for dlng in (-0.03, 0, 0.03)
+        ]
+        response = self.client.get(
+            "/api/pickup/available/", {"lat": center[0], "lng": center[1], "radius_km": 6}
+        )
+        rows = response.data["results"]
+        self.assertEqual(sorted(row["id"] for row in rows), sorted(p.id for p in pickups))
+        for row in rows:
+            pickup = PickupRequest.objects.get(id=row["id"])
+            self.assertAlmostEqual(
+                row["distance_km"],
+                geo.haversine_km(center[0], center[1], pickup.latitude, pickup.longitude),
+                places=3,
+            )
+
+    def test_full_pool_without_coordinates(self):
+        """Without lat/lng the whole pool is returned and no distance is added."""
+        self.make_pickup(18.5204, 73.8567)
+        self.make_pickup(None, None)
+        response = self.client.get("/api/pickup/available/")
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertNotIn("distance_km", response.data["results"][0])
+
+    def test_invalid_coordinates(self):
+        """Malformed or out-of-range parameters are rejected."""
+        for params in (
+            {"lat": "abc", "lng": 73},
+            {"lat": 18.5},
+            {"lat": 95, "lng": 73},
+            {"lat": 18.5, "lng": 73, "radius_km": 0},
+            {"lat": 18.5, "lng": 73, "radius_km": 5000},
+        ):
+            response = self.client.get("/api/pickup/available/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class KeysetPaginationTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pickups = [self.make_pickup(status="pending") for _ in range(25)]
+        # Force timestamp ties so the id tie-breaker is exercised.
+        tied = timezone.now()
+        PickupRequest.objects.filter(id__in=[p.id for p in self.pickups[5:15]]).update(
+            created_at=tied
+        )
+        self.client.force_authenticate(self.customer)
+
+    def expected_ids(self):
+        return list(
+            PickupRequest.objects.filter(user=self.customer)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+    def walk(self, url, key):
+        ids = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            ids.extend(row["id"] for row in response.data["results"])
+            url = response.data[key]
+        return ids, pages
+
+    def test_forward_walk_is_stable_and_complete(self):
+        """Following next links visits every row exactly once, in order."""
+        ids, pages = self.walk("/api/pickup/list/?page_size=7", "next")
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual([len(p["results"]) for p in pages], [7, 7, 7, 4])
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_backward_walk_from_last_page(self):
+        """Previous links walk back to the first page without gaps."""
+        _, pages = self.walk("/api/pickup/list/?page_size=7", "next")
+        ids, back_pages = self.walk(pages[-1]["previous"], "previous")
+        expected = self.expected_ids()
+        self.assertEqual(
+            [row["id"] for page in back_pages for row in page["results"]],
+            expected[14:21] + expected[7:14] + expected[0:7],
+        )
+
+    def test_page_size_is_bounded(self):
+        """page_size is clamped to the paginator maximum."""
+        response = self.client.get("/api/pickup/list/", {"page_size": 10000})
+        self.assertEqual(len(response.data["results"]), 25)
+        response = self.client.get("/api/pickup/list/")
+        self.assertEqual(len(response.data["results"]), KeysetPagination.page_size)
+
+    def test_invalid_cursor(self):
+        """Garbage cursors are rejected instead of falling back to page one."""
+        response = self.client.get("/api/pickup/list/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_vendor_list_pages_on_updated_at(self):
+        """vendor-list is keyed on (updated_at, id)."""
+        PickupRequest.objects.filter(id__in=[p.id for p in self.pickups]).update(
+            assigned_to=self.vendor, status="vendor_accepted"
+        )
+        self.client.force_authenticate(self.vendor)
+        ids, _ = self.walk("/api/pickup/vendor-list/?page_size=10", "next")
+        self.assertEqual(
+            ids,
+            list(
+                PickupRequest.objects.filter(assigned_to=self.vendor)
+                .order_by("-updated_at", "-id")
+                .values_list("id", flat=True)
+            ),
+        )
+
+    def test_stats_cover_every_page(self):
+        PickupRequest.objects.filter(id__in=[p.id for p in self.pickups[:3]]).update(
+            status="completed", estimated_price="100.50", assigned_to=self.vendor
+        )
+        PickupRequest.objects.filter(id=self.pickups[3].id).update(
+            status="scheduled", assigned_to=self.vendor
+        )
+        self.make_pickup(status="open", user=self.vendor)  # someone else's
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/pickup/list/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"total": 25, "pending": 21, "completed": 3, "completed_value": Decimal("301.50")},
+        )
+
+        self.client.force_authenticate(self.vendor)
+        response = self.client.get("/api/pickup/vendor-list/stats/")
+        self.assertEqual(
+            response.data,
+            {
+                "total": 4, "pending": 1, "completed": 3,
+                "completed_value": Decimal("301.50"), "available": 1,
+            },
+        )
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/pickup/vendor-list/stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QueryBudgetMixin:
+    """
+    Asserts that an endpoint's SQL query count does not grow with the size of
+    its result, which is how N+1 regressions show up.
+    """
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def assertQueryBudget(self, url, add_rows, small=1, large=10, **params):
+        """
+        Seeds `small` rows with add_rows(n), measures, grows to `large` rows
+        and measures again; both requests must issue the same SQL count.
+        """
+        add_rows(small)
+        baseline = self.count_queries(url, **params)
+        add_rows(large - small)
+        grown = self.count_queries(url, **params)
+        self.assertEqual(
+            baseline,
+            grown,
+            f"{url} issued {baseline} queries for {small} rows but {grown} for {large}",
+        )
+        return grown
+
+
+class QueryBudgetTests(QueryBudgetMixin, PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_vendor = User.objects.create_user(
+            email="vendor2@example.com", is_seller=True, full_name="Other Vendor"
+        )
+
+    def add_pickups(self, **fields):
+        def add(count):
+            for _ in range(count):
+                self.make_pickup(**fields)
+        return add
+
+    def test_client_bookings(self):
+        self.client.force_authenticate(self.customer)
+        self.assertQueryBudget(
+            "/api/pickup/list/",
+            self.add_pickups(assigned_to=self.other_vendor, status="scheduled"),
+        )
+
+    def test_available_pool(self):
+        self.assertQueryBudget("/api/pickup/available/", self.add_pickups())
+
+    def test_vendor_pickups(self):
+        self.assertQueryBudget(
+            "/api/pickup/vendor-list/",
+            self.add_pickups(assigned_to=self.vendor, status="vendor_accepted"),
+        )
+
+    def test_chat_history(self):
+        pickup = self.make_pickup(assigned_to=self.vendor, status="vendor_accepted")
+
+        def add_messages(count):
+            for i in range(count):
+                sender = self.customer if i % 2 else self.vendor
+                ChatMessage.objects.create(
+                    pickup_request=pickup, sender=sender, message=f"msg {i}"
+                )
+
+        self.assertQueryBudget(f"/api/pickup/chat/{pickup.id}/", add_messages)
+
+
+@skipUnless(connection.vendor == "postgresql", "plans are checked against PostgreSQL")
+class QueryPlanTests(TestCase):
+    def test_list_queries_use_their_indexes(self):
+        """Every list view query is served by an index scan on a seeded table."""
+        out = StringIO()
+        call_command("check_query_plans", rows=20000, stdout=out)
+        self.assertNotIn("FAIL", out.getvalue())
+
+
+class OpenPoolCacheTests(PickupAPITestCase):
+    def test_repeat_polls_are_served_from_cache(self):
+        """Polling an unchanged pool does not touch the database."""
+        self.make_pickup()
+        first = self.client.get("/api/pickup/available/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/pickup/available/")
+        self.assertEqual(first.data, second.data)
+
+    def test_feed_is_keyed_by_scrap_type(self):
+        """Each scrap_type filter gets its own cached page."""
+        plastic = self.make_pickup(scrap_type="Plastic")
+        metal = self.make_pickup(scrap_type="Metal")
+        response = self.client.get("/api/pickup/available/", {"scrap_type": "Plastic"})
+        self.assertEqual([r["id"] for r in response.data["results"]], [plastic.id])
+        response = self.client.get("/api/pickup/available/", {"scrap_type": "Metal"})
+        self.assertEqual([r["id"] for r in response.data["results"]], [metal.id])
+
+    def test_entering_and_leaving_the_pool_invalidates(self):
+        """Accept, vendor-cancel, reject and OTP verification refresh the feed."""
+        pickup = self.make_pickup()
+
+        def pool_ids():
+            response = self.client.get("/api/pickup/available/")
+            return [row["id"] for row in response.data["results"]]
+
+        self.assertEqual(pool_ids(), [pickup.id])
+
+        self.client.post(f"/api/pickup/accept/{pickup.id}/")
+        self.assertEqual(pool_ids(), [])
+
+        self.client.post(f"/api/pickup/vendor-cancel/{pickup.id}/")
+        self.assertEqual(pool_ids(), [pickup.id])
+
+        self.client.post(f"/api/pickup/accept/{pickup.id}/")
+        self.client.force_authenticate(self.customer)
+        self.client.post(f"/api/pickup/reject/{pickup.id}/")
+        self.client.force_authenticate(self.vendor)
+        self.assertEqual(pool_ids(), [pickup.id])
+
+        pending = self.make_pickup(status="pending")
+        otp_store.issue(pending.id, "9876543210", code="123456")
+        self.assertEqual(pool_ids(), [pickup.id])
+        self.client.post(
+            "/api/pickup/verify-otp/", {"request_id": pending.id, "otp": "123456"}
+        )
+        self.assertEqual(pool_ids(), [pending.id, pickup.id])
+
+    def test_unrelated_changes_keep_the_cache(self):
+        """Pickups that never touch the pool do not invalidate it."""
+        self.make_pickup()
+        self.client.get("/api/pickup/available/")
+        self.make_pickup(status="pending")
+        with self.assertNumQueries(0):
+            self.client.get("/api/pickup/available/")
+
+
+class AcceptPickupRaceTests(TransactionTestCase):
+    vendors_count = 8
+
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(email="racer-client@example.com")
+        self.vendors = [
+            User.objects.create_user(email=f"racer-{i}@example.com", is_seller=True)
+            for i in range(self.vendors_count)
+        ]
+        self.pickup = PickupRequest.objects.create(
+            user=self.customer,
+            address="Contested",
+            date="2026-01-01",
+            time_slot="10:00-12:00",
+            status="open",
+        )
+
+    def test_exactly_one_vendor_wins(self):
+        """N vendors racing on one pickup produce one 200 and N-1 409s."""
+        barrier = threading.Barrier(len(self.vendors))
+        results = []
+
+        def race(vendor):
+            client = APIClient()
+            client.force_authenticate(vendor)
+            try:
+                barrier.wait()
+                response = client.post(f"/api/pickup/accept/{self.pickup.id}/")
+                results.append((vendor.id, response.status_code))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=race, args=(v,)) for v in self.vendors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = [vendor_id for vendor_id, code in results if code == status.HTTP_200_OK]
+        self.assertEqual(len(results), len(self.vendors))
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(
+            sorted(code for _, code in results),
+            [status.HTTP_200_OK] + [status.HTTP_409_CONFLICT] * (len(self.vendors) - 1),
+        )
+        self.pickup.refresh_from_db()
+        self.assertEqual(self.pickup.status, "vendor_accepted")
+        self.assertEqual(self.pickup.assigned_to_id, winners[0])
+
+    def test_missing_pickup(self):
+        client = APIClient()
+        client.force_authenticate(self.vendors[0])
+        response = client.post("/api/pickup/accept/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PickupStateMachineTests(PickupAPITestCase):
+    def test_transition_only_moves_rows_in_a_source_state(self):
+        """A guarded UPDATE skips rows that are not in a source status."""
+        pending = self.make_pickup(status="pending")
+        scheduled = self.make_pickup(status="scheduled")
+        moved = PickupRequest.objects.filter(
+            id__in=[pending.id, scheduled.id]
+        ).transition("cancel")
+        self.assertEqual(moved, 1)
+        pending.refresh_from_db()
+        scheduled.refresh_from_db()
+        self.assertEqual(pending.status, "cancelled")
+        self.assertEqual(scheduled.status, "scheduled")
+
+    def test_transition_writes_only_changed_columns(self):
+        """The UPDATE sets status, updated_at and the transition's own columns."""
+        pickup = self.make_pickup(status="vendor_accepted", assigned_to=self.vendor)
+        with CaptureQueriesContext(connection) as ctx:
+            PickupRequest.objects.filter(id=pickup.id).transition("release")
+        sql = ctx.captured_queries[0]["sql"]
+        set_clause = sql.split(" SET ")[1].split(" WHERE ")[0]
+        self.assertEqual(
+            sorted(part.split("=")[0].strip().strip('"') for part in set_clause.split(",")),
+            ["assigned_to_id", "status", "updated_at"],
+        )
+
+    def test_bulk_transition_without_loading_rows(self):
+        """
+        A sweep over many rows is a single UPDATE, plus one INSERT ... SELECT
+        of pool tombstones when rows leave the pool.
+        """
+        for _ in range(10):
+            self.make_pickup(status="pending", date="2020-01-01")
+        with self.assertNumQueries(1):
+            moved = PickupRequest.objects.filter(date__lt="2021-01-01").transition("cancel")
+        self.assertEqual(moved, 10)
+
+        for _ in range(10):
+            self.make_pickup(status="open", date="2020-01-01")
+        with CaptureQueriesContext(connection) as ctx:
+            moved = PickupRequest.objects.filter(date__lt="2021-01-01").transition("expire")
+        self.assertEqual(moved, 10)
+        statements = [q["sql"].split()[0] for q in ctx.captured_queries]
+        self.assertEqual(
+            [s for s in statements if s not in ("SAVEPOINT", "RELEASE")], ["UPDATE", "INSERT"]
+        )
+        self.assertEqual(PoolTombstone.objects.count(), 10)
+
+    def test_unknown_transition(self):
+        with self.assertRaises(ValueError):
+            PickupRequest.objects.transition("teleport")
+
+    def test_expire_command(self):
+        old = self.make_pickup(status="open", date="2020-01-01")
+        future = self.make_pickup(status="open", date="2999-01-01")
+        call_command("expire_pickups", stdout=StringIO())
+        old.refresh_from_db()
+        future.refresh_from_db()
+        self.assertEqual(old.status, "cancelled")
+        self.assertEqual(future.status, "open")
+
+    def test_views_report_invalid_and_missing(self):
+        """Views distinguish a wrong status (400) from a missing row (404)."""
+        pickup = self.make_pickup(status="scheduled", assigned_to=self.vendor)
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(f"/api/pickup/cancel/{pickup.id}/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(f"/api/pickup/approve/{pickup.id}/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post("/api/pickup/cancel/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_offer_acceptance_is_single_shot(self):
+        """A pending offer can only be accepted once."""
+        pickup = self.make_pickup(status="vendor_accepted", assigned_to=self.vendor)
+        offer = ChatMessage.objects.create(
+            pickup_request=pickup,
+            sender=self.vendor,
+            message="Offer",
+            is_offer=True,
+            offer_amount="250.00",
+        )
+        self.client.force_authenticate(self.customer)
+        first = self.client.post(f"/api/pickup/offer/{offer.id}/accept/")
+        second = self.client.post(f"/api/pickup/offer/{offer.id}/accept/")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        pickup.refresh_from_db()
+        self.assertEqual(pickup.status, "scheduled")
+        self.assertEqual(str(pickup.estimated_price), "250.00")
+
+
+class ChatDeltaSyncTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pickup = self.make_pickup(status="vendor_accepted", assigned_to=self.vendor)
+        self.url = f"/api/pickup/chat/{self.pickup.id}/"
+        self.first = ChatMessage.objects.create(
+            pickup_request=self.pickup, sender=self.customer, message="hello"
+        )
+
+    def test_post_with_a_bearer_token(self):
+        # From the second request on, the sender comes from the auth cache.
+        self.vendor.full_name = "Vendor One"
+        self.vendor.save(update_fields=["full_name"])
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.vendor)}")
+        for text in ("one", "two"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, {"message": text})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["message"], text)
+            self.assertEqual(response.data["sender_name"], "Vendor One")
+            self.assertEqual(response.data["sender_email"], self.vendor.email)
+
+    def test_after_id_returns_only_new_messages(self):
+        second = ChatMessage.objects.create(
+            pickup_request=self.pickup, sender=self.vendor, message="hi"
+        )
+        response = self.client.get(self.url, {"after_id": self.first.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m["id"] for m in response.data], [second.id])
+
+        response = self.client.get(self.url, {"after_id": second.id})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_since_picks_up_offer_status_changes(self):
+        offer = ChatMessage.objects.create(
+            pickup_request=self.pickup,
+            sender=self.vendor,
+            message="Offer",
+            is_offer=True,
+            offer_amount="100.00",
+        )
+        since = self.client.get(self.url).data[-1]["updated_at"]
+        # Past the look-back window.
+        ChatMessage.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(
+            self.client.get(self.url, {"since": since}).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        self.client.force_authenticate(self.customer)
+        self.client.post(f"/api/pickup/offer/{offer.id}/reject/")
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changed = {m["id"]: m for m in response.data}
+        self.assertNotIn(self.first.id, changed)
+        self.assertEqual(changed[offer.id]["offer_status"], "rejected")
+
+    def test_since_catches_late_commits(self):
+        since = timezone.now()
+        # Stamped before the client's last poll, committed after it.
+        late = ChatMessage.objects.create(
+            pickup_request=self.pickup, sender=self.vendor, message="late"
+        )
+        ChatMessage.objects.filter(id=late.id).update(updated_at=since - timedelta(seconds=2))
+        ChatMessage.objects.filter(id=self.first.id).update(
+            updated_at=since - timedelta(seconds=settings.CHAT_SYNC_SETTLE + 1)
+        )
+        response = self.client.get(self.url, {"since": since.isoformat()})
+        self.assertEqual([m["id"] for m in response.data], [late.id])
+        # Naive values are UTC.
+        response = self.client.get(self.url, {"since": since.replace(tzinfo=None).isoformat()})
+        self.assertEqual([m["id"] for m in response.data], [late.id])
+
+    def test_invalid_delta_params(self):
+        self.assertEqual(
+            self.client.get(self.url, {"after_id": "x"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        for since in ("yesterday", "2026-13-18T00:00:00Z"):
+            self.assertEqual(
+                self.client.get(self.url, {"since": since}).status_code,
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class ChatStreamTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pickup = self.make_pickup(status="vendor_accepted", assigned_to=self.vendor)
+        self.url = f"/api/pickup/chat/{self.pickup.id}/stream/"
+        self.token = str(AccessToken.for_user(self.customer))
+
+    def send(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ChatMessage.objects.create(
+                pickup_request=self.pickup, sender=self.vendor, **fields
+            )
+
+    def reject(self, offer):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.customer)
+            return self.client.post(f"/api/pickup/offer/{offer.id}/reject/")
+
+    def ticket(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.post(f"{self.url}ticket/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["ticket"]
+
+    async def next_event(self, events):
+        chunk = await asyncio.wait_for(anext(events), 5)
+        fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+        return fields["event"], json.loads(fields["data"])
+
+    async def test_pushes_messages_and_offer_changes(self):
+        ticket = await sync_to_async(self.ticket)(self.customer)
+        response = await self.async_client.get(self.url, {"ticket": ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+        # Subscribed once the retry hint has been sent.
+        self.assertEqual(await anext(events), b"retry: 3000\n\n")
+
+        offer = await sync_to_async(self.send)(
+            message="Offer", is_offer=True, offer_amount="120.00"
+        )
+        event, data = await self.next_event(events)
+        self.assertEqual((event, data["id"], data["offer_status"]), ("message", offer.id, "pending"))
+
+        await sync_to_async(self.reject)(offer)
+        received = [await self.next_event(events) for _ in range(2)]
+        changed = {data["id"]: data for _, data in received}
+        self.assertEqual(changed[offer.id]["offer_status"], "rejected")
+        await events.aclose()
+
+    async def test_requires_a_participant_token(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(self.url, headers={"Authorization": "Bearer garbage"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Access tokens are no longer taken from the URL.
+        response = await self.async_client.get(self.url, {"token": self.token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        outsider = await sync_to_async(User.objects.create_user)(email="outsider@example.com")
+        token = str(AccessToken.for_user(outsider))
+        response = await self.async_client.get(self.url, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(outsider)
+        response = await sync_to_async(self.client.post)(f"{self.url}ticket/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_tickets_are_single_use_and_per_pickup(self):
+        ticket = await sync_to_async(self.ticket)(self.customer)
+        other = await sync_to_async(self.make_pickup)(status="vendor_accepted", assigned_to=self.vendor)
+        response = await self.async_client.get(
+            f"/api/pickup/chat/{other.id}/stream/", {"ticket": ticket}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Spent by the failed attempt above.
+        response = await self.async_client.get(self.url, {"ticket": ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_not_available_under_wsgi(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+class UnreadCounterTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pickup = self.make_pickup(status="vendor_accepted", assigned_to=self.vendor)
+        self.other = self.make_pickup(status="scheduled", assigned_to=self.vendor)
+        self.make_pickup(status="open")
+
+    def send(self, sender, pickup=None):
+        self.client.force_authenticate(sender)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/pickup/chat/{(pickup or self.pickup).id}/", {"message": "hi"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def unread(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/pickup/chat/unread/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counts_follow_new_messages_and_reads(self):
+        self.send(self.vendor)
+        self.assertEqual(
+            self.unread(self.customer), {str(self.pickup.id): 1, str(self.other.id): 0}
+        )
+        # Counters are now cached and kept up to date without a recount.
+        upto = self.send(self.vendor)
+        self.send(self.vendor, self.other)
+        self.send(self.customer)
+        with self.assertNumQueries(1):
+            counts = self.unread(self.customer)
+        self.assertEqual(counts, {str(self.pickup.id): 2, str(self.other.id): 1})
+        self.assertEqual(self.unread(self.vendor)[str(self.pickup.id)], 1)
+
+        self.send(self.vendor)
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(
+            f"/api/pickup/chat/{self.pickup.id}/read/", {"up_to": upto}
+        )
+        self.assertEqual(response.data, {"marked": 2})
+        self.assertEqual(self.unread(self.customer)[str(self.pickup.id)], 1)
+        # The vendor's own messages were left alone.
+        self.assertEqual(self.unread(self.vendor)[str(self.pickup.id)], 1)
+
+    def test_mark_read_is_one_update(self):
+        for _ in range(5):
+            self.send(self.vendor)
+        self.client.force_authenticate(self.customer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/api/pickup/chat/{self.pickup.id}/read/")
+        self.assertEqual(response.data, {"marked": 5})
+        updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(
+            ChatMessage.objects.filter(pickup_request=self.pickup, is_read=False).exists()
+        )
+
+    def test_mark_read_checks_access(self):
+        outsider = User.objects.create_user(email="outsider@example.com")
+        self.client.force_authenticate(outsider)
+        response = self.client.post(f"/api/pickup/chat/{self.pickup.id}/read/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(
+            f"/api/pickup/chat/{self.pickup.id}/read/", {"up_to": "x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FakeVerifyHandler(BaseHTTPRequestHandler):
+    """
+    Twilio Verify stand-in; behaviour is set on the server object. ``fail``
+    is True for 503s, or "html" for a 200 with a page that is not JSON.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server.calls.append((self.path, parse_qs(body.decode()), self.client_address[1]))
+        time.sleep(server.delay)
+        if server.fail == "html":
+            payload, code = b"<html>Gateway login</html>", 200
+        elif server.fail:
+            payload, code = b'{"message": "unavailable"}', 503
+        elif self.path.endswith("/VerificationCheck"):
+            approved = parse_qs(body.decode())["Code"] == ["123456"]
+            payload, code = json.dumps({"status": "approved" if approved else "pending"}).encode(), 200
+        else:
+            payload, code = b'{"status": "pending"}', 201
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class OTPProviderClientTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeVerifyHandler)
+        self.server.calls, self.server.delay, self.server.fail = [], 0, False
+        # Answers to calls that already timed out hit a closed socket.
+        self.server.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.now = 0.0
+        self.service = OTPService(
+            account_sid="AC123",
+            auth_token="secret",
+            verify_sid="VA123",
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v2",
+            timeout=(0.5, 0.2),
+            breaker=CircuitBreaker(
+                "test", failure_threshold=3, reset_timeout=30, clock=lambda: self.now
+            ),
+        )
+        self.addCleanup(self.service.session.close)
+
+        # The fallbacks log a warning per failed call.
+        otp_logger = logging.getLogger("app.services.otp_service")
+        otp_logger.disabled = True
+        self.addCleanup(setattr, otp_logger, "disabled", False)
+
+    def test_send_and_verify_reuse_one_connection(self):
+        self.assertEqual(self.service.send_otp("9876543210"), "pending")
+        self.assertTrue(self.service.verify_otp("9876543210", "123456"))
+        self.assertFalse(self.service.verify_otp("9876543210", "000000"))
+
+        paths = [path for path, _, _ in self.server.calls]
+        self.assertEqual(
+            paths,
+            ["/v2/Services/VA123/Verifications"] + ["/v2/Services/VA123/VerificationCheck"] * 2,
+        )
+        self.assertEqual(self.server.calls[0][1], {"To": ["+919876543210"], "Channel": ["sms"]})
+        # Same client port for every call: the keep-alive connection was reused.
+        self.assertEqual(len({port for _, _, port in self.server.calls}), 1)
+
+    def test_slow_provider_hits_the_read_timeout(self):
+        self.server.delay = 1
+        started = time.monotonic()
+        self.assertFalse(self.service.verify_otp("9876543210", "123456"))
+        # Falls back to a locally generated code, as when Verify is not set up.
+        self.assertRegex(self.service.send_otp("9876543210"), r"^\d{6}$")
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_breaker_fails_fast_and_recovers(self):
+        self.server.fail = True
+        for _ in range(3):
+            self.assertFalse(self.service.verify_otp("9876543210", "123456"))
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.OPEN)
+
+        self.assertFalse(self.service.verify_otp("9876543210", "123456"))
+        self.assertEqual(len(self.server.calls), 3)
+
+        # After the reset timeout one trial call goes through and closes it.
+        self.server.fail = False
+        self.now += 30
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.service.verify_otp("9876543210", "123456"))
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.server.calls), 4)
+
+    def test_failed_trial_reopens(self):
+        self.server.fail = True
+        for _ in range(3):
+            self.service.send_otp("9876543210")
+        self.now += 30
+        self.service.send_otp("9876543210")
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(len(self.server.calls), 4)
+
+    def test_answers_that_are_not_json(self):
+        self.server.fail = "html"
+        self.assertFalse(self.service.verify_otp("9876543210", "123456"))
+        self.assertRegex(self.service.send_otp("9876543210"), r"^\d{6}$")
+        with self.assertRaises(OTPProviderError):
+            self.service.start_verification("9876543210")
+
+    async def test_async_answers_that_are_not_json(self):
+        self.server.fail = "html"
+        self.assertFalse(await self.service.averify_otp("9876543210", "123456"))
+        self.assertRegex(await self.service.asend_otp("9876543210"), r"^\d{6}$")
+        with self.assertRaises(OTPProviderError):
+            await self.service.astart_verification("9876543210")
+
+    async def test_async_calls_share_the_worker_pool(self):
+        await self.service.aopen()
+        try:
+            self.assertEqual(await self.service.asend_otp("9876543210"), "pending")
+            self.assertTrue(await self.service.averify_otp("9876543210", "123456"))
+            self.assertFalse(await self.service.averify_otp("9876543210", "000000"))
+        finally:
+            await self.service.aclose()
+        self.assertEqual(self.server.calls[0][1], {"To": ["+919876543210"], "Channel": ["sms"]})
+        self.assertEqual(len({port for _, _, port in self.server.calls}), 1)
+
+    async def test_async_failures_trip_the_breaker(self):
+        self.server.delay = 1
+        started = time.monotonic()
+        self.assertFalse(await self.service.averify_otp("9876543210", "123456"))
+        self.assertLess(time.monotonic() - started, 1.5)
+
+        self.server.delay, self.server.fail = 0, True
+        for _ in range(2):
+            self.assertRegex(await self.service.asend_otp("9876543210"), r"^\d{6}$")
+        self.assertEqual(self.service.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(await self.service.averify_otp("9876543210", "123456"))
+        self.assertEqual(len(self.server.calls), 3)
+
+
+job_calls = []
+
+
+@jobs.task("test_record")
+def record_task(value, fail=False):
+    job_calls.append(value)
+    if fail:
+        raise RuntimeError(f"boom {value}")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        job_calls.clear()
+
+    def test_worker_runs_and_removes_jobs(self):
+        jobs.enqueue("test_record", value=1)
+        jobs.enqueue("test_record", value=2)
+        out = StringIO()
+        with override_settings(ALLOW_LOCAL_BROKER=True, ALLOW_LOCAL_CACHE=True):
+            call_command("run_worker", "--once", stdout=out)
+        self.assertEqual(job_calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+        self.assertIn("Processed 2 job(s)", out.getvalue())
+
+    def test_worker_requires_a_shared_cache(self):
+        # It invalidates the open-pool feed the servers cache.
+        with override_settings(ALLOW_LOCAL_BROKER=True, ALLOW_LOCAL_CACHE=False):
+            with self.assertRaises(ImproperlyConfigured):
+                call_command("run_worker", "--once", stdout=StringIO())
+
+    def start_worker(self):
+        """Starts run_worker with an empty queue and stops it at its first sleep."""
+        command = run_worker.Command()
+
+        def stop(seconds):
+            command.stopping = True
+
+        out = StringIO()
+        with override_settings(ALLOW_LOCAL_BROKER=True, ALLOW_LOCAL_CACHE=True), \
+                mock.patch.object(jobs, "run_pending", return_value=0), \
+                mock.patch.object(run_worker.time, "sleep", side_effect=stop):
+            call_command(command, stdout=out)
+        return out.getvalue()
+
+    def test_worker_queues_recurring_jobs_once(self):
+        self.start_worker()
+        self.start_worker()
+        self.assertEqual(
+            sorted(Job.objects.values_list("task", flat=True)),
+            sorted(jobs.recurring_tasks()),
+        )
+
+    def test_scheduling_failures_do_not_stop_the_worker(self):
+        schedule = jobs.schedule
+
+        def flaky(name):
+            if name == "prune_tokens":
+                raise DatabaseError("db down")
+            return schedule(name)
+
+        with mock.patch.object(jobs, "schedule", side_effect=flaky), \
+                self.assertLogs("app.management.commands.run_worker", "ERROR"):
+            out = self.start_worker()
+        self.assertIn("Processed 0 job(s).", out)
+        self.assertFalse(Job.objects.filter(task="prune_tokens").exists())
+        self.assertTrue(Job.objects.filter(task="collect_blobs").exists())
+
+    def test_failures_back_off_then_dead_letter(self):
+        job = jobs.enqueue("test_record", max_attempts=2, value=3, fail=True)
+        with self.assertLogs("app.services.jobs", "WARNING"):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("boom 3", job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        # Not due yet.
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs("app.services.jobs", "ERROR"):
+            self.assertEqual(jobs.run_pending(), 1)
+        self.assertFalse(Job.objects.exists())
+        dead = DeadLetterJob.objects.get()
+        self.assertEqual((dead.task, dead.payload["value"], dead.attempts), ("test_record", 3, 2))
+        self.assertEqual(job_calls, [3, 3])
+
+    def test_claimed_jobs_are_leased(self):
+        jobs.enqueue("test_record", value=4)
+        claimed = jobs.claim()
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(jobs.claim(), [])
+        # A worker that died leaves the job to be picked up after the lease.
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual([job.id for job in jobs.claim()], [claimed[0].id])
+
+    def test_unknown_task(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_task")
+
+
+class QueuedOTPTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Nothing listens on port 9: an inline send would fail the test.
+        service = OTPService(
+            account_sid="AC123", auth_token="secret", verify_sid="VA123",
+            base_url="http://127.0.0.1:9/v2",
+        )
+        patcher = mock.patch("app.views.get_otp_service", return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_send_otp_is_queued(self):
+        response = self.client.post("/api/otp/send/", {"contact": "9876543210"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "queued")
+        job = Job.objects.get()
+        self.assertEqual(
+            (job.task, job.payload), ("send_otp", {"contact": "9876543210", "channel": "sms"})
+        )
+
+    def test_contact_info_queues_the_send(self):
+        pickup = self.make_pickup(status="pending")
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(
+            "/api/pickup/contact/",
+            {"request_id": pickup.id, "contact_name": "A", "contact_phone": "9876543210"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["mock_otp"])
+        self.assertEqual(Job.objects.get().payload["contact"], "9876543210")
+
+
+class AsyncOTPViewTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeVerifyHandler)
+        self.server.calls, self.server.delay, self.server.fail = [], 0.3, False
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        service = OTPService(
+            account_sid="AC123",
+            auth_token="secret",
+            verify_sid="VA123",
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v2",
+        )
+        self.addCleanup(service.session.close)
+        patcher = mock.patch("app.views.get_otp_service", return_value=service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_provider_waits_overlap(self):
+        started = time.monotonic()
+        responses = await asyncio.gather(*(
+            self.async_client.post(
+                "/api/otp/verify/",
+                {"contact": f"98765432{i:02d}", "otp": "123456"},
+                content_type="application/json",
+            )
+            for i in range(5)
+        ))
+        self.assertEqual([r.status_code for r in responses], [status.HTTP_200_OK] * 5)
+        self.assertEqual(len(self.server.calls), 5)
+        # One provider round trip takes 0.3 s; one after another would take 1.5 s.
+        self.assertLess(time.monotonic() - started, 1.2)
+
+    def test_verify_account(self):
+        self.customer.phone_number = "9876543210"
+        self.customer.save(update_fields=["phone_number"])
+        self.client.force_authenticate(self.customer)
+
+        response = self.client.post("/api/account/verify/", {"otp": "000000"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post("/api/account/verify/", {"otp": "123456"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["user"]["is_phone_verified"])
+        self.customer.refresh_from_db()
+        self.assertTrue(self.customer.is_phone_verified and self.customer.is_email_verified)
+
+    def test_verify_account_with_a_cached_user(self):
+        self.customer.phone_number = "9876543210"
+        self.customer.save(update_fields=["phone_number"])
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.customer)}")
+        self.client.post("/api/account/verify/", {"otp": "000000"})  # fills the auth cache
+
+        response = self.client.post("/api/account/verify/", {"otp": "123456"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["email"], self.customer.email)
+        self.assertEqual(self.server.calls[-1][1]["To"], ["+919876543210"])
+
+    def test_checks_run_before_the_handler(self):
+        self.client.force_authenticate(None)
+        response = self.client.post("/api/account/verify/", {"otp": "123456"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get("/api/otp/verify/")
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(self.server.calls, [])
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            "otp_send_contact": "3/hour",
+            "otp_send_ip": "5/hour",
+            "otp_verify_contact": "4/hour",
+            "otp_verify_ip": "100/hour",
+        },
+    }
+)
+class OTPThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def send(self, contact, ip="10.0.0.1"):
+        return self.client.post("/api/otp/send/", {"contact": contact}, REMOTE_ADDR=ip)
+
+    def test_send_is_limited_per_contact_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.send("9876543210").status_code, status.HTTP_200_OK)
+        response = self.send("9876543210", ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 3600)
+        # Other contacts are unaffected.
+        self.assertEqual(self.send("9999999999", ip="10.0.0.2").status_code, status.HTTP_200_OK)
+
+    def test_send_is_limited_per_ip(self):
+        for i in range(5):
+            self.assertEqual(self.send(f"90000000{i:02d}").status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.send("9000000099").status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def test_forwarded_for_does_not_reset_the_ip_limit(self):
+        for i in range(6):
+            response = self.client.post(
+                "/api/otp/send/", {"contact": f"90000000{i:02d}"},
+                REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}",
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_contact_spellings_share_a_limit(self):
+        for i, contact in enumerate(("9876543210", "+919876543210", " 98765-43210 ")):
+            self.assertEqual(self.send(contact, ip=f"10.0.1.{i}").status_code, status.HTTP_200_OK)
+        response = self.send("(98765) 43210", ip="10.0.1.9")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        for i, contact in enumerate(("a@example.com", "A@Example.com", " a@EXAMPLE.com")):
+            self.assertEqual(self.send(contact, ip=f"10.0.2.{i}").status_code, status.HTTP_200_OK)
+        response = self.send("A@EXAMPLE.COM", ip="10.0.2.9")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_pickup_otp_attempts_are_limited_per_pickup(self):
+        customer = User.objects.create_user(email="customer@example.com")
+        pickup = PickupRequest.objects.create(
+            user=customer, address="A", date="2026-01-01", time_slot="10:00-12:00",
+        )
+        otp_store.issue(pickup.id, "9876543210", code="123456")
+        for guess in range(4):
+            response = self.client.post(
+                "/api/pickup/verify-otp/", {"request_id": pickup.id, "otp": f"00000{guess}"}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            "/api/pickup/verify-otp/", {"request_id": pickup.id, "otp": "123456"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_limit_holds_under_concurrent_workers(self):
+        """Exactly ``limit`` of many simultaneous requests get through."""
+        factory = APIRequestFactory()
+        view = async_to_sync(SendOTPView.as_view())
+        barrier = threading.Barrier(16)
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            barrier.wait()
+            codes = []
+            for _ in range(5):
+                request = factory.post(
+                    "/api/otp/send/", {"contact": "9876543210"}, REMOTE_ADDR="10.9.9.9"
+                )
+                codes.append(view(request).status_code)
+            with lock:
+                results.extend(codes)
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(status.HTTP_200_OK), 3)
+        self.assertEqual(results.count(status.HTTP_429_TOO_MANY_REQUESTS), 77)
+
+
+class PickupOTPStoreTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.pickup = self.make_pickup(status="pending")
+        self.client.force_authenticate(self.customer)
+
+    def send_contact(self):
+        response = self.client.post(
+            "/api/pickup/contact/",
+            {"request_id": self.pickup.id, "contact_name": "A", "contact_phone": "9876543210"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["mock_otp"]
+
+    def verify(self, otp):
+        return self.client.post(
+            "/api/pickup/verify-otp/", {"request_id": self.pickup.id, "otp": otp}
+        )
+
+    def test_code_lives_in_cache_and_verification_is_one_query(self):
+        code = self.send_contact()
+        self.pickup.refresh_from_db()
+        self.assertEqual(self.pickup.contact_phone, "9876543210")
+        self.assertIsNone(self.pickup.otp_code)
+
+        with self.assertNumQueries(1):
+            response = self.verify(code)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.pickup.refresh_from_db()
+        self.assertEqual(self.pickup.status, "open")
+
+        # Used up.
+        self.assertEqual(self.verify(code).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_code_is_burned_after_max_attempts(self):
+        code = self.send_contact()
+        wrong = "000000" if code != "000000" else "111111"
+        for _ in range(settings.PICKUP_OTP_MAX_ATTEMPTS):
+            self.assertEqual(self.verify(wrong).data["error"], "Invalid OTP")
+        response = self.verify(code)
+        self.assertEqual(response.data["error"], "OTP expired or not requested")
+
+        # A new code can be requested.
+        self.assertEqual(self.verify(self.send_contact()).status_code, status.HTTP_200_OK)
+
+    def test_unknown_pickup(self):
+        response = self.client.post(
+            "/api/pickup/contact/",
+            {"request_id": 999999, "contact_name": "A", "contact_phone": "9876543210"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post("/api/pickup/verify-otp/", {"request_id": 999999, "otp": "1"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_servers_require_a_shared_cache(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=locmem, DEBUG=False, ALLOW_LOCAL_CACHE=False):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared_cache()
+        with override_settings(CACHES=locmem, DEBUG=False, ALLOW_LOCAL_CACHE=True):
+            require_shared_cache()
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with override_settings(CACHES=redis, DEBUG=False, ALLOW_LOCAL_CACHE=False):
+            require_shared_cache()
+
+    def test_servers_require_a_shared_chat_broker(self):
+        in_process = "app.services.chat_events.InProcessBroker"
+        with override_settings(CHAT_BROKER=in_process, DEBUG=False, ALLOW_LOCAL_BROKER=False):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared_broker()
+            with self.assertRaises(ImproperlyConfigured):
+                call_command("run_worker", "--once", stdout=StringIO())
+        with override_settings(CHAT_BROKER="app.services.chat_events.RedisBroker", DEBUG=False):
+            require_shared_broker()
+
+
+class CachedAuthenticationTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        token = AccessToken.for_user(self.vendor)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_repeat_requests_skip_the_user_lookup(self):
+        self.make_pickup()
+        self.assertEqual(self.client.get("/api/pickup/available/").status_code, 200)
+        # User and feed both cached: no queries at all.
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/pickup/available/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.client.get("/api/pickup/available/")
+        self.vendor.is_seller = False
+        self.vendor.save(update_fields=["is_seller"])
+        response = self.client.get("/api/pickup/available/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get("/api/pickup/available/")
+        self.vendor.delete()
+        response = self.client.get("/api/pickup/available/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_holds_only_what_views_read(self):
+        self.client.get("/api/pickup/available/")
+        cached = cache.get(user_cache_key(self.vendor.id))
+        self.assertEqual(set(cached), set(CACHED_USER_FIELDS))
+        self.assertEqual(cached["id"], self.vendor.id)
+
+        user = CachedJWTAuthentication().get_user(AccessToken.for_user(self.vendor))
+        self.assertEqual((user.pk, user.is_seller, user.is_client), (self.vendor.pk, True, False))
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertNotIn(self.vendor.password, cached.values())
+        # Other fields still work, loaded on first use.
+        self.assertEqual(user.phone_number, self.vendor.phone_number)
+
+    async def test_async_views_can_read_cached_fields(self):
+        token = AccessToken.for_user(self.vendor)
+        await sync_to_async(CachedJWTAuthentication().get_user)(token)
+        user = CachedJWTAuthentication().get_user(token)  # from the cache, no query
+        self.assertEqual(
+            (user.email, user.full_name, user.is_seller),
+            (self.vendor.email, self.vendor.full_name, True),
+        )
+
+
+class TokenPruningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="refresh@example.com", password="x")
+        now = timezone.now()
+        for i in range(7):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f"old-{i}", token="x", expires_at=now - timedelta(hours=1)
+            )
+            BlacklistedToken.objects.create(token=token)
+        self.live = OutstandingToken.objects.create(
+            user=self.user, jti="live", token="x", expires_at=now + timedelta(hours=1)
+        )
+        BlacklistedToken.objects.create(token=self.live)
+
+    def test_prunes_only_expired_tokens_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            removed = tokens.prune_expired(batch_size=3)
+        self.assertEqual(removed, 7)
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"])
+        self.assertEqual(BlacklistedToken.objects.get().token_id, self.live.id)
+        deletes = [q for q in queries.captured_queries if q["sql"].startswith("DELETE")]
+        # Three batches (3 + 3 + 1), two statements each.
+        self.assertEqual(len(deletes), 6)
+
+    def test_max_batches_bounds_one_run(self):
+        self.assertEqual(tokens.prune_expired(batch_size=3, max_batches=1), 3)
+
+    def test_refresh_still_rejects_blacklisted_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        client = APIClient()
+        first = client.post("/api/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        tokens.prune_expired()
+        again = client.post("/api/token/refresh/", {"refresh": str(refresh)}, format="json")
+        self.assertEqual(again.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_recurring_job(self):
+        out = StringIO()
+        call_command("prune_tokens", "--schedule", stdout=out)
+        call_command("prune_tokens", "--schedule", stdout=out)
+        self.assertEqual(Job.objects.filter(task="prune_tokens").count(), 1)
+
+        jobs.run_pending()
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        # The job queued its next run.
+        next_run = Job.objects.get(task="prune_tokens")
+        self.assertGreater(next_run.run_at, timezone.now())
+
+    def test_recurring_job_reschedules_after_a_failure(self):
+        call_command("prune_tokens", "--schedule", stdout=StringIO())
+        with mock.patch.object(tokens, "prune_expired", side_effect=RuntimeError("db down")):
+            with self.assertLogs("app.services.jobs", "ERROR"):
+                jobs.run_pending()
+        # The failed run is dead-lettered rather than retried, and exactly
+        # one next run is queued.
+        self.assertEqual(DeadLetterJob.objects.get().task, "prune_tokens")
+        next_run = Job.objects.get(task="prune_tokens")
+        self.assertGreater(next_run.run_at, timezone.now())
+
+
+class FastSerializationTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor.full_name = "Vendor One"
+        self.vendor.phone_number = "9876543210"
+        self.vendor.save()
+        self.request = Request(APIRequestFactory().get("/api/pickup/list/"))
+        self.make_pickup(
+            12.97, 77.59,
+            quantity="12.50", estimated_price="300.00",
+            scrape_image="pickup_images/bottles.jpg", contact_name="Añita \u2028",
+        )
+        self.make_pickup(
+            assigned_to=self.vendor, status="vendor_accepted", quantity="3",
+        )
+
+    def assertSameOutput(self, queryset):
+        context = {"request": self.request}
+        full = PickupRequestSerializer(queryset, many=True, context=context).data
+        fast = PickupRequestListSerializer(
+            queryset.list_rows(), many=True, context=context
+        ).data
+        self.assertEqual(fast, full)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(full))
+
+    def test_list_rows_match_model_serializer(self):
+        self.assertSameOutput(PickupRequest.objects.order_by("id"))
+
+    def test_vendor_fields_match_model_serializer(self):
+        # Also a vendor without a name or phone, and each field on its own.
+        other = User.objects.create_user(email="blank@example.com", is_seller=True)
+        self.make_pickup(assigned_to=other, status="vendor_accepted")
+        queryset = PickupRequest.objects.order_by("id")
+        self.assertSameOutput(queryset)
+        context = {"request": self.request}
+        expected = {"vendor_name": [None, "Vendor One", ""], "vendor_phone": [None, "9876543210", ""]}
+        for name, values in expected.items():
+            fields = ["id", name]
+            full = PickupRequestSerializer(
+                PickupRequestSerializer.narrow_queryset(queryset, fields),
+                many=True, context=context, fields=fields,
+            ).data
+            fast = PickupRequestListSerializer(
+                queryset.list_rows(fields), many=True, context=context, fields=fields
+            ).data
+            self.assertEqual(fast, full)
+            self.assertEqual([row[name] for row in fast], values)
+
+    def test_list_rows_carry_distance(self):
+        nearby = PickupRequest.objects.nearby(12.97, 77.59, 5).order_by("id")
+        self.assertSameOutput(nearby)
+        self.assertIn("distance_km", nearby.list_rows()[0])
+
+    def test_renderer_matches_stdlib(self):
+        data = {
+            "results": list(PickupRequestSerializer(
+                PickupRequest.objects.all(), many=True, context={"request": self.request}
+            ).data),
+            "at": timezone.now(),
+            "errors": {0: ["bad"]},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+        indented = FastJSONRenderer().render(data, "application/json; indent=2")
+        self.assertEqual(indented, JSONRenderer().render(data, "application/json; indent=2"))
+
+    def test_parser(self):
+        parsed = FastJSONParser().parse(BytesIO('{"name": "Añita"}'.encode()))
+        self.assertEqual(parsed, {"name": "Añita"})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b"{nope"))
+
+    def test_falls_back_without_orjson(self):
+        data = {"price": PickupRequest.objects.values_list("quantity", flat=True)[0]}
+        with mock.patch("app.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_list_endpoints(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get("/api/pickup/list/")
+        self.assertEqual(response["Content-Type"], "application/json")
+        results = json.loads(response.content)["results"]
+        self.assertEqual(
+            [row["vendor_name"] for row in results], ["Vendor One", None]
+        )
+        self.assertEqual(results[1]["scrape_image"], "http://testserver/media/pickup_images/bottles.jpg")
+
+
+class SparseFieldsetTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.customer)
+        self.pickups = [
+            self.make_pickup(assigned_to=self.vendor, status="vendor_accepted")
+            for _ in range(3)
+        ]
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data, ctx.captured_queries[-1]["sql"]
+
+    def test_pickup_list_narrows_output_and_columns(self):
+        data, sql = self.get("/api/pickup/list/", fields="id,status,updated_at")
+        self.assertEqual(set(data["results"][0]), {"id", "status", "updated_at"})
+        self.assertNotIn("address", sql)
+        self.assertNotIn("JOIN", sql)
+
+        data, sql = self.get("/api/pickup/list/", fields="vendor_name")
+        self.assertEqual(data["results"][0], {"vendor_name": self.vendor.full_name})
+        self.assertIn("JOIN", sql)
+
+    def test_cursor_still_works(self):
+        data, _ = self.get("/api/pickup/list/", fields="id", page_size=2)
+        self.assertEqual(data["results"], [{"id": p.id} for p in self.pickups[:0:-1]])
+        data = self.client.get(data["next"]).data
+        self.assertEqual(data["results"], [{"id": self.pickups[0].id}])
+
+    def test_vendor_and_pool_lists(self):
+        self.client.force_authenticate(self.vendor)
+        data, _ = self.get("/api/pickup/vendor-list/", fields="id,vendor_phone")
+        self.assertEqual(set(data["results"][0]), {"id", "vendor_phone"})
+
+        self.make_pickup(12.97, 77.59)
+        data, _ = self.get("/api/pickup/available/", fields="status", lat=12.97, lng=77.59)
+        self.assertEqual(data["results"], [{"status": "open"}])
+        data, _ = self.get("/api/pickup/available/", fields="distance_km", lat=12.97, lng=77.59)
+        self.assertEqual(set(data["results"][0]), {"distance_km"})
+
+    def test_full_payload_without_fields(self):
+        data, _ = self.get("/api/pickup/list/")
+        self.assertEqual(list(data["results"][0]), PickupRequestSerializer.Meta.fields[:-1])
+
+    def test_unknown_field(self):
+        response = self.client.get("/api/pickup/list/", {"fields": "id,otp_code"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"error": "Unknown fields: otp_code"})
+        response = self.client.get("/api/pickup/list/", {"fields": ""})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chat_history(self):
+        pickup = self.pickups[0]
+        ChatMessage.objects.create(pickup_request=pickup, sender=self.vendor, message="hi")
+        url = f"/api/pickup/chat/{pickup.id}/"
+
+        data, sql = self.get(url, fields="id,message")
+        self.assertEqual(data, [{"id": data[0]["id"], "message": "hi"}])
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("offer_amount", sql)
+
+        data, sql = self.get(url, fields="sender_name", after_id=0)
+        self.assertEqual(data, [{"sender_name": self.vendor.full_name}])
+        self.assertIn("JOIN", sql)
+
+
+class ConditionalGetTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.customer)
+        self.pickup = self.make_pickup(status="pending")
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_list_is_one_aggregate_query(self):
+        first = self.client.get("/api/pickup/list/")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", first)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        # The aggregate and the vendor details.
+        with self.assertNumQueries(2):
+            again = self.revalidate("/api/pickup/list/", first)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(again.content, b"")
+
+    def test_changes_within_a_second_are_not_hidden(self):
+        first = self.client.get("/api/pickup/list/")
+        PickupRequest.objects.filter(id=self.pickup.id).update(
+            updated_at=self.pickup.updated_at + timedelta(microseconds=1)
+        )
+        since = self.client.get(
+            "/api/pickup/list/", HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(since.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.revalidate("/api/pickup/list/", first).status_code, status.HTTP_200_OK)
+
+    def test_vendor_details_move_the_etag(self):
+        PickupRequest.objects.filter(id=self.pickup.id).update(
+            assigned_to=self.vendor, status="vendor_accepted"
+        )
+        first = self.client.get("/api/pickup/list/")
+        self.vendor.phone_number = "9000000001"
+        self.vendor.save(update_fields=["phone_number"])
+        changed = self.revalidate("/api/pickup/list/", first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data["results"][0]["vendor_phone"], "9000000001")
+
+        self.client.force_authenticate(self.vendor)
+        first = self.client.get("/api/pickup/vendor-list/")
+        self.vendor.full_name = "Renamed"
+        self.vendor.save(update_fields=["full_name"])
+        changed = self.revalidate("/api/pickup/vendor-list/", first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data["results"][0]["vendor_name"], "Renamed")
+
+    def test_changes_move_the_etag(self):
+        first = self.client.get("/api/pickup/list/")
+        PickupRequest.objects.filter(id=self.pickup.id).transition("cancel")
+        changed = self.revalidate("/api/pickup/list/", first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+        PickupRequest.objects.filter(id=self.pickup.id).delete()
+        deleted = self.revalidate("/api/pickup/list/", changed)
+        self.assertEqual(deleted.status_code, status.HTTP_200_OK)
+        self.assertEqual(deleted.data["results"], [])
+
+    def test_etag_covers_query_and_user(self):
+        first = self.client.get("/api/pickup/list/")
+        narrowed = self.revalidate("/api/pickup/list/", first, fields="id")
+        self.assertEqual(narrowed.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(self.vendor)
+        other = self.revalidate("/api/pickup/vendor-list/", first)
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(other["ETag"], first["ETag"])
+
+    def test_pool_revalidates_without_queries(self):
+        self.client.force_authenticate(self.vendor)
+        first = self.client.get("/api/pickup/available/")
+        with self.assertNumQueries(0):
+            again = self.revalidate("/api/pickup/available/", first)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PickupRequest.objects.filter(id=self.pickup.id).transition("confirm")
+        changed = self.revalidate("/api/pickup/available/", first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(changed.data["results"]), 1)
+
+    def test_pool_revalidates_after_a_contact_change(self):
+        pooled = self.make_pickup()
+        self.client.force_authenticate(self.vendor)
+        first = self.client.get("/api/pickup/available/")
+
+        self.client.force_authenticate(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/pickup/contact/",
+                {
+                    "request_id": pooled.id,
+                    "contact_name": "New Contact",
+                    "contact_phone": "9123456789",
+                },
+            )
+
+        self.client.force_authenticate(self.vendor)
+        changed = self.revalidate("/api/pickup/available/", first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data["results"][0]["contact_name"], "New Contact")
+        self.assertEqual(changed.data["results"][0]["contact_phone"], "9123456789")
+
+    def test_chat_history(self):
+        pickup = self.make_pickup(assigned_to=self.vendor, status="vendor_accepted")
+        message = ChatMessage.objects.create(pickup_request=pickup, sender=self.vendor, message="hi")
+        url = f"/api/pickup/chat/{pickup.id}/"
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(f"/api/pickup/chat/{pickup.id}/read/")
+        read = self.revalidate(url, first)
+        self.assertEqual(read.status_code, status.HTTP_200_OK)
+        self.assertTrue(read.data[0]["is_read"])
+        self.assertEqual(read.data[0]["id"], message.id)
+
+        self.vendor.full_name = "Renamed"
+        self.vendor.save(update_fields=["full_name"])
+        renamed = self.revalidate(url, read)
+        self.assertEqual(renamed.status_code, status.HTTP_200_OK)
+        self.assertEqual(renamed.data[0]["sender_name"], "Renamed")
+
+
+class PoolChangeFeedTests(PickupAPITestCase):
+    url = "/api/pickup/available/changes/"
+
+    def setUp(self):
+        super().setUp()
+        self.since = timezone.now() - timedelta(seconds=1)
+
+    def changes(self, **params):
+        response = self.client.get(self.url, {"since": self.since.isoformat(), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data
+
+    def test_starting_watermark(self):
+        data = self.client.get(self.url).data
+        self.assertEqual((data["entered"], data["left"]), ([], []))
+        self.assertLessEqual(
+            data["watermark"], timezone.now() - timedelta(seconds=settings.POOL_CHANGES_SETTLE)
+        )
+
+    def test_entered_and_left(self):
+        staying = self.make_pickup(status="pending", scrap_type="Metal")
+        leaving = self.make_pickup(status="open")
+        PickupRequest.objects.filter(id=staying.id).transition("confirm")
+        self.client.post(f"/api/pickup/accept/{leaving.id}/")
+
+        data = self.changes()
+        self.assertEqual([row["id"] for row in data["entered"]], [staying.id])
+        self.assertEqual(data["entered"][0]["status"], "open")
+        self.assertEqual(data["left"], [leaving.id])
+
+        self.assertEqual(self.changes(scrap_type="Plastic")["entered"], [])
+        self.assertEqual(self.changes(fields="id")["entered"], [{"id": staying.id}])
+
+    def test_every_exit_leaves_a_tombstone(self):
+        expired = self.make_pickup(date="2020-01-01")
+        saved = self.make_pickup(date="2999-01-01")
+        deleted = self.make_pickup(date="2999-01-01")
+        deleted_id = deleted.id
+        pending = self.make_pickup(status="pending", date="2999-01-01")
+
+        call_command("expire_pickups", stdout=StringIO())
+        saved.status = "cancelled"
+        saved.save()
+        deleted.delete()
+        PickupRequest.objects.filter(id=pending.id).transition("cancel")
+
+        self.assertEqual(self.changes()["left"], sorted([expired.id, saved.id, deleted_id]))
+
+    def test_bulk_and_cascade_deletes_leave_tombstones(self):
+        other = User.objects.create_user(email="leaving-client@example.com")
+        bulk = self.make_pickup()
+        owned = self.make_pickup(user=other)
+        pending = self.make_pickup(status="pending")
+        kept = self.make_pickup()
+        first = self.client.get("/api/pickup/available/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PickupRequest.objects.filter(id__in=[bulk.id, pending.id]).delete()
+            other.delete()
+
+        self.assertEqual(self.changes()["left"], sorted([bulk.id, owned.id]))
+        pool = self.client.get("/api/pickup/available/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(pool.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in pool.data["results"]], [kept.id])
+
+    def test_unchanged_pool(self):
+        self.make_pickup()
+        self.since = timezone.now()
+        data = self.changes()
+        self.assertEqual((data["entered"], data["left"]), ([], []))
+
+    def test_naive_since_is_utc(self):
+        leaving = self.make_pickup()
+        self.client.post(f"/api/pickup/accept/{leaving.id}/")
+        naive = self.since.replace(tzinfo=None)
+        self.assertEqual(self.changes(since=naive.isoformat())["left"], [leaving.id])
+        naive = (timezone.now() + timedelta(seconds=1)).replace(tzinfo=None)
+        self.assertEqual(self.changes(since=naive.isoformat())["left"], [])
+
+    def test_bad_requests(self):
+        for since in ("yesterday", "2026-13-18T00:00:00Z"):
+            response = self.client.get(self.url, {"since": since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        old = timezone.now() - timedelta(seconds=settings.POOL_CHANGES_RETENTION + 60)
+        response = self.client.get(self.url, {"since": old.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(self.url, {"since": self.since.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_prune(self):
+        old = timezone.now() - timedelta(seconds=settings.POOL_CHANGES_RETENTION + 60)
+        pool_changes.record_exits([1, 2], old)
+        pool_changes.record_exits([3], timezone.now())
+        call_command("prune_pool_tombstones", stdout=StringIO())
+        self.assertEqual(list(PoolTombstone.objects.values_list("pickup_id", flat=True)), [3])
+
+
+class PickupImageTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_authenticate(self.customer)
+
+    def photo(self, size=(2000, 1500), fmt="JPEG", orientation=None):
+        """A photo carrying GPS EXIF, as phones produce."""
+        image = Image.new("RGB", size, "green")
+        image.paste("red", (0, 0, size[0] // 2, size[1]))
+        exif = Image.Exif()
+        exif.get_ifd(0x8825)[2] = (18.0, 31.0, 13.0)  # GPSLatitude
+        if orientation:
+            exif[0x0112] = orientation
+        buffer = BytesIO()
+        image.save(buffer, fmt, exif=exif)
+        return SimpleUploadedFile(f"photo.{fmt.lower()}", buffer.getvalue())
+
+    def create(self, photo):
+        response = self.client.post(
+            "/api/pickup/create/",
+            {
+                "address": "Somewhere",
+                "date": "2999-01-01",
+                "time_slot": "10:00-12:00",
+                "scrape_image": photo,
+            },
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return PickupRequest.objects.get(id=response.data["request_id"])
+
+    def test_upload_is_processed_by_the_worker(self):
+        # Orientation 6: stored landscape, displayed rotated to portrait.
+        pickup = self.create(self.photo(orientation=6))
+        original = pickup.scrape_image.path
+        job = Job.objects.get()
+        self.assertEqual((job.task, job.payload), ("process_pickup_image", {"pickup_id": pickup.id}))
+
+        jobs.run_pending()
+        pickup.refresh_from_db()
+        fmt = images.output_format()
+        with Image.open(pickup.scrape_image.path) as display:
+            self.assertEqual((display.format, display.size), (fmt, (1200, 1600)))
+            self.assertEqual(dict(display.getexif()), {})
+            # Rotated clockwise: the left (red) half is now on top.
+            self.assertGreater(display.convert("RGB").getpixel((600, 100))[0], 200)
+        with Image.open(pickup.scrape_image_thumb.path) as thumb:
+            self.assertEqual((thumb.format, thumb.size), (fmt, settings.PICKUP_IMAGE_THUMB_SIZE))
+            self.assertEqual(dict(thumb.getexif()), {})
+        with override_settings(BLOB_GC_GRACE=0):
+            blobs.collect()
+        self.assertFalse(Path(original).exists())
+
+        data = self.client.get("/api/pickup/list/").data["results"][0]
+        self.assertEqual(
+            data["scrape_image_thumb"],
+            f"http://testserver/media/{pickup.scrape_image_thumb.name}",
+        )
+
+    def test_jpeg_is_decoded_at_reduced_scale(self):
+        decoded = []
+        real_draft = Image.Image.draft
+
+        def draft(image, mode, size):
+            result = real_draft(image, mode, size)
+            decoded.append(image.size)
+            return result
+
+        with mock.patch.object(Image.Image, "draft", autospec=True, side_effect=draft):
+            image = images.decode(self.photo(size=(4000, 3000)), 400)
+        self.assertEqual(image.size, (400, 300))
+        # libjpeg's 1/4 scale: the 4000x3000 photo was never decoded whole.
+        self.assertEqual(decoded, [(1000, 750)])
+
+    @override_settings(PICKUP_IMAGE_MAX_PIXELS=1000)
+    def test_unprocessable_uploads_are_left_alone(self):
+        png = self.create(self.photo(size=(100, 100), fmt="PNG"))
+        Job.objects.all().delete()
+        for pickup in (png, self.make_pickup(scrape_image="pickup_images/missing.jpg")):
+            with self.assertLogs("app.services.images", "WARNING"):
+                self.assertFalse(images.process_pickup(pickup.id))
+            pickup.refresh_from_db()
+            self.assertFalse(pickup.scrape_image_thumb)
+        self.assertTrue(Path(png.scrape_image.path).exists())
+
+    def test_replaced_photo_is_not_overwritten(self):
+        pickup = self.create(self.photo())
+        original = pickup.scrape_image.name
+        real_render = images.render
+
+        def render_and_replace(file):
+            PickupRequest.objects.filter(id=pickup.id).update(scrape_image="pickup_images/new.jpg")
+            return real_render(file)
+
+        with mock.patch.object(images, "render", side_effect=render_and_replace):
+            self.assertFalse(images.process_pickup(pickup.id))
+        pickup.refresh_from_db()
+        self.assertEqual(pickup.scrape_image.name, "pickup_images/new.jpg")
+        self.assertFalse(pickup.scrape_image_thumb)
+        # The processed copies were released again.
+        self.assertEqual(
+            list(Blob.objects.filter(refcount__gt=0).values_list("name", flat=True)), [original]
+        )
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=media,
+            UPLOAD_SESSION_DIR=Path(media) / "sessions",
+            UPLOAD_MAX_FILE_SIZE=1000,
+            UPLOAD_MAX_REQUEST_SIZE=5000,
+            UPLOAD_CHUNK_SIZE=400,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.registration = {
+            "email": "upload@example.com",
+            "password": "password123",
+            "full_name": "Upload User",
+        }
+
+    def register(self, **extra):
+        return self.client.post(
+            "/api/register/client/", {**self.registration, **extra}, format="multipart"
+        )
+
+    def test_multipart_size_limits(self):
+        response = self.register(id_proof=SimpleUploadedFile("id.pdf", b"x" * 1000))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        User.objects.all().delete()
+
+        response = self.register(id_proof=SimpleUploadedFile("id.pdf", b"x" * 1001))
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertIn("id_proof", response.data["error"])
+
+        with override_settings(UPLOAD_MAX_REQUEST_SIZE=200):
+            response = self.register(id_proof=SimpleUploadedFile("id.pdf", b"x" * 10))
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(User.objects.exists())
+
+    def start(self, size, filename="licence.pdf"):
+        response = self.client.post(
+            "/api/uploads/", {"filename": filename, "size": size}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return f"/api/uploads/{response.data['upload_id']}/", response.data
+
+    def send(self, url, offset, data):
+        return self.client.generic(
+            "PATCH", url, data, content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_resumable_upload(self):
+        content = bytes(range(256)) * 3
+        url, data = self.start(len(content), filename="../../id proof.pdf")
+        self.assertEqual((data["offset"], data["chunk_size"]), (0, 400))
+
+        self.assertEqual(self.send(url, 0, content[:400]).data["offset"], 400)
+        # A retried or out-of-order chunk is refused with the offset to resume from.
+        response = self.send(url, 0, content[:400])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 400)
+        self.assertEqual(self.client.get(url).data["offset"], 400)
+
+        response = self.register(id_proof_upload=data["upload_id"])
+        self.assertEqual(response.data, {"id_proof_upload": ["Unknown or unfinished upload."]})
+
+        self.assertEqual(self.send(url, 400, content[400:]).data["offset"], len(content))
+        response = self.register(id_proof_upload=data["upload_id"])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get()
+        self.assertTrue(user.id_proof.name.startswith("client_docs/id/"))
+        with user.id_proof.open("rb") as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list((Path(settings.MEDIA_ROOT) / "sessions").iterdir()), [])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_files_are_closed_when_saving_fails(self):
+        User.objects.create_user(email=self.registration["email"], password="other")
+        content = b"x" * 10
+        url, data = self.start(len(content))
+        self.send(url, 0, content)
+
+        opened = []
+
+        def take(upload_id):
+            file = original_take(upload_id)
+            opened.append(file)
+            return file
+
+        original_take = uploads.take
+        with mock.patch.object(uploads, "take", side_effect=take):
+            response = self.register(id_proof_upload=data["upload_id"])
+        # Wrong password for the existing account: the save fails.
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].closed)
+        # The upload can still be used.
+        self.assertEqual(self.client.get(url).data["offset"], len(content))
+
+    def test_resumable_upload_limits(self):
+        response = self.client.post(
+            "/api/uploads/", {"filename": "big.pdf", "size": 1001}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        response = self.client.post("/api/uploads/", {"filename": "", "size": 10}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        url, _ = self.start(500)
+        response = self.send(url, 0, b"x" * 401)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.send(url, 0, b"x" * 400)
+        response = self.send(url, 400, b"x" * 101)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        response = self.client.generic("PATCH", url, b"x")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune(self):
+        stale_url, stale = self.start(10)
+        _, fresh = self.start(10)
+        UploadSession.objects.filter(id=stale["upload_id"]).update(
+            updated_at=timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL + 60)
+        )
+        call_command("prune_upload_sessions", stdout=StringIO())
+        self.assertEqual(
+            [str(session.id) for session in UploadSession.objects.all()], [str(fresh["upload_id"])]
+        )
+        self.assertFalse(Path(uploads.path(stale["upload_id"])).exists())
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.users = [
+            User.objects.create_user(email=f"vendor{i}@example.com", password="x") for i in range(3)
+        ]
+
+    def files(self):
+        root = Path(settings.MEDIA_ROOT)
+        return sorted(str(path.relative_to(root)) for path in root.rglob("*") if path.is_file())
+
+    def test_duplicate_uploads_share_a_blob(self):
+        digest = hashlib.sha256(b"licence").hexdigest()
+        for user in self.users[:2]:
+            user.business_license.save("Licence.PDF", ContentFile(b"licence"))
+        self.users[2].vendor_id_proof.save("id.pdf", ContentFile(b"licence"))
+
+        expected = f"vendor_docs/license/{digest[:2]}/{digest}.pdf"
+        self.assertEqual([user.business_license.name for user in self.users[:2]], [expected] * 2)
+        self.assertEqual(
+            self.files(), [f"vendor_docs/id/{digest[:2]}/{digest}.pdf", expected]
+        )
+        self.assertEqual(Blob.objects.get(name=expected).refcount, 2)
+        with self.users[1].business_license.open("rb") as stored:
+            self.assertEqual(stored.read(), b"licence")
+
+    def test_collect(self):
+        kept, dropped = self.users[0], self.users[1]
+        kept.business_license.save("a.pdf", ContentFile(b"shared"))
+        dropped.business_license.save("a.pdf", ContentFile(b"shared"))
+        dropped.gst_certificate.save("b.pdf", ContentFile(b"only mine"))
+        # Deleting a row does not release its files; collect_blobs recounts.
+        dropped.delete()
+        media = Path(settings.MEDIA_ROOT)
+        stray = media / "pickup_images/ab" / f"{'ab' * 32}.jpg"
+        legacy = media / "pickup_images/notes.txt"
+        stray.parent.mkdir(parents=True)
+        stray.write_bytes(b"left by a rollback")
+        legacy.write_bytes(b"not a blob")
+        old = time.time() - 60
+        os.utime(stray, (old, old))
+        os.utime(legacy, (old, old))
+
+        call_command("collect_blobs", stdout=StringIO())
+        self.assertEqual(len(self.files()), 4)  # all within BLOB_GC_GRACE
+
+        with override_settings(BLOB_GC_GRACE=0):
+            self.assertEqual(blobs.collect(), (2, len(b"only mine") + len(b"left by a rollback")))
+        self.assertEqual(self.files(), ["pickup_images/notes.txt", kept.business_license.name])
+        self.assertEqual(
+            list(Blob.objects.values_list("name", "refcount")), [(kept.business_license.name, 1)]
+        )
+
+    def test_delete_releases_a_reference(self):
+        for user in self.users[:2]:
+            user.business_license.save("a.pdf", ContentFile(b"licence"))
+        self.users[0].business_license.delete()
+        blob = Blob.objects.get()
+        self.assertEqual(blob.refcount, 1)
+        self.assertTrue(default_storage.exists(blob.name))
+
+        # Files stored before content addressing are plain files.
+        legacy = "vendor_docs/license/old.pdf"
+        Path(default_storage.path(legacy)).write_bytes(b"old")
+        default_storage.delete(legacy)
+        self.assertFalse(default_storage.exists(legacy))
+
+
+class MediaAccessTests(PickupAPITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, MEDIA_ACCEL="nginx")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.pickup = self.make_pickup(status="scheduled", assigned_to=self.vendor)
+        self.pickup.scrape_image.save("bottles.jpg", ContentFile(b"0123456789"))
+        self.photo = f"/media/{self.pickup.scrape_image.name}"
+        self.other_vendor = User.objects.create_user(
+            email="other-vendor@example.com", password="x", is_seller=True
+        )
+
+    def get(self, user, url, **headers):
+        self.client.force_authenticate(user)
+        return self.client.get(url, **headers)
+
+    def test_pickup_photo_access(self):
+        staff = User.objects.create_user(email="staff@example.com", password="x", is_staff=True)
+        for user in (self.customer, self.vendor, staff):
+            self.assertEqual(self.get(user, self.photo).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(self.other_vendor, self.photo).status_code, status.HTTP_404_NOT_FOUND)
+
+        # Any vendor may see photos of pickups in the open pool.
+        PickupRequest.objects.filter(id=self.pickup.id).update(status="open", assigned_to=None)
+        self.assertEqual(self.get(self.other_vendor, self.photo).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.photo).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_documents_are_private(self):
+        self.vendor.business_license.save("licence.pdf", ContentFile(b"%PDF"))
+        url = f"/media/{self.vendor.business_license.name}"
+        response = self.get(self.vendor, url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(self.get(self.other_vendor, url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.get(self.vendor, "/media/../core/settings.py").status_code, 404)
+
+    def test_bytes_are_sent_by_the_proxy(self):
+        response = self.get(self.customer, self.photo, HTTP_ACCEPT="image/*")
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{self.pickup.scrape_image.name}"
+        )
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Cache-Control"], "private, max-age=31536000, immutable")
+
+        with override_settings(MEDIA_ACCEL="sendfile"):
+            response = self.get(self.customer, self.photo)
+        self.assertEqual(response["X-Sendfile"], self.pickup.scrape_image.path)
+
+        # Names outside content addressing may change, so are revalidated.
+        legacy = "pickup_images/old.jpg"
+        Path(settings.MEDIA_ROOT, legacy).write_bytes(b"old")
+        PickupRequest.objects.filter(id=self.pickup.id).update(scrape_image=legacy)
+        response = self.get(self.customer, f"/media/{legacy}")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    @override_settings(MEDIA_ACCEL="")
+    def test_streams_without_a_proxy_and_supports_ranges(self):
+        response = self.get(self.customer, self.photo)
+        self.assertNotIn("X-Accel-Redirect", response)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        for header, body, content_range in (
+            ("bytes=2-5", b"2345", "bytes 2-5/10"),
+            ("bytes=7-", b"789", "bytes 7-9/10"),
+            ("bytes=-3", b"789", "bytes 7-9/10"),
+        ):
+            response = self.get(self.customer, self.photo, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(b"".join(response.streaming_content), body)
+            self.assertEqual(response["Content-Range"], content_range)
+
+        response = self.get(self.customer, self.photo, HTTP_RANGE="bytes=10-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    @override_settings(MEDIA_ACCEL="")
+    async def test_asgi_streams_without_buffering(self):
+        content = os.urandom(3 * media.READ_SIZE + 5)
+        name = await sync_to_async(default_storage.save)(
+            "pickup_images/large.jpg", ContentFile(content)
+        )
+        await PickupRequest.objects.filter(id=self.pickup.id).aupdate(scrape_image=name)
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.customer)}"}
+
+        response = await self.async_client.get(f"/media/{name}", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Length"], str(len(content)))
+        # An async iterator: Django sends it chunk by chunk instead of
+        # reading a sync one into a list first.
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b"".join(chunks), content)
+
+        response = await self.async_client.get(
+            f"/media/{name}", headers={**headers, "Range": "bytes=2-5"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(
+            b"".join([chunk async for chunk in response.streaming_content]), content[2:6]
+        )
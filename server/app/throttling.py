@@ -0,0 +1,98 @@
+import re
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .services.otp_service import OTPService
+
+
+class CacheCounterThrottle(BaseThrottle):
+    """
+    Fixed-window request limit kept as a cache counter.
+
+    Unlike DRF's SimpleRateThrottle (read the history, then write it back),
+    every check is one atomic ``incr``, so concurrent workers cannot both
+    slip under the limit, and the common path is a single cache round trip.
+
+    The rate comes from DEFAULT_THROTTLE_RATES under
+    ``<view.throttle_scope>_<key_name>``.
+    """
+
+    key_name = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.key_name}")
+        if scope is None or rate is None:
+            return True
+        ident = self.get_key(request, view)
+        if ident is None:
+            return True
+
+        self.limit, self.period = self.parse_rate(rate)
+        now = time.time()
+        window = int(now // self.period)
+        self.window_ends = (window + 1) * self.period - now
+        key = f"throttle:{scope}:{self.key_name}:{ident}:{window}"
+        return self.hit(key) <= self.limit
+
+    def hit(self, key):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # First request of the window. add() is atomic, so if another
+            # worker created the counter first we count on top of theirs.
+            if cache.add(key, 1, timeout=self.period + 1):
+                return 1
+            return cache.incr(key)
+
+    def wait(self):
+        return self.window_ends
+
+    @staticmethod
+    def parse_rate(rate):
+        num, period = rate.split("/")
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+        return int(num), seconds
+
+
+class ContactThrottle(CacheCounterThrottle):
+    """Limits requests per phone number / email (or pickup for its OTP)."""
+
+    key_name = "contact"
+    fields = ("contact", "contact_phone", "request_id")
+    contact_fields = ("contact", "contact_phone")
+
+    def get_key(self, request, view):
+        for field in self.fields:
+            value = request.data.get(field)
+            if value:
+                value = str(value).strip().lower()
+                if field in self.contact_fields:
+                    value = self.normalize_contact(value)
+                return f"{field}:{value}"
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.id}"
+        return None
+
+    @staticmethod
+    def normalize_contact(value):
+        """
+        The number the provider is actually sent to, so "98765 43210" and
+        "+919876543210" share a counter.
+        """
+        if "@" not in value:
+            value = re.sub(r"[\s().-]", "", value)
+        return OTPService.format_contact(value)
+
+
+class ClientIPThrottle(CacheCounterThrottle):
+    key_name = "ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
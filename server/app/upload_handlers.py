@@ -0,0 +1,44 @@
+"""
+Size limits for multipart uploads, enforced while the body is being read.
+
+BoundedUploadHandler runs first in FILE_UPLOAD_HANDLERS. A request whose
+Content-Length is over UPLOAD_MAX_REQUEST_SIZE is refused before any of
+its body is read, and a file is cut off as soon as it passes
+UPLOAD_MAX_FILE_SIZE; both answer 413. Chunks it lets through go on to
+Django's handlers, which keep files under FILE_UPLOAD_MAX_MEMORY_SIZE in
+memory and spool the rest to a temporary file chunk by chunk.
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Upload too large."
+    default_code = "upload_too_large"
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise UploadTooLarge(
+                {"error": f"Request body is larger than {settings.UPLOAD_MAX_REQUEST_SIZE} bytes."}
+            )
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_FILE_SIZE:
+            raise UploadTooLarge(
+                {"error": f"{self.field_name} is larger than {settings.UPLOAD_MAX_FILE_SIZE} bytes."}
+            )
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
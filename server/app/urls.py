@@ -3,6 +3,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     ClientRegistrationView,
     SellerRegistrationView,
+    UploadSessionCreateView,
+    UploadSessionView,
     CustomTokenObtainPairView,
     CreatePickupView,
     ContactInfoView,
@@ -11,14 +13,21 @@ from .views import (
     SendOTPView,
     VerifyAccountView,
     UserBookingsView,
+    UserBookingStatsView,
     CancelPickupView,
     AvailablePickupsView,
+    AvailablePickupChangesView,
     VendorPickupsView,
+    VendorPickupStatsView,
     AcceptPickupView,
     VendorCancelPickupView,
     ApproveVendorView,
     RejectVendorView,
     ChatView,
+    ChatStreamTicketView,
+    ChatStreamView,
+    MarkChatReadView,
+    UnreadCountsView,
     AcceptOfferView,
     RejectOfferView,
 )
@@ -26,6 +35,8 @@ from .views import (
 urlpatterns = [
     path("register/client/", ClientRegistrationView.as_view(), name="register_client"),
     path("register/seller/", SellerRegistrationView.as_view(), name="register_seller"),
+    path("uploads/", UploadSessionCreateView.as_view(), name="upload_create"),
+    path("uploads/<uuid:upload_id>/", UploadSessionView.as_view(), name="upload_session"),
     path("otp/send/", SendOTPView.as_view(), name="otp_send"),
     path("otp/verify/", VerifyOTPView.as_view(), name="otp_verify"),
     path("account/verify/", VerifyAccountView.as_view(), name="account_verify"),
@@ -34,18 +45,29 @@ urlpatterns = [
     
     path("pickup/create/", CreatePickupView.as_view(), name="pickup_create"),
     path("pickup/list/", UserBookingsView.as_view(), name="pickup_list"),
+    path("pickup/list/stats/", UserBookingStatsView.as_view(), name="pickup_list_stats"),
     path("pickup/cancel/<int:pk>/", CancelPickupView.as_view(), name="pickup_cancel"),
     path("pickup/contact/", ContactInfoView.as_view(), name="pickup_contact"),
     path("pickup/verify-otp/", VerifyPickupOTPView.as_view(), name="pickup_verify_otp"),
     
     path("pickup/available/", AvailablePickupsView.as_view(), name="pickup_available"),
+    path(
+        "pickup/available/changes/",
+        AvailablePickupChangesView.as_view(),
+        name="pickup_available_changes",
+    ),
     path("pickup/vendor-list/", VendorPickupsView.as_view(), name="pickup_vendor_list"),
+    path("pickup/vendor-list/stats/", VendorPickupStatsView.as_view(), name="pickup_vendor_list_stats"),
     path("pickup/accept/<int:pk>/", AcceptPickupView.as_view(), name="pickup_accept"),
     path("pickup/vendor-cancel/<int:pk>/", VendorCancelPickupView.as_view(), name="pickup_vendor_cancel"),
 
     path("pickup/approve/<int:pk>/", ApproveVendorView.as_view(), name="pickup_approve"),
     path("pickup/reject/<int:pk>/", RejectVendorView.as_view(), name="pickup_reject"),
     path("pickup/chat/<int:pickup_id>/", ChatView.as_view(), name="pickup_chat"),
+    path("pickup/chat/<int:pickup_id>/stream/", ChatStreamView.as_view(), name="pickup_chat_stream"),
+    path("pickup/chat/<int:pickup_id>/stream/ticket/", ChatStreamTicketView.as_view(), name="pickup_chat_stream_ticket"),
+    path("pickup/chat/<int:pickup_id>/read/", MarkChatReadView.as_view(), name="pickup_chat_read"),
+    path("pickup/chat/unread/", UnreadCountsView.as_view(), name="pickup_chat_unread"),
     path("pickup/offer/<int:msg_id>/accept/", AcceptOfferView.as_view(), name="offer_accept"),
     path("pickup/offer/<int:msg_id>/reject/", RejectOfferView.as_view(), name="offer_reject"),
 ]
@@ -2,18 +2,48 @@ from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
+from .renderers import FastJSONParser
+from .async_views import AsyncGenericAPIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import ClientRegistrationSerializer, SellerRegistrationSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import CustomTokenObtainPairSerializer
+from .serializers import CustomTokenObtainPairSerializer, serialize_auth_user
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from .serializers import PickupRequestSerializer, OTPVerificationSerializer, ChatMessageSerializer
-from .models import PickupRequest, ChatMessage
+from .serializers import PickupRequestSerializer, PickupRequestListSerializer, OTPVerificationSerializer, ChatMessageSerializer, parse_fields
+from .managers import VENDOR_COLUMNS
+from .models import PickupRequest, ChatMessage, UploadSession, User
 import random
-from .services.otp_service import OTPService
+from .services.otp_service import get_otp_service
+from .services import chat_events, jobs, otp_store, pool_cache, pool_changes, stream_tickets, unread, uploads
+from .conditional import Validators
+from . import media
+from .pagination import KeysetPagination
+from .throttling import ClientIPThrottle, ContactThrottle
+from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.views import View
+from asgiref.sync import sync_to_async
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed, ParseError
+from .authentication import CachedJWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+import asyncio
+from datetime import timedelta
+import json
+import os
+
+DEFAULT_PICKUP_RADIUS_KM = 10
+MAX_PICKUP_RADIUS_KM = 100
+# Vendor details on pickup rows; editing them does not touch updated_at.
+VENDOR_FIELDS = tuple(VENDOR_COLUMNS.values())
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -25,16 +55,7 @@ def get_auth_response(user, message):
     return Response(
         {
             "message": message,
-            "user": {
-                "email": user.email,
-                "full_name": user.full_name,
-                "phone_number": user.phone_number,
-                "is_client": user.is_client,
-                "is_seller": user.is_seller,
-                "is_verified": user.is_verified,
-                "is_phone_verified": user.is_phone_verified,
-                "is_email_verified": user.is_email_verified,
-            },
+            "user": serialize_auth_user(user),
             "refresh": str(refresh),
             "access": str(refresh.access_token),
         },
@@ -42,9 +63,23 @@ def get_auth_response(user, message):
     )
 
 
+def parse_timestamp(value):
+    """
+    An aware datetime from an ISO 8601 query parameter, or None if it is not
+    one. Values without an offset are taken as UTC (TIME_ZONE).
+    """
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:  # well-formed but impossible, e.g. month 13
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class ClientRegistrationView(GenericAPIView):
     permission_classes = [AllowAny]
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
     serializer_class = ClientRegistrationSerializer
 
     def post(self, request):
@@ -63,8 +98,10 @@ class SellerRegistrationView(GenericAPIView):
     def post(self, request):
         data = request.data
         if hasattr(data, "getlist"):
-            data = data.copy()
             scrape_types = data.getlist("scrape_types")
+            # dict() rather than copy(): copy() deep-copies the uploaded
+            # files, which fails for those spooled to disk.
+            data = data.dict()
             if scrape_types:
                 data["scrape_types"] = scrape_types
 
@@ -75,10 +112,98 @@ class SellerRegistrationView(GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SendOTPView(GenericAPIView):
+class UploadSessionCreateView(GenericAPIView):
+    """Starts a resumable upload; see services/uploads.py."""
+
     permission_classes = [AllowAny]
+    parser_classes = [FastJSONParser, FormParser]
+    throttle_classes = [ClientIPThrottle]
+    throttle_scope = "upload"
 
     def post(self, request):
+        filename = os.path.basename(str(request.data.get("filename", "")).replace("\\", "/"))
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = -1
+        if not filename or len(filename) > 255 or size < 0:
+            return Response(
+                {"error": "filename and size are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if size > settings.UPLOAD_MAX_FILE_SIZE:
+            return Response(
+                {"error": f"Files are limited to {settings.UPLOAD_MAX_FILE_SIZE} bytes."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        session = uploads.create(filename, size)
+        return Response(
+            {
+                "upload_id": session.id,
+                "offset": session.offset,
+                "size": session.size,
+                "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class UploadSessionView(GenericAPIView):
+    """
+    GET reports how much of an upload has arrived. PATCH appends one chunk:
+    the raw bytes as the body, starting at the ``Upload-Offset`` header.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, upload_id):
+        session = UploadSession.objects.filter(id=upload_id).first()
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return self.progress(session)
+
+    def patch(self, request, upload_id):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Upload-Offset header is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        session = UploadSession.objects.filter(id=upload_id).first()
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if length > settings.UPLOAD_CHUNK_SIZE or offset + length > session.size:
+            return Response(
+                {"error": f"Chunks are limited to {settings.UPLOAD_CHUNK_SIZE} bytes "
+                          f"and must end within the file's {session.size} bytes."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        try:
+            session = uploads.append(upload_id, offset, request.stream, length)
+        except UploadSession.DoesNotExist:  # pruned meanwhile
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        except uploads.OffsetConflict as exc:
+            return Response(
+                {"error": "Upload-Offset does not match the data received", "offset": exc.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return self.progress(session)
+
+    def progress(self, session):
+        return Response(
+            {"upload_id": session.id, "offset": session.offset, "size": session.size},
+            status=status.HTTP_200_OK,
+        )
+
+
+class SendOTPView(AsyncGenericAPIView):
+    permission_classes = [AllowAny]
+    throttle_classes = [ContactThrottle, ClientIPThrottle]
+    throttle_scope = "otp_send"
+
+    async def post(self, request):
         contact = request.data.get("contact")
         channel = request.data.get("channel", "sms")
 
@@ -87,8 +212,13 @@ class SendOTPView(GenericAPIView):
                 {"error": "Contact is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        otp_service = OTPService()
-        status_msg = otp_service.send_otp(contact, channel=channel)
+        otp_service = get_otp_service()
+        if otp_service.configured:
+            # The provider round trip happens in a worker, not in this request.
+            await jobs.aenqueue("send_otp", contact=contact, channel=channel)
+            status_msg = "queued"
+        else:
+            status_msg = await otp_service.asend_otp(contact, channel=channel)
 
         if status_msg:
              return Response(
@@ -110,12 +240,16 @@ class CreatePickupView(GenericAPIView):
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            pickup_request = serializer.save(user=request.user)
-
+            extra = {}
             if request.user.is_phone_verified:
-                pickup_request.status = "open"
-                pickup_request.is_phone_verified = True
-                pickup_request.save()
+                # Already verified accounts skip the OTP step; insert straight
+                # into the pool instead of saving the row twice.
+                extra = {"status": "open", "is_phone_verified": True}
+            pickup_request = serializer.save(user=request.user, **extra)
+            if pickup_request.scrape_image:
+                # Downscaling, EXIF stripping and the thumbnail happen in the
+                # worker; the upload is served as-is until then.
+                jobs.enqueue("process_pickup_image", pickup_id=pickup_request.id)
 
             return Response(
                 {
@@ -128,10 +262,12 @@ class CreatePickupView(GenericAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class VerifyOTPView(GenericAPIView):
+class VerifyOTPView(AsyncGenericAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [ContactThrottle, ClientIPThrottle]
+    throttle_scope = "otp_verify"
 
-    def post(self, request):
+    async def post(self, request):
         contact = request.data.get("contact")
         otp = request.data.get("otp")
 
@@ -141,8 +277,8 @@ class VerifyOTPView(GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        otp_service = OTPService()
-        is_valid = otp_service.verify_otp(contact, otp)
+        otp_service = get_otp_service()
+        is_valid = await otp_service.averify_otp(contact, otp)
 
         if is_valid:
             return Response({"message": "OTP Verified"}, status=status.HTTP_200_OK)
@@ -154,6 +290,8 @@ class VerifyOTPView(GenericAPIView):
 
 class VerifyPickupOTPView(GenericAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [ContactThrottle, ClientIPThrottle]
+    throttle_scope = "otp_verify"
     serializer_class = OTPVerificationSerializer
 
     def post(self, request):
@@ -162,34 +300,44 @@ class VerifyPickupOTPView(GenericAPIView):
             req_id = serializer.validated_data["request_id"]
             otp = serializer.validated_data["otp"]
 
-            try:
-                pickup_req = PickupRequest.objects.get(id=req_id)
-                if pickup_req.otp_code == otp:
-                    pickup_req.is_phone_verified = True
-                    pickup_req.status = "open"
-                    pickup_req.save()
-                    return Response(
-                        {"message": "Phone verified. Pickup confirmed."},
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    return Response(
-                        {"error": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
-                    )
-
-            except PickupRequest.DoesNotExist:
+            entry = otp_store.get(req_id)
+            if entry is None:
                 return Response(
-                    {"error": "Request not found"}, status=status.HTTP_404_NOT_FOUND
+                    {"error": "OTP expired or not requested"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            otp_service = get_otp_service()
+            if otp_service.configured:
+                valid = otp_service.verify_otp(entry["contact"], otp)
+            else:
+                valid = otp_store.matches(entry, otp)
+            if not valid:
+                return Response(
+                    {"error": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            otp_store.discard(req_id)
+            if PickupRequest.objects.filter(id=req_id).transition("confirm"):
+                return Response(
+                    {"message": "Phone verified. Pickup confirmed."},
+                    status=status.HTTP_200_OK,
+                )
+            return Response(
+                {"error": "Pickup is not awaiting verification"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ContactInfoView(GenericAPIView):
+class ContactInfoView(AsyncGenericAPIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [ContactThrottle, ClientIPThrottle]
+    throttle_scope = "otp_send"
     serializer_class = PickupRequestSerializer
 
-    def post(self, request):
+    async def post(self, request):
         req_id = request.data.get("request_id")
         if not req_id:
             return Response(
@@ -197,65 +345,73 @@ class ContactInfoView(GenericAPIView):
             )
 
         try:
-            pickup = PickupRequest.objects.get(id=req_id, user=request.user)
-            contact_name = request.data.get("contact_name")
-            contact_phone = request.data.get("contact_phone")
-
-            pickup.contact_name = contact_name
-            pickup.contact_phone = contact_phone
-
-            otp_service = OTPService()
-            mock_otp = otp_service.send_otp(contact_phone, channel="sms")
-
-            pickup.otp_code = mock_otp
-            pickup.save()
-
+            pickup_id = int(req_id)
+        except (TypeError, ValueError):
             return Response(
-                {
-                    "message": "Contact info updated. OTP sent.",
-                    "request_id": pickup.id,
-                    "mock_otp": mock_otp,
-                },
-                status=status.HTTP_200_OK,
+                {"error": "request_id must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        except PickupRequest.DoesNotExist:
+        contact_name = request.data.get("contact_name")
+        contact_phone = request.data.get("contact_phone")
+        updated = await PickupRequest.objects.filter(id=pickup_id, user=request.user).aupdate(
+            contact_name=contact_name,
+            contact_phone=contact_phone,
+            updated_at=timezone.now(),
+        )
+        if not updated:
             return Response(
                 {"error": "Pickup request not found"}, status=status.HTTP_404_NOT_FOUND
             )
+        # The pool feed shows the contact, and update() skips save().
+        if await PickupRequest.objects.open_pool().filter(id=pickup_id).aexists():
+            await sync_to_async(pool_cache.invalidate_on_commit)()
+
+        otp_service = get_otp_service()
+        if otp_service.configured:
+            # The code lives with the provider; it is sent by a worker and
+            # checked in VerifyPickupOTPView.
+            mock_otp = None
+            await jobs.aenqueue("send_otp", contact=contact_phone, channel="sms")
+        else:
+            mock_otp = await otp_service.asend_otp(contact_phone, channel="sms")
+        await otp_store.aissue(pickup_id, contact_phone, code=mock_otp)
+
+        return Response(
+            {
+                "message": "Contact info updated. OTP sent.",
+                "request_id": pickup_id,
+                "mock_otp": mock_otp,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
-class VerifyAccountView(GenericAPIView):
+class VerifyAccountView(AsyncGenericAPIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [ContactThrottle, ClientIPThrottle]
+    throttle_scope = "otp_verify"
 
-    def post(self, request):
+    async def post(self, request):
         otp = request.data.get("otp")
         if not otp:
             return Response(
                 {"error": "OTP is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        user = request.user
-        otp_service = OTPService()
-        is_valid = otp_service.verify_otp(user.phone_number, otp)
+        # request.user may come from the auth cache with most fields deferred.
+        user = await User.objects.aget(pk=request.user.pk)
+        otp_service = get_otp_service()
+        is_valid = await otp_service.averify_otp(user.phone_number, otp)
 
         if is_valid:
             user.is_phone_verified = True
             user.is_email_verified = True
-            user.save()
+            await user.asave(update_fields=["is_phone_verified", "is_email_verified"])
             return Response(
                 {
                     "message": "Account verified successfully",
-                    "user": {
-                        "email": user.email,
-                        "full_name": user.full_name,
-                        "phone_number": user.phone_number,
-                        "is_client": user.is_client,
-                        "is_seller": user.is_seller,
-                        "is_verified": user.is_verified,
-                        "is_phone_verified": user.is_phone_verified,
-                        "is_email_verified": user.is_email_verified,
-                    }
+                    "user": serialize_auth_user(user),
                 },
                 status=status.HTTP_200_OK,
             )
@@ -267,62 +423,205 @@ class VerifyAccountView(GenericAPIView):
 
 class UserBookingsView(GenericAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = PickupRequestSerializer
+    serializer_class = PickupRequestListSerializer
+    pagination_class = KeysetPagination
 
     def get(self, request):
-        bookings = PickupRequest.objects.filter(user=request.user).order_by("-created_at")
-        serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fields(request, self.get_serializer_class())
+        bookings = PickupRequest.objects.client_bookings(request.user)
+        validators = Validators.for_queryset(request, bookings, related=VENDOR_FIELDS)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        page = self.paginate_queryset(bookings.list_rows(fields))
+        serializer = self.get_serializer(page, many=True, fields=fields)
+        return validators.apply(self.get_paginated_response(serializer.data))
+
+
+class UserBookingStatsView(GenericAPIView):
+    """Totals over all of the client's bookings, not just one page."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        stats = PickupRequest.objects.client_bookings(request.user).stats(
+            pending_statuses=["pending"]
+        )
+        return Response(stats, status=status.HTTP_200_OK)
 
 
 class CancelPickupView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            pickup = PickupRequest.objects.get(id=pk, user=request.user)
-            if pickup.status == "pending":
-                pickup.status = "cancelled"
-                pickup.save()
-                return Response(
-                    {"message": "Booking cancelled successfully"},
-                    status=status.HTTP_200_OK,
-                )
-            else:
-                return Response(
-                    {"error": "Cannot cancel booking. Status is not pending."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        except PickupRequest.DoesNotExist:
+        bookings = PickupRequest.objects.filter(id=pk, user=request.user)
+        if bookings.transition("cancel"):
+            return Response(
+                {"message": "Booking cancelled successfully"},
+                status=status.HTTP_200_OK,
+            )
+        if bookings.exists():
             return Response(
-                {"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND
+                {"error": "Cannot cancel booking. Status is not pending."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(
+            {"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND
+        )
 
 
 class AvailablePickupsView(GenericAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = PickupRequestSerializer
+    serializer_class = PickupRequestListSerializer
+    pagination_class = KeysetPagination
 
     def get(self, request):
         if not request.user.is_seller:
              return Response({"error": "Only vendors can view available pickups"}, status=status.HTTP_403_FORBIDDEN)
         
-        pickups = PickupRequest.objects.filter(status="open", assigned_to__isnull=True).order_by("-created_at")
-        serializer = self.get_serializer(pickups, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fields(request, self.get_serializer_class())
+        cache_key = pool_cache.feed_key(request)
+        # The feed key already changes whenever the pool does.
+        validators = Validators(request, cache_key)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cached = pool_cache.get_feed(cache_key)
+        if cached is not None:
+            return validators.apply(Response(cached, status=status.HTTP_200_OK))
+
+        pickups = self.filter_pool(request)
+        if "distance_km" in pickups.query.annotations:
+            pickups = pickups.order_by("distance_km", "id")
+        else:
+            pickups = pickups.order_by("-created_at", "-id")
+
+        page = self.paginate_queryset(pickups.list_rows(fields))
+        serializer = self.get_serializer(page, many=True, fields=fields)
+        response = self.get_paginated_response(serializer.data)
+        pool_cache.set_feed(cache_key, response.data)
+        return validators.apply(response)
+
+    def filter_pool(self, request):
+        """
+        The open pool narrowed by the scrap_type and lat/lng/radius_km
+        query parameters; nearby rows are annotated with distance_km.
+        """
+        pickups = PickupRequest.objects.open_pool()
+
+        scrap_types = [
+            value
+            for param in request.query_params.getlist("scrap_type")
+            for value in param.split(",")
+            if value
+        ]
+        if scrap_types:
+            pickups = pickups.filter(scrap_type__in=scrap_types)
+
+        lat = request.query_params.get("lat")
+        lng = request.query_params.get("lng")
+        if lat is not None or lng is not None:
+            try:
+                lat = float(lat)
+                lng = float(lng)
+                radius_km = float(
+                    request.query_params.get("radius_km", DEFAULT_PICKUP_RADIUS_KM)
+                )
+            except (TypeError, ValueError):
+                raise ParseError({"error": "lat, lng and radius_km must be numbers"})
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ParseError({"error": "lat/lng out of range"})
+            if not (0 < radius_km <= MAX_PICKUP_RADIUS_KM):
+                raise ParseError(
+                    {"error": f"radius_km must be between 0 and {MAX_PICKUP_RADIUS_KM}"}
+                )
+            pickups = pickups.nearby(lat, lng, radius_km)
+        return pickups
+
+
+class AvailablePickupChangesView(AvailablePickupsView):
+    """
+    What changed in the open pool since a watermark: rows that entered it
+    (or changed while in it) and ids that left it. Takes the same filters
+    and ``fields`` as the pool itself. Without ``since`` only a starting
+    watermark is returned, to be fetched before loading the full pool.
+    """
+
+    pagination_class = None
+
+    def get(self, request):
+        if not request.user.is_seller:
+            return Response(
+                {"error": "Only vendors can view available pickups"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        fields = parse_fields(request, self.get_serializer_class())
+        watermark = pool_changes.watermark()
+        since = request.query_params.get("since")
+        if since is None:
+            return Response(
+                {"watermark": watermark, "entered": [], "left": []},
+                status=status.HTTP_200_OK,
+            )
+        since = parse_timestamp(since)
+        if since is None:
+            return Response(
+                {"error": "since must be an ISO 8601 datetime"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if pool_changes.is_expired(since):
+            return Response(
+                {"error": "since is too old; reload /pickup/available/"},
+                status=status.HTTP_410_GONE,
+            )
+
+        entered, left = pool_changes.changes(self.filter_pool(request), since)
+        entered = entered.order_by("updated_at", "id").list_rows(fields)
+        serializer = self.get_serializer(entered, many=True, fields=fields)
+        return Response(
+            {"watermark": watermark, "entered": serializer.data, "left": left},
+            status=status.HTTP_200_OK,
+        )
 
 
 class VendorPickupsView(GenericAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = PickupRequestSerializer
+    serializer_class = PickupRequestListSerializer
+    pagination_class = KeysetPagination
 
     def get(self, request):
         if not request.user.is_seller:
              return Response({"error": "Only vendors can view their pickups"}, status=status.HTTP_403_FORBIDDEN)
 
-        pickups = PickupRequest.objects.filter(assigned_to=request.user).order_by("-updated_at")
-        serializer = self.get_serializer(pickups, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fields = parse_fields(request, self.get_serializer_class())
+        pickups = PickupRequest.objects.vendor_pickups(request.user)
+        validators = Validators.for_queryset(request, pickups, related=VENDOR_FIELDS)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        page = self.paginate_queryset(pickups.list_rows(fields))
+        serializer = self.get_serializer(page, many=True, fields=fields)
+        return validators.apply(self.get_paginated_response(serializer.data))
+
+
+class VendorPickupStatsView(GenericAPIView):
+    """Totals over all of the vendor's pickups, plus the open pool's size."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_seller:
+             return Response({"error": "Only vendors can view their pickups"}, status=status.HTTP_403_FORBIDDEN)
+
+        stats = PickupRequest.objects.vendor_pickups(request.user).stats(
+            pending_statuses=["vendor_accepted", "scheduled", "in_progress"]
+        )
+        stats["available"] = PickupRequest.objects.open_pool().count()
+        return Response(stats, status=status.HTTP_200_OK)
 
 
 class AcceptPickupView(GenericAPIView):
@@ -332,98 +631,129 @@ class AcceptPickupView(GenericAPIView):
         if not request.user.is_seller:
              return Response({"error": "Only vendors can accept pickups"}, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            pickup = PickupRequest.objects.get(id=pk, status="open", assigned_to__isnull=True)
-            pickup.assigned_to = request.user
-            pickup.status = "vendor_accepted"
-            pickup.save()
+        if PickupRequest.objects.filter(id=pk).transition("accept", assigned_to=request.user):
             return Response({"message": "Pickup accepted. Waiting for client approval."}, status=status.HTTP_200_OK)
-        except PickupRequest.DoesNotExist:
-            return Response({"error": "Pickup unavailable or already taken"}, status=status.HTTP_404_NOT_FOUND)
+
+        if PickupRequest.objects.filter(id=pk).exists():
+            return Response({"error": "Pickup unavailable or already taken"}, status=status.HTTP_409_CONFLICT)
+        return Response({"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
 class VendorCancelPickupView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            pickup = PickupRequest.objects.get(id=pk, assigned_to=request.user)
-            if pickup.status == "vendor_accepted":
-                pickup.assigned_to = None
-                pickup.status = "open"
-                pickup.save()
-                return Response({"message": "Pickup acceptance cancelled. Released back to pool."}, status=status.HTTP_200_OK)
-            else:
-                 return Response({"error": "Cannot cancel. Status is not 'vendor_accepted'."}, status=status.HTTP_400_BAD_REQUEST)
-        except PickupRequest.DoesNotExist:
-            return Response({"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND)
+        pickups = PickupRequest.objects.filter(id=pk, assigned_to=request.user)
+        if pickups.transition("release"):
+            return Response({"message": "Pickup acceptance cancelled. Released back to pool."}, status=status.HTTP_200_OK)
+        if pickups.exists():
+            return Response({"error": "Cannot cancel. Status is not 'vendor_accepted'."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
 class ApproveVendorView(GenericAPIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, pk):
-        try:
-            pickup = PickupRequest.objects.get(id=pk, user=request.user)
-            if pickup.status == "vendor_accepted" and pickup.assigned_to:
-                pickup.status = "scheduled"
-                pickup.save()
-                return Response({"message": "Vendor approved. Pickup scheduled."}, status=status.HTTP_200_OK)
-            else:
-                return Response({"error": "Invalid status for approval"}, status=status.HTTP_400_BAD_REQUEST)
-        except PickupRequest.DoesNotExist:
-             return Response({"error": "Pickup request not found"}, status=status.HTTP_404_NOT_FOUND)
+        pickups = PickupRequest.objects.filter(id=pk, user=request.user)
+        if pickups.transition("approve"):
+            return Response({"message": "Vendor approved. Pickup scheduled."}, status=status.HTTP_200_OK)
+        if pickups.exists():
+            return Response({"error": "Invalid status for approval"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": "Pickup request not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
 class RejectVendorView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        try:
-            pickup = PickupRequest.objects.get(id=pk, user=request.user)
-            if pickup.status == "vendor_accepted":
-                pickup.assigned_to = None
-                pickup.status = "open"
-                pickup.save()
-                return Response({"message": "Vendor rejected. Request is open again."}, status=status.HTTP_200_OK)
-            else:
-                 return Response({"error": "Invalid status for rejection"}, status=status.HTTP_400_BAD_REQUEST)
-        except PickupRequest.DoesNotExist:
-             return Response({"error": "Pickup request not found"}, status=status.HTTP_404_NOT_FOUND)
+        pickups = PickupRequest.objects.filter(id=pk, user=request.user)
+        if pickups.transition("release"):
+            return Response({"message": "Vendor rejected. Request is open again."}, status=status.HTTP_200_OK)
+        if pickups.exists():
+            return Response({"error": "Invalid status for rejection"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": "Pickup request not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class ChatView(GenericAPIView):
+class ChatView(AsyncGenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ChatMessageSerializer
 
-    def get(self, request, pickup_id):
+    async def get(self, request, pickup_id):
         try:
-            pickup = PickupRequest.objects.get(id=pickup_id)
+            pickup = await PickupRequest.objects.only("user_id", "assigned_to_id").aget(id=pickup_id)
         except PickupRequest.DoesNotExist:
             return Response(
                 {"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        if pickup.user != request.user and pickup.assigned_to != request.user:
+        if request.user.id not in (pickup.user_id, pickup.assigned_to_id):
             return Response(
                 {"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN
             )
 
-        messages = ChatMessage.objects.filter(pickup_request=pickup).order_by(
-            "created_at"
+        fields = parse_fields(request, ChatMessageSerializer)
+        messages = ChatMessageSerializer.narrow_queryset(
+            ChatMessage.objects.filter(pickup_request=pickup).select_related("sender"),
+            fields,
         )
-        serializer = self.get_serializer(messages, many=True)
+
+        after_id = request.query_params.get("after_id")
+        since = request.query_params.get("since")
+        if after_id is None and since is None:
+            validators = await Validators.afor_queryset(
+                request,
+                ChatMessage.objects.filter(pickup_request=pickup),
+                related=("sender__full_name", "sender__email"),
+            )
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            serializer = self.get_serializer(
+                [message async for message in messages.order_by("created_at")],
+                many=True,
+                fields=fields,
+            )
+            return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
+
+        # Delta mode: only what is new (after_id) or changed (since).
+        if after_id is not None:
+            try:
+                messages = messages.filter(id__gt=int(after_id))
+            except ValueError:
+                return Response(
+                    {"error": "after_id must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if since is not None:
+            since_dt = parse_timestamp(since)
+            if since_dt is None:
+                return Response(
+                    {"error": "since must be an ISO 8601 datetime"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            # updated_at is stamped before the row commits, so a message
+            # may become visible with a stamp older than what the client
+            # has already seen; look back far enough to catch it.
+            settle = timedelta(seconds=settings.CHAT_SYNC_SETTLE)
+            messages = messages.filter(updated_at__gt=since_dt - settle)
+
+        serializer = self.get_serializer(
+            [message async for message in messages.order_by("id")], many=True, fields=fields
+        )
+        if not serializer.data:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def post(self, request, pickup_id):
+    async def post(self, request, pickup_id):
         try:
-            pickup = PickupRequest.objects.get(id=pickup_id)
+            pickup = await PickupRequest.objects.aget(id=pickup_id)
         except PickupRequest.DoesNotExist:
             return Response(
                 {"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        if pickup.user != request.user and pickup.assigned_to != request.user:
+        if request.user.id not in (pickup.user_id, pickup.assigned_to_id):
             return Response(
                 {"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN
             )
@@ -433,37 +763,104 @@ class ChatView(GenericAPIView):
 
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(sender=request.user, pickup_request=pickup)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            await sync_to_async(serializer.save)(sender=request.user, pickup_request=pickup)
+            # Rendered in a thread: sender_name and sender_email read the
+            # user, which the auth cache may hand over partly loaded.
+            data = await sync_to_async(lambda: serializer.data)()
+            return Response(data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class MarkChatReadView(GenericAPIView):
+    """
+    Marks the other participant's messages on a pickup as read, up to
+    ``up_to`` (a message id; everything when omitted), in one UPDATE.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pickup_id):
+        try:
+            pickup = PickupRequest.objects.only("user_id", "assigned_to_id").get(id=pickup_id)
+        except PickupRequest.DoesNotExist:
+            return Response(
+                {"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if request.user.id not in (pickup.user_id, pickup.assigned_to_id):
+            return Response(
+                {"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        messages = ChatMessage.objects.filter(pickup_request_id=pickup.id, is_read=False)
+        up_to = request.data.get("up_to")
+        if up_to is not None:
+            try:
+                messages = messages.filter(id__lte=int(up_to))
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "up_to must be a message id"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        marked = messages.exclude(sender=request.user).update(
+            is_read=True, updated_at=timezone.now()
+        )
+        unread.reset(request.user.id, pickup.id)
+        return Response({"marked": marked}, status=status.HTTP_200_OK)
+
+
+class UnreadCountsView(GenericAPIView):
+    """Unread message counts for every chat the user takes part in."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        pickup_ids = PickupRequest.objects.filter(
+            Q(user=request.user) | Q(assigned_to=request.user),
+            assigned_to__isnull=False,
+        ).values_list("id", flat=True)
+        counts = unread.counts(request.user, list(pickup_ids))
+        return Response(
+            {str(pickup_id): count for pickup_id, count in counts.items()},
+            status=status.HTTP_200_OK,
+        )
+
+
 class AcceptOfferView(GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, msg_id):
         try:
-            message = ChatMessage.objects.get(id=msg_id)
+            message = ChatMessage.objects.select_related("pickup_request").get(id=msg_id)
         except ChatMessage.DoesNotExist:
             return Response({"error": "Message not found"}, status=status.HTTP_404_NOT_FOUND)
 
         pickup = message.pickup_request
-        if message.sender == request.user:
+        if message.sender_id == request.user.id:
              return Response({"error": "Cannot accept your own offer"}, status=status.HTTP_403_FORBIDDEN)
         
-        if request.user not in [pickup.user, pickup.assigned_to]:
+        if request.user.id not in (pickup.user_id, pickup.assigned_to_id):
              return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
         
         if not message.is_offer or message.offer_status != 'pending':
              return Response({"error": "Invalid offer or already processed"}, status=status.HTTP_400_BAD_REQUEST)
 
-        message.offer_status = 'accepted'
-        message.save()
+        with transaction.atomic():
+            claimed = ChatMessage.objects.filter(
+                id=message.id, is_offer=True, offer_status="pending"
+            ).update(offer_status="accepted", updated_at=timezone.now())
+            if not claimed:
+                return Response({"error": "Invalid offer or already processed"}, status=status.HTTP_400_BAD_REQUEST)
+            chat_events.publish_message_on_commit(message.id)
+
+            scheduled = PickupRequest.objects.filter(id=pickup.id).transition(
+                "accept_offer", estimated_price=message.offer_amount
+            )
+            if not scheduled:
+                transaction.set_rollback(True)
+                return Response({"error": "Pickup can no longer be scheduled"}, status=status.HTTP_400_BAD_REQUEST)
 
-        pickup.status = 'scheduled'
-        pickup.estimated_price = message.offer_amount
-        pickup.save()
-        
         ChatMessage.objects.create(
             pickup_request=pickup,
             sender=request.user,
@@ -479,23 +876,27 @@ class RejectOfferView(GenericAPIView):
 
     def post(self, request, msg_id):
         try:
-            message = ChatMessage.objects.get(id=msg_id)
+            message = ChatMessage.objects.select_related("pickup_request").get(id=msg_id)
         except ChatMessage.DoesNotExist:
             return Response({"error": "Message not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if message.sender == request.user:
+        if message.sender_id == request.user.id:
              return Response({"error": "Cannot reject your own offer"}, status=status.HTTP_403_FORBIDDEN)
 
         pickup = message.pickup_request
-        if request.user not in [pickup.user, pickup.assigned_to]:
+        if request.user.id not in (pickup.user_id, pickup.assigned_to_id):
              return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
 
         if not message.is_offer or message.offer_status != 'pending':
              return Response({"error": "Invalid offer or already processed"}, status=status.HTTP_400_BAD_REQUEST)
 
-        message.offer_status = 'rejected'
-        message.save()
-        
+        rejected = ChatMessage.objects.filter(
+            id=message.id, is_offer=True, offer_status="pending"
+        ).update(offer_status="rejected", updated_at=timezone.now())
+        if not rejected:
+            return Response({"error": "Invalid offer or already processed"}, status=status.HTTP_400_BAD_REQUEST)
+        chat_events.publish_message_on_commit(message.id)
+
         ChatMessage.objects.create(
             pickup_request=pickup,
             sender=request.user,
@@ -504,3 +905,116 @@ class RejectOfferView(GenericAPIView):
         )
 
         return Response({"message": "Offer rejected."}, status=status.HTTP_200_OK)
+
+
+class ChatStreamTicketView(GenericAPIView):
+    """Issues a single-use ticket that opens ChatStreamView for one pickup."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pickup_id):
+        pickup = PickupRequest.objects.filter(id=pickup_id).values("user_id", "assigned_to_id").first()
+        if pickup is None:
+            return Response({"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id not in (pickup["user_id"], pickup["assigned_to_id"]):
+            return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
+        return Response(
+            {
+                "ticket": stream_tickets.issue(request.user.id, pickup_id),
+                "expires_in": settings.CHAT_STREAM_TICKET_TTL,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ChatStreamView(View):
+    """
+    Server-Sent Events stream of one pickup's chat: every new message and
+    every offer status change is pushed as it is committed.
+
+    EventSource cannot send headers, so it authenticates with ?ticket= from
+    ChatStreamTicketView rather than with the access token, which would end
+    up in access logs; other clients may send the usual bearer token.
+
+    Needs the ASGI app (core.asgi) to hold connections open without tying up
+    a worker. Under WSGI the endless stream would be read into memory, so
+    the view answers 501 and clients keep polling.
+    """
+
+    keepalive_seconds = 15
+
+    async def get(self, request, pickup_id):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"error": "Live updates need the ASGI server; poll the chat history instead"},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        ticket = request.GET.get("ticket")
+        if ticket is not None:
+            user_id = await stream_tickets.aredeem(ticket, pickup_id)
+            if user_id is None:
+                return JsonResponse({"error": "Invalid or expired ticket"}, status=status.HTTP_401_UNAUTHORIZED)
+        else:
+            header = request.headers.get("Authorization", "").split()
+            if len(header) != 2 or header[0] != "Bearer":
+                return JsonResponse({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
+            authenticator = CachedJWTAuthentication()
+            try:
+                validated = authenticator.get_validated_token(header[1])
+                user = await sync_to_async(authenticator.get_user)(validated)
+            except (InvalidToken, AuthenticationFailed):
+                return JsonResponse({"error": "Invalid token"}, status=status.HTTP_401_UNAUTHORIZED)
+            user_id = user.id
+
+        pickup = await (
+            PickupRequest.objects.filter(id=pickup_id).values("user_id", "assigned_to_id").afirst()
+        )
+        if pickup is None:
+            return JsonResponse({"error": "Pickup not found"}, status=status.HTTP_404_NOT_FOUND)
+        if user_id not in (pickup["user_id"], pickup["assigned_to_id"]):
+            return JsonResponse({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        response = StreamingHttpResponse(
+            self.events(chat_events.channel_for(pickup_id)),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def events(self, channel):
+        async with chat_events.get_broker().subscribe(channel) as queue:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: message\ndata: {json.dumps(event)}\n\n"
+
+
+class MediaView(GenericAPIView):
+    """
+    Serves uploaded files to the users allowed to see them, streamed or
+    handed to the proxy (see app/media.py). Session auth lets staff open
+    documents linked from the admin.
+    """
+
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # <img> requests send Accept: image/*; errors are still rendered as JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, name):
+        response = None
+        if media.can_view(request.user, name):
+            response = media.serve(request, name)
+        if response is None:
+            # Also for files the user may not see, so as not to reveal them.
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        return response
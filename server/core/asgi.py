@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production runs it under gunicorn with uvicorn workers (see entrypoint.sh).
+Lifespan events, which Django does not handle, open and close the OTP
+provider's async connection pool with each worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +17,29 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from app.checks import require_shared_broker, require_shared_cache  # noqa: E402  (needs the app registry)
+from app.services.otp_service import get_otp_service  # noqa: E402
+
+require_shared_cache()
+require_shared_broker()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await get_otp_service().aopen()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await get_otp_service().aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -52,7 +52,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise's middleware with async support (see app/middleware.py).
+    "app.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -136,14 +137,84 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are stored once per distinct content (app/storage.py). Blobs no
+# longer referenced for BLOB_GC_GRACE seconds are removed by the recurring
+# collect_blobs job (`manage.py collect_blobs --schedule`).
+STORAGES = {
+    "default": {"BACKEND": "app.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+BLOB_GC_GRACE = int(os.getenv("BLOB_GC_GRACE", "3600"))
+BLOB_GC_INTERVAL = int(os.getenv("BLOB_GC_INTERVAL", "86400"))
+
+# Media is access-checked by app.media. By default the file is streamed
+# from Python. Behind a proxy configured for it, set "nginx" to answer with
+# X-Accel-Redirect to MEDIA_ACCEL_LOCATION (an internal location aliased to
+# MEDIA_ROOT), or "sendfile" for X-Sendfile, so the proxy sends the bytes.
+MEDIA_ACCEL = os.getenv("MEDIA_ACCEL", "")
+MEDIA_ACCEL_LOCATION = os.getenv("MEDIA_ACCEL_LOCATION", "/protected-media/")
+
+# Shared by all processes in production (docker-compose uses Redis): pickup
+# OTPs, throttle counters, cached user details and the pool feed live here.
+# The servers and run_worker refuse to start on the per-process default
+# unless DEBUG or ALLOW_LOCAL_CACHE is set (see app/checks.py).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+ALLOW_LOCAL_CACHE = os.getenv("ALLOW_LOCAL_CACHE", "False") == "True"
+
+# Fan-out for the chat event streams. The in-process broker only reaches
+# streams served by the same process; use RedisBroker (docker-compose does)
+# whenever there is more than one. Outside DEBUG the servers refuse to start
+# on the in-process broker unless ALLOW_LOCAL_BROKER is set.
+CHAT_BROKER = os.getenv("CHAT_BROKER", "app.services.chat_events.InProcessBroker")
+CHAT_BROKER_URL = os.getenv("CHAT_BROKER_URL")
+ALLOW_LOCAL_BROKER = os.getenv("ALLOW_LOCAL_BROKER", "False") == "True"
+# Lifetime of the single-use tickets that open a chat stream.
+CHAT_STREAM_TICKET_TTL = int(os.getenv("CHAT_STREAM_TICKET_TTL", "30"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "app.authentication.CachedJWTAuthentication",
+    ],
+    # orjson-backed JSON; both fall back to DRF's own classes without orjson.
+    "DEFAULT_RENDERER_CLASSES": [
+        "app.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "app.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Used by app.throttling on the OTP endpoints, per contact and per IP.
+    # The counters live in the default cache, which must be shared between
+    # workers for the limits to be global.
+    "DEFAULT_THROTTLE_RATES": {
+        "otp_send_contact": os.getenv("OTP_SEND_RATE_CONTACT", "5/hour"),
+        "otp_send_ip": os.getenv("OTP_SEND_RATE_IP", "30/hour"),
+        "otp_verify_contact": os.getenv("OTP_VERIFY_RATE_CONTACT", "10/hour"),
+        "otp_verify_ip": os.getenv("OTP_VERIFY_RATE_IP", "60/hour"),
+        "upload_ip": os.getenv("UPLOAD_RATE_IP", "60/hour"),
+    },
+    # The client IP for the per-IP limits is REMOTE_ADDR. Behind N trusted
+    # proxies set this to N to take it from X-Forwarded-For instead; left
+    # unset, DRF would trust whatever X-Forwarded-For the client sends.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
 AUTH_USER_MODEL = "app.User"
 
+# How long app.authentication.CachedJWTAuthentication keeps a user's flags
+# cached. Saving the user drops the entry, so this only bounds memory use
+# and how long changes made with queryset.update() go unnoticed.
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "300"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -153,9 +224,73 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Expired refresh tokens are pruned by the recurring prune_tokens job
+# (queue it once with `manage.py prune_tokens --schedule`).
+TOKEN_PRUNE_INTERVAL = int(os.getenv("TOKEN_PRUNE_INTERVAL", "3600"))
+TOKEN_PRUNE_MAX_BATCHES = int(os.getenv("TOKEN_PRUNE_MAX_BATCHES", "200"))
+
+# Pool change feed (/api/pickup/available/changes/). Watermarks trail the
+# clock by POOL_CHANGES_SETTLE seconds so late commits are not skipped;
+# tombstones older than POOL_CHANGES_RETENTION are pruned by the recurring
+# prune_pool_tombstones job (`manage.py prune_pool_tombstones --schedule`).
+POOL_CHANGES_SETTLE = int(os.getenv("POOL_CHANGES_SETTLE", "5"))
+# Chat ?since= polls look back this far for the same reason.
+CHAT_SYNC_SETTLE = int(os.getenv("CHAT_SYNC_SETTLE", "5"))
+POOL_CHANGES_RETENTION = int(os.getenv("POOL_CHANGES_RETENTION", "3600"))
+POOL_CHANGES_PRUNE_INTERVAL = int(os.getenv("POOL_CHANGES_PRUNE_INTERVAL", "600"))
+
+# Multipart uploads (registration documents, pickup photos): requests over
+# UPLOAD_MAX_REQUEST_SIZE and files over UPLOAD_MAX_FILE_SIZE get a 413,
+# and files over FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk as they
+# arrive (app/upload_handlers.py).
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(10 * 2**20)))
+UPLOAD_MAX_REQUEST_SIZE = int(os.getenv("UPLOAD_MAX_REQUEST_SIZE", str(30 * 2**20)))
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 2**10
+FILE_UPLOAD_HANDLERS = [
+    "app.upload_handlers.BoundedUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Resumable uploads (/api/uploads/) for slow links: files arrive in PATCH
+# requests of at most UPLOAD_CHUNK_SIZE bytes and are assembled in
+# UPLOAD_SESSION_DIR. Sessions not used within UPLOAD_SESSION_TTL seconds
+# are removed by the recurring prune_upload_sessions job
+# (`manage.py prune_upload_sessions --schedule`).
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(2**20)))
+UPLOAD_SESSION_DIR = Path(os.getenv("UPLOAD_SESSION_DIR", BASE_DIR / "upload_sessions"))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+UPLOAD_SESSION_PRUNE_INTERVAL = int(os.getenv("UPLOAD_SESSION_PRUNE_INTERVAL", "3600"))
+
+# Pickup photos are downscaled to fit PICKUP_IMAGE_MAX_SIZE pixels on the
+# long side and recompressed (WebP, or JPEG where Pillow lacks WebP) by the
+# process_pickup_image job, which also cuts a PICKUP_IMAGE_THUMB_SIZE
+# thumbnail. Non-JPEG uploads larger than PICKUP_IMAGE_MAX_PIXELS are left
+# as uploaded, since only JPEG can be decoded at a reduced scale.
+PICKUP_IMAGE_MAX_SIZE = int(os.getenv("PICKUP_IMAGE_MAX_SIZE", "1600"))
+PICKUP_IMAGE_THUMB_SIZE = (320, 240)
+PICKUP_IMAGE_FORMAT = os.getenv("PICKUP_IMAGE_FORMAT", "WEBP")
+PICKUP_IMAGE_QUALITY = int(os.getenv("PICKUP_IMAGE_QUALITY", "80"))
+PICKUP_IMAGE_MAX_PIXELS = int(os.getenv("PICKUP_IMAGE_MAX_PIXELS", "40000000"))
+
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000,http://localhost:8080").split(",")
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 TWILIO_VERIFY_SERVICE_SID = os.getenv("TWILIO_VERIFY_SERVICE_SID")
+TWILIO_VERIFY_BASE_URL = os.getenv("TWILIO_VERIFY_BASE_URL", "https://verify.twilio.com/v2")
+
+# OTP provider calls run inside request workers: keep them short, and stop
+# calling the provider for a while after repeated failures.
+OTP_PROVIDER_CONNECT_TIMEOUT = float(os.getenv("OTP_PROVIDER_CONNECT_TIMEOUT", "3.05"))
+OTP_PROVIDER_READ_TIMEOUT = float(os.getenv("OTP_PROVIDER_READ_TIMEOUT", "5"))
+OTP_PROVIDER_FAILURE_THRESHOLD = int(os.getenv("OTP_PROVIDER_FAILURE_THRESHOLD", "5"))
+OTP_PROVIDER_RESET_TIMEOUT = float(os.getenv("OTP_PROVIDER_RESET_TIMEOUT", "30"))
+# Connections kept per process; under ASGI also the most provider calls a
+# worker has in flight at once.
+OTP_PROVIDER_POOL_SIZE = int(os.getenv("OTP_PROVIDER_POOL_SIZE", "10"))
+
+# Pickup contact OTPs are held in the cache (app.services.otp_store).
+PICKUP_OTP_TTL = int(os.getenv("PICKUP_OTP_TTL", "600"))
+PICKUP_OTP_MAX_ATTEMPTS = int(os.getenv("PICKUP_OTP_MAX_ATTEMPTS", "5"))
@@ -18,10 +18,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
-from app.views import CustomTokenObtainPairView
+from app.views import CustomTokenObtainPairView, MediaView
 
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -29,7 +28,5 @@ urlpatterns = [
     # jwt token auth paths
     path("api/login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:name>", MediaView.as_view(), name="media"),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from app.checks import require_shared_broker, require_shared_cache  # noqa: E402  (needs the app registry)
+
+require_shared_cache()
+require_shared_broker()